@@ -25,6 +25,8 @@ def ScratchModelParameterSweep(
     E_modulus=200000.0,
     density=7.8e-9,
     poisson=0.3,
+    num_cpus=6,
+    num_domains=None,
 ):
     ### Remember to use consistent units! This document uses SI(mm) units ###
 
@@ -104,8 +106,8 @@ def ScratchModelParameterSweep(
     mass_scale = 1e4
 
     # Parallelisation
-    num_cpus = 6
-    num_domains = num_cpus
+    if num_domains is None:
+        num_domains = num_cpus
 
     #### ------------------------------ ####
     #         Substrate geometry
@@ -0,0 +1,108 @@
+from abaqus import *
+from abaqusConstants import *
+import ProgressiveLoadScratch.Constants as C
+from ProgressiveLoadScratch.ProgressiveLoadScratchTest import ScratchModelSetup
+from ProgressiveLoadScratch.SubstrateMaterial import SubstrateMaterialAssignment
+from ProgressiveLoadScratch.helpers import write_input_deck
+from ProgressiveLoadScratch.SolverLauncher import SolverRun
+from ProgressiveLoadScratch.CpuTuning import (
+    TuningStore,
+    PrintScalingReport,
+    BestJobWidth,
+)
+import os
+import shutil
+from cleanup import cleanupAbaqusJunk
+
+### ---------------- ###
+# SETTINGS
+### ---------------- ###
+jobName = "CpuScaling"
+
+meshSize = 0.006
+
+# Matrix of cpu counts and domains per cpu to time. Abaqus needs the number of domains to be a multiple of the cpus
+cpuCounts = [1, 2, 4, 6, 8, 12]
+domainsPerCpu = [1, 2]
+
+# Fraction of the step times that is solved. Enough increments to time the solver, but short.
+# The whole load path is run in the shortened steps, so the contact and plasticity cost per
+# increment is that of a full run. The runs are for timing only; their results are discarded.
+shortenedStepFraction = 0.05
+
+# Total cpus of the node the sweeps run on. Used to report the best cpus per job
+total_cpus = C.num_cpus
+
+
+# Change abaqus working directory
+rundir = os.path.join("runs", jobName)
+if not os.path.exists(rundir):
+    os.makedirs(rundir)
+os.chdir(rundir)
+
+ScratchModel, SubstratePart = ScratchModelSetup(
+    SubstrateSizeX=meshSize,
+    SubstrateSizeY=meshSize,
+    SubstrateSizeZ=meshSize,
+    mass_scale=5e5,
+    use_ALE=True,
+    include_wear=False,
+    scratch_time=C.scratch_time * shortenedStepFraction,
+    unload_time=C.unload_time * shortenedStepFraction,
+)
+
+material = SubstrateMaterialAssignment(
+    ScratchModel,
+    SubstratePart,
+    rho=8.0e-09,
+    youngs_modulus=200000.0,
+    poisson_ratio=0.3,
+)
+material.JohnsonCookHardening(A=700.0, B=700.0, n=0.5)
+material.SectionAssignment()
+material.UpdateFrictionAndWear(0.1)
+
+deck = write_input_deck(jobName, "Deck")
+mdb.close()
+
+timings = []
+for cpus in cpuCounts:
+    for domainFactor in domainsPerCpu:
+        domains = cpus * domainFactor
+        run_dir = f"cpus{cpus}_domains{domains}"
+        if not os.path.exists(run_dir):
+            os.makedirs(run_dir)
+        shutil.copy(deck, os.path.join(run_dir, jobName + ".inp"))
+
+        run = SolverRun(
+            os.path.join(run_dir, jobName + ".inp"),
+            num_cpus=cpus,
+            num_domains=domains,
+        ).start()
+        run.wait()
+        if not run.succeeded:
+            print(f"{run_dir} failed with exit code {run.returncode}")
+            continue
+        print(f"{run_dir}: {run.wallclock_time:.1f} s")
+        timings.append(
+            {
+                "num_cpus": cpus,
+                "num_domains": domains,
+                "wallclock_time": run.wallclock_time,
+            }
+        )
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+PrintScalingReport(timings)
+if not TuningStore().update(meshSize, timings):
+    print(f"All runs failed, no timings stored for mesh size {meshSize}")
+
+best = BestJobWidth(timings, total_cpus)
+if best is not None:
+    print(
+        f"Best throughput on {total_cpus} cpus: {best['concurrent_jobs']} jobs with "
+        f"{best['num_cpus']} cpus and {best['num_domains']} domains "
+        f"({best['jobs_per_hour']:.1f} shortened jobs per hour)"
+    )
+
+cleanupAbaqusJunk()
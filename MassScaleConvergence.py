@@ -1,7 +1,7 @@
 from abaqus import *
 from abaqusConstants import *
 from ProgressiveLoadScratch.PostProcessing import *
-from ProgressiveLoadScratch.ProgressiveLoadScratchTest import ScratchModelSetup
+from ProgressiveLoadScratch.ModelCache import ModelBuildCache
 from ProgressiveLoadScratch.SubstrateMaterial import SubstrateMaterialAssignment
 import os
 from ProgressiveLoadScratch.helpers import run_job_and_wait
@@ -10,17 +10,25 @@ from ProgressiveLoadScratch.helpers import run_job_and_wait
 import shutil
 from cleanup import cleanupAbaqusJunk
 import ProgressiveLoadScratch.Constants as C
+from ProgressiveLoadScratch.ResultsFile import results_suffix
+from ProgressiveLoadScratch.Convergence import RefineUntilConverged
+import json
 
 ### ---------------- ###
 # SETTINGS
 ### ---------------- ###
 jobName = "MassScaleConvergence"
 
-# Array of shape (#mesh combinations, 3). Rows are mesh combinations, coloums are [meshSizeX, meshSizeY, meshSizeZ],
-# massScales = [5e6, 1e6, 1e5, 5e4, 1e4]
-massScales = [5e5, 1e5, 5e4, 1e4]
-# massScales = [1e3, 1e2, 1e1]
-# massScales = [4e5]
+# The mass scale starts at the most aggressive value and is divided by refinementFactor until the
+# RF2/RF3 histories and the final surface change by less than tolerance (relative L2 norm) from
+# the previous level, or minMassScale is reached
+startMassScale = 5e6
+refinementFactor = 5.0
+minMassScale = 1e1
+tolerance = 0.02
+massScales = [startMassScale]
+while massScales[-1] / refinementFactor >= minMassScale:
+    massScales.append(massScales[-1] / refinementFactor)
 
 
 meshSize = [0.030, 0.020, 0.010, 0.006]
@@ -67,10 +75,18 @@ material_params = {
 
 include_wear = False
 
-for id, massScale in enumerate(massScales):
+# Built models are saved in runs/ModelCache and reopened when the study is run again
+modelCache = ModelBuildCache(os.path.join("..", "ModelCache"))
 
+
+def run_mass_scale(massScale):
     fileName = "New_MassScale" + str(massScale)
-    ScratchModel, SubstratePart = ScratchModelSetup(
+    resultsPath = os.path.join("SimDataOutputs", fileName + results_suffix)
+    if os.path.exists(resultsPath):
+        # Solved by an earlier run of the study
+        return resultsPath
+
+    ScratchModel, SubstratePart = modelCache.ScratchModelSetup(
         SubstrateSizeY=meshSize[meshSizeIdx],
         SubstrateSizeX=meshSize[meshSizeIdx],
         SubstrateSizeZ=meshSize[meshSizeIdx],
@@ -94,9 +110,23 @@ for id, massScale in enumerate(massScales):
     material.UpdateFrictionAndWear(mu)
 
     run_job_and_wait(jobName)
-    PostProcess(jobName, fileName, material_params)
+    PostProcess(
+        jobName,
+        fileName,
+        material_params,
+        {
+            "mesh_size_x": meshSize[meshSizeIdx],
+            "mesh_size_y": meshSize[meshSizeIdx],
+            "mesh_size_z": meshSize[meshSizeIdx],
+            "mass_scale": massScale,
+            "use_ALE": True,
+            "num_cpus": C.num_cpus,
+        },
+    )
 
-    mdb.close()
+    # The model stays open, so the next iteration only changes the mass scaling and
+    # replaces the material; its section assignment is kept
+    del mdb.jobs[jobName]
     sta_file = jobName + ".sta"
     target_dir = "SimDataOutputs/"
     new_name = fileName + ".sta"
@@ -108,4 +138,10 @@ for id, massScale in enumerate(massScales):
     new_name = fileName + ".odb"
     dst_file = os.path.join(target_dir, new_name)
     shutil.move(odb_file, dst_file)
+    return resultsPath
+
+
+study = RefineUntilConverged(massScales, run_mass_scale, tolerance)
+with open("MassScaleConvergence.json", "w") as f:
+    json.dump(study, f, indent=2)
 cleanupAbaqusJunk()
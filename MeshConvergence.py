@@ -1,7 +1,7 @@
 from abaqus import *
 from abaqusConstants import *
 from ProgressiveLoadScratch.PostProcessing import *
-from ProgressiveLoadScratch.ProgressiveLoadScratchTest import ScratchModelSetup
+from ProgressiveLoadScratch.ModelCache import ModelBuildCache
 from ProgressiveLoadScratch.SubstrateMaterial import SubstrateMaterialAssignment
 import os
 from ProgressiveLoadScratch.helpers import run_job_and_wait
@@ -11,36 +11,36 @@ import numpy as np
 import shutil
 from cleanup import cleanupAbaqusJunk
 import ProgressiveLoadScratch.Constants as C
-
+from ProgressiveLoadScratch.ResultsFile import results_suffix
+from ProgressiveLoadScratch.CpuTuning import TuningStore
+from ProgressiveLoadScratch.Convergence import MeshStudy, RefinementSequence
+import json
 
 ### ---------------- ###
 # SETTINGS
 ### ---------------- ###
 jobName = "MeshConvergence"
 
-# Array of shape (#mesh combinations, 3). Rows are mesh combinations, coloums are [meshSizeX, meshSizeY, meshSizeZ],
+# Array of shape (#mesh combinations, 3). Rows are candidate mesh combinations, coloums are [meshSizeX, meshSizeY, meshSizeZ].
+# The study runs them coarsest first and refines only while the key outputs (mean forces, groove depth,
+# pile-up height) change by more than tolerance, so the finest meshes are only solved when needed
 meshSizes = np.array(
     [
-        # [0.040, 0.040, 0.040],
-        # [0.030, 0.030, 0.030],
-        # [0.020, 0.020, 0.020],
-        # [0.015, 0.015, 0.015],
-        # [0.010, 0.010, 0.010],
-        # [0.008, 0.010, 0.010],
-        # [0.010, 0.010, 0.008],
-        # [0.008, 0.010, 0.008],
-        # [0.008, 0.008, 0.008],
-        # [0.006, 0.006, 0.006],
+        [0.030, 0.030, 0.030],
+        [0.020, 0.020, 0.020],
+        [0.015, 0.015, 0.015],
+        [0.010, 0.010, 0.010],
+        [0.008, 0.008, 0.008],
+        [0.006, 0.006, 0.006],
         [0.005, 0.005, 0.005],
         [0.004, 0.004, 0.004],
+        [0.003, 0.003, 0.003],
+        [0.002, 0.002, 0.002],
     ]
 )
+tolerance = 0.02
 
 
-# Parallelisation
-num_cpus = 6
-num_domains = num_cpus
-
 # Change abaqus working directory
 rundir = os.path.join("runs", "MeshConvergence")
 if not os.path.exists(rundir):
@@ -80,18 +80,38 @@ material_params = {
 }
 
 include_wear = False
+mass_scale = 10e4
+
+# Candidates whose estimated increments or memory exceed the budget are skipped, and the rest are
+# ordered by estimated cost and thinned to a refinement ratio of at least 1.3 between meshes
+max_increments = 500000
+max_memory = 64 * 1024**3
+meshSizes = RefinementSequence(
+    meshSizes.tolist(),
+    material_params,
+    mass_scale,
+    max_increments,
+    max_memory,
+)
 
-for id, meshSize in enumerate(meshSizes):
+# Built models are saved in runs/ModelCache and reopened when the study is run again
+modelCache = ModelBuildCache(os.path.join("..", "ModelCache"))
 
+
+def run_mesh(meshSize):
     fileName = (
         "new_mesh" + str(meshSize[0]) + "_" + str(meshSize[1]) + "_" + str(meshSize[2])
     )
+    resultsPath = os.path.join("SimDataOutputs", fileName + results_suffix)
+    if os.path.exists(resultsPath):
+        # Solved by an earlier run of the study
+        return resultsPath
 
-    ScratchModel, SubstratePart = ScratchModelSetup(
+    ScratchModel, SubstratePart = modelCache.ScratchModelSetup(
         SubstrateSizeX=meshSize[1],
         SubstrateSizeY=meshSize[0],
         SubstrateSizeZ=meshSize[2],
-        mass_scale=10e4,
+        mass_scale=mass_scale,
         use_ALE=True,
         include_wear=include_wear,
     )
@@ -110,8 +130,25 @@ for id, meshSize in enumerate(meshSizes):
     material.SectionAssignment()
     material.UpdateFrictionAndWear(mu)
 
-    run_job_and_wait(jobName)
-    PostProcess(jobName, fileName, material_params)
+    # Fastest cpu and domain count from CpuScalingStudy.py, if the mesh size has been tuned
+    num_cpus, num_domains = TuningStore().fastest(min(meshSize)) or (
+        C.num_cpus,
+        C.num_domains,
+    )
+    run_job_and_wait(jobName, num_cpus=num_cpus, num_domains=num_domains)
+    PostProcess(
+        jobName,
+        fileName,
+        material_params,
+        {
+            "mesh_size_x": meshSize[1],
+            "mesh_size_y": meshSize[0],
+            "mesh_size_z": meshSize[2],
+            "mass_scale": mass_scale,
+            "use_ALE": True,
+            "num_cpus": num_cpus,
+        },
+    )
 
     mdb.close()
 
@@ -126,5 +163,17 @@ for id, meshSize in enumerate(meshSizes):
     new_name = fileName + ".odb"
     dst_file = os.path.join(target_dir, new_name)
     shutil.move(odb_file, dst_file)
+    return resultsPath
+
+
+study, richardson = MeshStudy(meshSizes, run_mesh, tolerance)
+for name, result in richardson.items():
+    print(
+        f"{name}: finest {study[-1][name]:.6g}, extrapolated {result['extrapolated']:.6g}, "
+        f"observed order {result['order']:.2f}, GCI {100 * result['gci']:.2f}%"
+        + (" (oscillatory)" if result["oscillatory"] else "")
+    )
+with open("MeshConvergence.json", "w") as f:
+    json.dump({"study": study, "richardson": richardson}, f, indent=2, default=float)
 
 cleanupAbaqusJunk()
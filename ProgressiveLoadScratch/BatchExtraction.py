@@ -0,0 +1,259 @@
+"""
+Re-extraction of archived ODBs with a pool of Abaqus Python workers.
+
+SweepExecutor archives the .odb and .sta of every finished run to SimDataOutputs as
+<name>.odb and <name>.sta. When PostProcess changes, the results of these runs are extracted
+again: BatchExtract takes folders or globs of ODBs, sends one "extract" request per ODB to a
+pool of "abaqus python PostProcessWorker.py --serve" processes sharing a KernelPool request
+queue, and reports the throughput.
+
+An ODB is skipped when its results file is up to date: the results were written by the current
+extraction code (ResultsFile.ExtractorFingerprint) from the same ODB, identified by its size and
+modification time, or with use_hash by the SHA-256 of its content, which survives copies that
+change the modification time. The material parameters and model settings of a run are taken
+from its existing results file.
+
+Run through benchmarks/fake_abaqus.py, the workers read the synthetic ODBs of the stand-in
+solver; benchmarks/extraction_benchmark.py times the pool on such ODBs.
+
+Command line use:
+    python -m ProgressiveLoadScratch.BatchExtraction --odbs runs/MaterialSweepNew/SimDataOutputs --workers 8
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import time
+from . import Constants as C
+from .KernelPool import KernelPool
+from .ResultsFile import (
+    ExtractorFingerprint,
+    ReadAttributes,
+    ResultsFiles,
+    results_suffix,
+)
+
+worker_script = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "PostProcessWorker.py"
+)
+
+
+def OdbFiles(patterns):
+    """ODB files in folders or matching glob patterns, sorted and without duplicates."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.odb")
+        paths.update(
+            os.path.abspath(path)
+            for path in glob.glob(pattern)
+            if path.endswith(".odb")
+        )
+    return sorted(paths)
+
+
+def file_hash(path, block_size=1 << 24):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def OdbStamp(odb_path, use_hash=False):
+    """Identifies the content of an ODB by its size and modification time, or its hash."""
+    stat = os.stat(odb_path)
+    stamp = {"odb_size": stat.st_size, "odb_mtime": stat.st_mtime}
+    if use_hash:
+        stamp["odb_hash"] = file_hash(odb_path)
+    return stamp
+
+
+def UpToDate(odb_path, results_path, use_hash=False, fingerprint=None):
+    """True if results_path was extracted from the ODB as it is now, by the current extraction code."""
+    if not os.path.exists(results_path):
+        return False
+    try:
+        attributes = ReadAttributes(results_path)
+    except (OSError, ValueError, KeyError):
+        return False
+    if attributes.get("extractor") != (fingerprint or ExtractorFingerprint()):
+        return False
+    source = attributes.get("source", {})
+    if use_hash:
+        return source.get("odb_hash") == file_hash(odb_path)
+    stamp = OdbStamp(odb_path)
+    return (
+        source.get("odb_size") == stamp["odb_size"]
+        and source.get("odb_mtime") == stamp["odb_mtime"]
+    )
+
+
+def ExtractionRequest(odb_path, output_folder, use_hash=False):
+    """
+    Request re-extracting an ODB to <output_folder>/<name>_Results.npz.
+
+    The material parameters and model settings come from a previous results file of the run,
+    in either format, in output_folder or else next to the ODB, if there is one.
+    """
+    name = os.path.splitext(os.path.basename(odb_path))[0]
+    material, model_settings = {}, {}
+    for folder in (output_folder, os.path.dirname(odb_path)):
+        previous = ResultsFiles(os.path.join(folder, name + "_Results.*"))
+        if previous:
+            attributes = ReadAttributes(previous[0])
+            material = attributes.get("material", {})
+            model_settings = attributes.get("model_settings", {})
+            break
+    return {
+        "type": "extract",
+        "job": os.path.splitext(odb_path)[0],
+        "file_name": name,
+        "output_folder": os.path.abspath(output_folder),
+        "material": material,
+        "model_settings": model_settings,
+        "attributes": {
+            "source": dict(OdbStamp(odb_path, use_hash), odb=odb_path),
+        },
+    }
+
+
+class ExtractionPool(KernelPool):
+    """A number of PostProcessWorker.py Abaqus Python processes serving one request queue."""
+
+    worker_prefix = "extractor"
+
+    def __init__(
+        self,
+        n_workers=4,
+        queue_dir="ExtractionQueue",
+        worker_command=None,
+        poll_interval=0.2,
+    ):
+        """
+        Args:
+            n_workers (int): Number of worker processes.
+            queue_dir (str): Directory of the request queue.
+            worker_command (list): Command starting Abaqus Python. Defaults to C.abaqus_command + ["python"].
+            poll_interval (float): Seconds between looks at the queue.
+        """
+        KernelPool.__init__(
+            self,
+            n_workers,
+            queue_dir,
+            worker_command or C.abaqus_command + ["python"],
+            poll_interval,
+        )
+
+    def worker_arguments(self, name):
+        return [
+            worker_script,
+            "--serve",
+            self.queue.queue_dir,
+            name,
+            str(self.poll_interval),
+        ]
+
+
+def BatchExtract(
+    patterns,
+    output_folder=None,
+    n_workers=4,
+    use_hash=False,
+    force=False,
+    queue_dir=None,
+    worker_command=None,
+    timeout=None,
+):
+    """
+    Extracts the ODBs that are not up to date with a pool of Abaqus Python workers.
+
+    Args:
+        patterns (list): Folders or globs of archived .odb files, each with its .sta next to it.
+        output_folder (str): Folder of the results files. Defaults to the folder of each ODB.
+        n_workers (int): Number of worker processes.
+        use_hash (bool): Compare ODBs by the hash of their content instead of size and modification time.
+        force (bool): Extract all ODBs, also those that are up to date.
+        queue_dir (str): Directory of the request queue. Defaults to ExtractionQueue next to the first ODB.
+        worker_command (list): Command starting Abaqus Python.
+        timeout (float): Seconds to wait for the extractions.
+
+    Returns:
+        dict: Counts of odbs, skipped, extracted and failed runs, the "requests" and their "results",
+            elapsed seconds, odbs_per_hour and the megabytes_per_second of ODB extracted.
+    """
+    start = time.time()
+    odbs = OdbFiles(patterns)
+    fingerprint = ExtractorFingerprint()
+    requests = []
+    for odb_path in odbs:
+        folder = output_folder or os.path.dirname(odb_path)
+        name = os.path.splitext(os.path.basename(odb_path))[0]
+        results_path = os.path.join(folder, name + results_suffix)
+        if not force and UpToDate(odb_path, results_path, use_hash, fingerprint):
+            continue
+        requests.append(ExtractionRequest(odb_path, folder, use_hash))
+
+    results = []
+    if requests:
+        if queue_dir is None:
+            queue_dir = os.path.join(os.path.dirname(odbs[0]), "ExtractionQueue")
+        pool = ExtractionPool(min(n_workers, len(requests)), queue_dir, worker_command)
+        with pool:
+            results = pool.map(requests, timeout)
+    elapsed = time.time() - start
+
+    failed = [result for result in results if result["status"] != "ok"]
+    extracted_bytes = sum(
+        request["attributes"]["source"]["odb_size"]
+        for request, result in zip(requests, results)
+        if result["status"] == "ok"
+    )
+    return {
+        "requests": requests,
+        "odbs": len(odbs),
+        "skipped": len(odbs) - len(requests),
+        "extracted": len(results) - len(failed),
+        "failed": len(failed),
+        "results": results,
+        "elapsed": elapsed,
+        "odbs_per_hour": 3600.0 * (len(results) - len(failed)) / max(elapsed, 1e-9),
+        "megabytes_per_second": extracted_bytes / 1024**2 / max(elapsed, 1e-9),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract the results of archived ODBs again with a pool of Abaqus Python workers."
+    )
+    parser.add_argument(
+        "--odbs", required=True, nargs="+", help="Folders or globs of .odb files"
+    )
+    parser.add_argument("--output", help="Folder of the results files")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--hash", action="store_true", help="Compare ODBs by content hash"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Extract up-to-date ODBs as well"
+    )
+    parser.add_argument("--queue-dir", help="Directory of the request queue")
+    args = parser.parse_args()
+
+    report = BatchExtract(
+        args.odbs,
+        args.output,
+        args.workers,
+        args.hash,
+        args.force,
+        args.queue_dir,
+    )
+    for request, result in zip(report["requests"], report["results"]):
+        if result["status"] != "ok":
+            print(f"{request['job']}.odb failed: {result['error']}")
+    print(
+        f"{report['odbs']} ODBs: {report['skipped']} up to date, {report['extracted']} extracted, "
+        f"{report['failed']} failed in {report['elapsed']:.1f} s "
+        f"({report['odbs_per_hour']:.0f} ODBs/hour, {report['megabytes_per_second']:.1f} MB/s)"
+    )
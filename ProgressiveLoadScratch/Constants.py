@@ -3,12 +3,20 @@ Constants relevant to the simulation geometry and meshing.
 
 """
 
+import os
+import shlex
+
 import numpy as np
 
 # Parallelisation
 num_cpus = 6
 num_domains = num_cpus
 
+# Command used to launch the Abaqus solver from a subprocess. Can be replaced by a
+# stand-in solver script, e.g. [sys.executable, os.path.abspath("benchmarks/fake_abaqus.py")],
+# also through the ABAQUS_COMMAND environment variable
+abaqus_command = shlex.split(os.environ.get("ABAQUS_COMMAND", "abaqus"))
+
 # For sketching. Not important but needs specification
 sheet_size = 10
 
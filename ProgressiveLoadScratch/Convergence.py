@@ -0,0 +1,402 @@
+"""
+Comparison of the results of two runs for convergence studies.
+
+A run is compared with the run of the previous refinement level through relative L2 norms of
+
+    - the RF2 and RF3 histories, resampled by linear interpolation onto a common time grid,
+    - the vertical displacement of the final contact surface, resampled onto a common grid in
+      the surface plane.
+
+The contact surface nodes of the structured mesh lie on a tensor grid of x and z, so the
+surface is interpolated along x for every z row and then along z, with np.interp on whole
+arrays. Runs on different meshes can therefore be compared as well.
+
+RefineUntilConverged runs the levels of a study one after the other and stops as soon as the
+change from the previous level is below a tolerance, so the most expensive levels are only
+solved if they are needed.
+
+For mesh studies, MeshStudy follows scalar key outputs (mean forces, residual groove depth and
+pile-up height) instead. From three meshes it computes the observed order of convergence p and
+the Richardson extrapolated values with the procedure of Celik et al. (2008), which allows for
+non-constant refinement ratios, and it skips a finer mesh when the extrapolation predicts a
+change below the tolerance. RefinementSequence picks the meshes with CostEstimate.
+"""
+
+import numpy as np
+from .CostEstimate import EstimateCost, OverBudget, format_estimate
+from .ResultsFile import ReadResultsFile, history_columns
+
+key_outputs = [
+    "mean_normal_force",
+    "mean_tangential_force",
+    "groove_depth",
+    "pile_up_height",
+]
+
+
+def ReadRun(path):
+    """
+    Reads a results file.
+
+    Returns:
+        dict: The header values, the "history" array of shape (samples, 6), and arrays "node_labels",
+            "undeformed" and "deformed" of the contact surface nodes.
+    """
+    return ReadResultsFile(path)
+
+
+def relative_error(values, reference):
+    """L2 norm of the difference relative to the L2 norm of the reference."""
+    norm = np.linalg.norm(reference)
+    if norm == 0.0:
+        return float(np.linalg.norm(values))
+    return float(np.linalg.norm(values - reference) / norm)
+
+
+def ResampleHistory(run, names, n_samples=200, end_time=None):
+    """
+    Interpolates history columns onto n_samples equally spaced times from 0 to end_time.
+
+    Returns:
+        np.ndarray: Array of shape (len(names), n_samples).
+    """
+    history = run["history"]
+    time = history[:, history_columns.index("Time")]
+    if end_time is None:
+        end_time = time[-1]
+    grid = np.linspace(0.0, end_time, n_samples)
+    return np.array(
+        [
+            np.interp(grid, time, history[:, history_columns.index(name)])
+            for name in names
+        ]
+    )
+
+
+def SurfaceGrid(run, component=1, use_deformed=True):
+    """
+    Arranges a component of the surface displacement on the tensor grid of the surface nodes.
+
+    Returns:
+        tuple: Sorted unique x and z coordinates, and the (len(x), len(z)) array of the component.
+    """
+    undeformed = run["undeformed"]
+    values = (
+        run["deformed"][:, component] - undeformed[:, component]
+        if use_deformed
+        else undeformed[:, component]
+    )
+    x, i = np.unique(np.round(undeformed[:, 0], 9), return_inverse=True)
+    z, k = np.unique(np.round(undeformed[:, 2], 9), return_inverse=True)
+    grid = np.full((len(x), len(z)), np.nan)
+    grid[i.ravel(), k.ravel()] = values
+    return x, z, grid
+
+
+def ResampleSurface(run, x, z, component=1):
+    """Interpolates a component of the surface displacement onto the grid of coordinates x by z."""
+    run_x, run_z, grid = SurfaceGrid(run, component)
+    # Along x for every z row of the run, then along z for every new x
+    along_x = np.array([np.interp(x, run_x, column) for column in grid.T])
+    return np.array([np.interp(z, run_z, row) for row in along_x.T])
+
+
+def common_surface_grid(run, reference, n_x=100, n_z=200):
+    """Equally spaced grid over the overlap of the contact surfaces of two runs."""
+    low = np.maximum(run["undeformed"].min(axis=0), reference["undeformed"].min(axis=0))
+    high = np.minimum(
+        run["undeformed"].max(axis=0), reference["undeformed"].max(axis=0)
+    )
+    return np.linspace(low[0], high[0], n_x), np.linspace(low[2], high[2], n_z)
+
+
+def ConvergenceError(
+    run, reference, n_samples=200, n_x=100, n_z=200, normalise_time=False
+):
+    """
+    Relative change of the forces and the surface profile of a run from a reference run.
+
+    Args:
+        run (dict): Result of ReadRun of the new level.
+        reference (dict): Result of ReadRun of the previous level.
+        n_samples (int): Number of samples of the resampled force histories.
+        n_x, n_z (int): Size of the grid the surface displacement is resampled onto.
+        normalise_time (bool): If True, the force histories are compared over the fraction of their
+            own step time, for runs of the same scratch in different step times.
+
+    Returns:
+        dict: Relative errors "RF2", "RF3" and "surface", and their maximum "max".
+    """
+    if normalise_time:
+        forces = ResampleHistory(run, ["RF2", "RF3"], n_samples)
+        reference_forces = ResampleHistory(reference, ["RF2", "RF3"], n_samples)
+    else:
+        end_time = min(run["history"][-1, 0], reference["history"][-1, 0])
+        forces = ResampleHistory(run, ["RF2", "RF3"], n_samples, end_time)
+        reference_forces = ResampleHistory(
+            reference, ["RF2", "RF3"], n_samples, end_time
+        )
+    x, z = common_surface_grid(run, reference, n_x, n_z)
+    errors = {
+        "RF2": relative_error(forces[0], reference_forces[0]),
+        "RF3": relative_error(forces[1], reference_forces[1]),
+        "surface": relative_error(
+            ResampleSurface(run, x, z), ResampleSurface(reference, x, z)
+        ),
+    }
+    errors["max"] = max(errors.values())
+    return errors
+
+
+def RefineUntilConverged(levels, run_level, tolerance=0.02, error=ConvergenceError):
+    """
+    Runs the levels of a study in order until the change from the previous level is below tolerance.
+
+    Args:
+        levels (list): Refinement levels, cheapest first, e.g. decreasing mass scales.
+        run_level: Callable solving a level and returning the path of its results file.
+        tolerance (float): Largest relative change between two levels taken as converged.
+        error: Callable comparing the ReadRun results of a level and the previous level.
+
+    Returns:
+        list: One dict per level run, with "level", "path", the errors from the previous level
+            and "converged" on the level that met the tolerance.
+    """
+    history = []
+    previous = None
+    for level in levels:
+        run = ReadRun(run_level(level))
+        entry = {"level": level, "path": run["path"]}
+        if previous is not None:
+            entry.update(error(run, previous))
+            print(
+                f"Level {level:g}: change RF2 {entry['RF2']:.4f}, RF3 {entry['RF3']:.4f}, "
+                f"surface {entry['surface']:.4f} from level {history[-1]['level']:g}"
+            )
+        history.append(entry)
+        if previous is not None and entry["max"] < tolerance:
+            entry["converged"] = True
+            print(f"Converged at level {level:g} with tolerance {tolerance:g}")
+            break
+        previous = run
+    return history
+
+
+def KeyOutputs(run):
+    """
+    Scalar outputs of a run followed by mesh studies.
+
+    Returns:
+        dict: Time averaged RF2 and RF3 over the scratch as mean_normal_force and mean_tangential_force,
+            and the depth of the residual groove and the height of the pile-up from the final surface.
+    """
+    history = run["history"]
+    time = history[:, history_columns.index("Time")]
+    duration = time[-1] - time[0]
+
+    def time_average(name):
+        values = history[:, history_columns.index(name)]
+        return float(
+            np.sum(0.5 * (values[1:] + values[:-1]) * np.diff(time)) / duration
+        )
+
+    vertical = run["deformed"][:, 1] - run["undeformed"][:, 1]
+    return {
+        "mean_normal_force": abs(time_average("RF2")),
+        "mean_tangential_force": abs(time_average("RF3")),
+        "groove_depth": float(-vertical.min()),
+        "pile_up_height": float(vertical.max()),
+    }
+
+
+def RichardsonExtrapolation(h, values, safety_factor=1.25, n_iterations=50):
+    """
+    Observed order, extrapolated value and grid convergence index from three meshes.
+
+    Args:
+        h (list): Representative mesh sizes of the three meshes, in any order.
+        values (list): The output on the three meshes.
+        safety_factor (float): Safety factor of the grid convergence index.
+
+    Returns:
+        dict: "order", "extrapolated" value, "gci" (relative error band of the finest mesh)
+            and "oscillatory", True if the output does not change monotonically.
+            The order is NaN if the output does not change between two of the meshes.
+    """
+    order = np.argsort(h)
+    h1, h2, h3 = np.asarray(h, dtype=float)[order]
+    f1, f2, f3 = np.asarray(values, dtype=float)[order]
+    r21, r32 = h2 / h1, h3 / h2
+    e21, e32 = f2 - f1, f3 - f2
+    result = {"order": np.nan, "extrapolated": f1, "gci": np.nan, "oscillatory": False}
+    if e21 == 0.0 or e32 == 0.0:
+        return result
+    sign = np.sign(e32 / e21)
+    p = 1.0
+    for _ in range(n_iterations):
+        q = np.log((r21**p - sign) / (r32**p - sign))
+        p_new = abs(np.log(abs(e32 / e21)) + q) / np.log(r21)
+        converged = abs(p_new - p) < 1e-10
+        p = p_new
+        if converged:
+            break
+    extrapolated = (r21**p * f1 - f2) / (r21**p - 1.0)
+    result.update(
+        {
+            "order": float(p),
+            "extrapolated": float(extrapolated),
+            "gci": (
+                float(safety_factor * abs(e21 / f1) / (r21**p - 1.0))
+                if f1 != 0.0
+                else np.nan
+            ),
+            "oscillatory": bool(sign < 0),
+        }
+    )
+    return result
+
+
+def PredictedChange(h, values, next_h):
+    """
+    Relative change of an output from the finest of three meshes to a mesh of size next_h,
+    predicted by Richardson extrapolation. NaN if no order can be found.
+    """
+    richardson = RichardsonExtrapolation(h, values)
+    finest = int(np.argmin(h))
+    f1 = float(values[finest])
+    p = richardson["order"]
+    if np.isnan(p) or f1 == 0.0:
+        return np.nan
+    return abs(
+        (f1 - richardson["extrapolated"]) * (1.0 - (next_h / h[finest]) ** p) / f1
+    )
+
+
+def representative_size(mesh_size):
+    """Scalar size of a mesh given by one size or by the sizes along x, y and z."""
+    return float(np.prod(np.atleast_1d(mesh_size)) ** (1.0 / np.size(mesh_size)))
+
+
+def RefinementSequence(
+    mesh_sizes,
+    material,
+    mass_scale,
+    max_increments=None,
+    max_memory=None,
+    min_ratio=1.3,
+):
+    """
+    Orders candidate meshes cheapest first by CostEstimate and thins them out.
+
+    Meshes over the budget are dropped, as are meshes that are less than min_ratio finer than the
+    previous one kept, since nearly equal meshes make the Richardson extrapolation unreliable.
+
+    Args:
+        mesh_sizes (list): Candidate meshes, each a size or sizes (x, y, z).
+        material (dict): Material parameters with rho, E and nu.
+        mass_scale (float): Fixed mass scaling factor of the runs.
+        max_increments (int): Most increments allowed.
+        max_memory (float): Most memory allowed in bytes.
+        min_ratio (float): Smallest refinement ratio between consecutive meshes.
+
+    Returns:
+        list: The meshes to run, cheapest first.
+    """
+    estimated = []
+    for mesh_size in mesh_sizes:
+        x, y, z = np.broadcast_to(np.asarray(mesh_size, dtype=float), (3,))
+        estimate = EstimateCost(
+            x,
+            y,
+            z,
+            float(material["E"]),
+            float(material["nu"]),
+            float(material["rho"]),
+            mass_scale,
+        )
+        reasons = OverBudget(estimate, max_increments, max_memory)
+        print(f"Mesh {mesh_size}: {format_estimate(estimate)}")
+        if reasons:
+            print(f"  skipped: {'; '.join(reasons)}")
+        else:
+            estimated.append((estimate["element_increments"], mesh_size))
+
+    sequence = []
+    for _, mesh_size in sorted(estimated, key=lambda item: item[0]):
+        if (
+            not sequence
+            or representative_size(sequence[-1]) / representative_size(mesh_size)
+            >= min_ratio
+        ):
+            sequence.append(mesh_size)
+    return sequence
+
+
+def MeshStudy(mesh_sizes, run_level, tolerance=0.02, outputs=KeyOutputs):
+    """
+    Refines the mesh while the key outputs keep changing by more than tolerance.
+
+    The study stops when all outputs change by less than tolerance relative to the previous mesh,
+    or, once three meshes have been run, when Richardson extrapolation predicts such a change for
+    the next mesh, so that it does not need to be solved.
+
+    Args:
+        mesh_sizes (list): Meshes to run, coarsest first, e.g. from RefinementSequence.
+        run_level: Callable solving a mesh and returning the path of its results file.
+        tolerance (float): Largest relative change of an output taken as converged.
+        outputs: Callable returning the dict of scalar outputs of a ReadRun result.
+
+    Returns:
+        list: One dict per mesh run with "mesh_size", "h", "path", the outputs and their relative "change".
+        dict: Per output, the RichardsonExtrapolation of the three finest meshes run. Empty if fewer were run.
+    """
+    history = []
+    for mesh_size in mesh_sizes:
+        h = representative_size(mesh_size)
+        if len(history) >= 3:
+            last = history[-3:]
+            predicted = {
+                name: PredictedChange(
+                    [entry["h"] for entry in last], [entry[name] for entry in last], h
+                )
+                for name in history[-1]["change"]
+            }
+            if all(change < tolerance for change in predicted.values()):
+                print(
+                    f"Richardson extrapolation predicts changes below {tolerance:g} "
+                    f"for mesh {mesh_size}, stopping"
+                )
+                history[-1]["converged"] = True
+                break
+
+        run = ReadRun(run_level(mesh_size))
+        entry = {"mesh_size": mesh_size, "h": h, "path": run["path"]}
+        entry.update(outputs(run))
+        names = [name for name in entry if name not in ("mesh_size", "h", "path")]
+        entry["change"] = {}
+        if history:
+            entry["change"] = {
+                name: abs(entry[name] - history[-1][name])
+                / max(abs(history[-1][name]), 1e-300)
+                for name in names
+            }
+            print(
+                f"Mesh {mesh_size}: change "
+                + ", ".join(
+                    f"{name} {value:.4f}" for name, value in entry["change"].items()
+                )
+            )
+        history.append(entry)
+        if len(history) > 1 and max(entry["change"].values()) < tolerance:
+            entry["converged"] = True
+            print(f"Converged at mesh {mesh_size} with tolerance {tolerance:g}")
+            break
+
+    report = {}
+    if len(history) >= 3:
+        last = history[-3:]
+        for name in last[-1]["change"]:
+            report[name] = RichardsonExtrapolation(
+                [entry["h"] for entry in last], [entry[name] for entry in last]
+            )
+    return history, report
@@ -0,0 +1,208 @@
+"""
+Estimate of the size and length of a run before it is submitted.
+
+The explicit solver takes increments no longer than the stable increment of the smallest
+element, which for a C3D8R element is about its shortest edge over the dilatational wave speed
+
+    cd = sqrt(E (1 - nu) / (rho (1 + nu) (1 - 2 nu)))
+
+Fixed mass scaling by a factor f multiplies the density and so the increment by sqrt(f), and the
+linear bulk viscosity b1 reduces it by sqrt(1 + b1^2) - b1. The element count and the smallest
+element length follow from the seeds of SubstrateMeshing, laid out by StructuredMesh.SubstrateSeeds,
+so no model has to be built. The memory is an order-of-magnitude figure from per-node and
+per-element byte counts of Abaqus/Explicit.
+
+Unlike CostModel, which learns wallclock times from previous runs, the estimate needs no data.
+Its element_increments, the number of elements times the number of increments, is proportional
+to the solver work and orders runs by cost as well as a fitted model does.
+
+Command line use:
+    python -m ProgressiveLoadScratch.CostEstimate --mesh 0.010 0.008 0.006 --mass-scale 5e5
+        --max-increments 200000 --max-memory 16
+"""
+
+import argparse
+import numpy as np
+from . import Constants as C
+from .StructuredMesh import SubstrateSeeds
+
+# Linear bulk viscosity parameter of Abaqus/Explicit
+bulk_viscosity = 0.06
+# Rough memory use of Abaqus/Explicit for C3D8R elements with the field and history outputs of the model
+bytes_per_node = 600
+bytes_per_element = 1500
+
+
+def DilatationalWaveSpeed(E, nu, rho):
+    """Speed of dilatational waves in an isotropic elastic material."""
+    return np.sqrt(E * (1.0 - nu) / (rho * (1.0 + nu) * (1.0 - 2.0 * nu)))
+
+
+def StableTimeIncrement(
+    element_length, E, nu, rho, mass_scale=1.0, bulk_viscosity=bulk_viscosity
+):
+    """
+    Element-by-element estimate of the stable time increment.
+
+    Args:
+        element_length (float): Characteristic length of the element, the shortest edge of a brick.
+        E (float): Young's modulus.
+        nu (float): Poisson's ratio.
+        rho (float): Density.
+        mass_scale (float): Fixed mass scaling factor.
+        bulk_viscosity (float): Linear bulk viscosity parameter, 0 for the undamped increment.
+
+    Returns:
+        float: The stable time increment.
+    """
+    damping = np.sqrt(1.0 + bulk_viscosity**2) - bulk_viscosity
+    return (
+        damping
+        * element_length
+        / DilatationalWaveSpeed(E, nu, rho)
+        * np.sqrt(mass_scale)
+    )
+
+
+def MeshSize(SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ):
+    """
+    Node and element counts and the shortest element edge of the substrate mesh.
+
+    Returns:
+        dict: n_nodes, n_elements and min_element_length.
+    """
+    x, y, z = SubstrateSeeds(SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ)
+    return {
+        "n_nodes": len(x) * len(y) * len(z),
+        "n_elements": (len(x) - 1) * (len(y) - 1) * (len(z) - 1),
+        "min_element_length": float(
+            min(np.diff(x).min(), np.diff(y).min(), np.diff(z).min())
+        ),
+    }
+
+
+def EstimateCost(
+    SubstrateSizeX,
+    SubstrateSizeY,
+    SubstrateSizeZ,
+    E,
+    nu,
+    rho,
+    mass_scale=1.0,
+    total_time=C.scratch_time + C.unload_time,
+):
+    """
+    Predicts the size of a run of the scratch model.
+
+    Args:
+        SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ (float): Mesh sizes of the refined area.
+        E, nu, rho (float): Elastic constants and density of the substrate.
+        mass_scale (float): Fixed mass scaling factor.
+        total_time (float): Step time of all steps.
+
+    Returns:
+        dict: n_nodes, n_elements, min_element_length, wave_speed, stable_increment, n_increments,
+            element_increments and memory_bytes.
+    """
+    estimate = MeshSize(SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ)
+    stable_increment = float(
+        StableTimeIncrement(estimate["min_element_length"], E, nu, rho, mass_scale)
+    )
+    n_increments = int(np.ceil(total_time / stable_increment))
+    estimate.update(
+        {
+            "wave_speed": float(DilatationalWaveSpeed(E, nu, rho)),
+            "stable_increment": stable_increment,
+            "n_increments": n_increments,
+            "element_increments": float(estimate["n_elements"]) * n_increments,
+            "memory_bytes": bytes_per_node * estimate["n_nodes"]
+            + bytes_per_element * estimate["n_elements"],
+        }
+    )
+    return estimate
+
+
+def EstimateRun(parameters, modelSettings):
+    """
+    EstimateCost of a material parameter dict run with the model settings written to the results header.
+    A mass_scale in the parameters, e.g. of automatic mass scaling, takes precedence over the model settings.
+    The step times are those of the model settings if given there.
+    """
+    return EstimateCost(
+        modelSettings["mesh_size_x"],
+        modelSettings["mesh_size_y"],
+        modelSettings["mesh_size_z"],
+        float(parameters["E"]),
+        float(parameters["nu"]),
+        float(parameters["rho"]),
+        parameters.get("mass_scale", modelSettings.get("mass_scale", 1.0)),
+        modelSettings.get("scratch_time", C.scratch_time)
+        + modelSettings.get("unload_time", C.unload_time),
+    )
+
+
+def OverBudget(
+    estimate, max_increments=None, max_memory=None, max_element_increments=None
+):
+    """
+    Returns the reasons why an estimated run exceeds the budget, or an empty list if it does not.
+
+    Args:
+        estimate (dict): Result of EstimateCost.
+        max_increments (int): Most increments allowed.
+        max_memory (float): Most memory allowed in bytes.
+        max_element_increments (float): Most elements times increments allowed.
+    """
+    reasons = []
+    if max_increments is not None and estimate["n_increments"] > max_increments:
+        reasons.append(f"{estimate['n_increments']} increments exceed {max_increments}")
+    if max_memory is not None and estimate["memory_bytes"] > max_memory:
+        reasons.append(
+            f"{estimate['memory_bytes'] / 1024**3:.1f} GiB exceed {max_memory / 1024**3:.1f} GiB"
+        )
+    if (
+        max_element_increments is not None
+        and estimate["element_increments"] > max_element_increments
+    ):
+        reasons.append(
+            f"{estimate['element_increments']:.3g} element increments exceed {max_element_increments:.3g}"
+        )
+    return reasons
+
+
+def format_estimate(estimate):
+    return (
+        f"{estimate['n_elements']} elements, min length {estimate['min_element_length']:.3g}, "
+        f"dt {estimate['stable_increment']:.3g}, {estimate['n_increments']} increments, "
+        f"{estimate['memory_bytes'] / 1024**3:.2f} GiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Estimate the size of scratch runs before submitting them."
+    )
+    parser.add_argument(
+        "--mesh", type=float, nargs="+", required=True, help="Mesh sizes"
+    )
+    parser.add_argument(
+        "--mass-scale", type=float, nargs="+", default=[1.0], help="Mass scales"
+    )
+    parser.add_argument("--E", type=float, default=200000.0)
+    parser.add_argument("--nu", type=float, default=0.3)
+    parser.add_argument("--rho", type=float, default=8e-09)
+    parser.add_argument("--max-increments", type=int)
+    parser.add_argument("--max-memory", type=float, help="GiB")
+    args = parser.parse_args()
+
+    max_memory = None if args.max_memory is None else args.max_memory * 1024**3
+    for mesh_size in args.mesh:
+        for mass_scale in args.mass_scale:
+            estimate = EstimateCost(
+                mesh_size, mesh_size, mesh_size, args.E, args.nu, args.rho, mass_scale
+            )
+            reasons = OverBudget(estimate, args.max_increments, max_memory)
+            print(
+                f"mesh {mesh_size:g}, mass scale {mass_scale:g}: {format_estimate(estimate)}"
+                + (f" -- over budget: {'; '.join(reasons)}" if reasons else "")
+            )
@@ -0,0 +1,306 @@
+"""
+Wallclock cost model learned from previous runs.
+
+Every results file written by PostProcess records the material parameters, the model
+settings and the wallclock time of the run in its header. The model fits the logarithm of
+the wallclock time to a linear function of
+
+    log E, log rho, log A, log B, n, mu, log mesh size, log mass scale and log cpus,
+
+which covers the power laws of explicit dynamics (element count ~ h^-3, increments ~
+h^-1 sqrt(E / (rho * mass_scale))) and of the parallel speed-up of a job while leaving the
+exponents to the data. Runs whose header lacks the mesh size or mass scale, e.g. those written
+before the model settings were recorded, are skipped unless defaults supply them
+(--default-mesh-size and --default-mass-scale on the command line). Runs without num_cpus ran
+on C.num_cpus.
+
+Command line use:
+    python -m ProgressiveLoadScratch.CostModel --results runs/MaterialSweepNew/SimDataOutputs
+        --parameters material_parameters/halton_discrete_material_parameter_sweep.csv
+        --mesh-size 0.006 --mass-scale 5e5 --jobs 4
+"""
+
+import argparse
+import csv
+import json
+import numpy as np
+from . import Constants as C
+from .ResultsFile import ResultsFiles, ReadResultsHeader, parse_value
+
+feature_names = [
+    "log_E",
+    "log_rho",
+    "log_A",
+    "log_B",
+    "n",
+    "mu",
+    "log_mesh_size",
+    "log_mass_scale",
+    "log_num_cpus",
+]
+
+
+def mesh_size(record):
+    """Smallest mesh size of a record, which sets the stable time increment."""
+    sizes = [
+        float(record[key])
+        for key in ("mesh_size_x", "mesh_size_y", "mesh_size_z")
+        if key in record
+    ]
+    if sizes:
+        return min(sizes)
+    return float(record["mesh_size"])
+
+
+def missing_features(record):
+    """Names of the values a record lacks to compute its features."""
+    missing = [
+        key
+        for key in ("E", "rho", "A", "B", "n", "mu", "mass_scale")
+        if key not in record
+    ]
+    if not any(
+        key in record
+        for key in ("mesh_size", "mesh_size_x", "mesh_size_y", "mesh_size_z")
+    ):
+        missing.append("mesh_size")
+    return missing
+
+
+def features(record):
+    """
+    Returns the feature vector of a record with material parameters, mesh size, mass scale and
+    the number of cpus of the job, C.num_cpus if it has none.
+    """
+    return np.array(
+        [
+            np.log(float(record["E"])),
+            np.log(float(record["rho"])),
+            np.log(float(record["A"])),
+            np.log(float(record["B"])),
+            float(record["n"]),
+            float(record["mu"]),
+            np.log(mesh_size(record)),
+            np.log(float(record["mass_scale"])),
+            np.log(float(record.get("num_cpus", C.num_cpus))),
+        ]
+    )
+
+
+class WallclockModel:
+    """Log-linear least squares model of the wallclock time of a run."""
+
+    def __init__(self, coefficients=None, residual_std=0.0, n_samples=0):
+        """
+        Args:
+            coefficients (array): Intercept followed by one coefficient per feature.
+            residual_std (float): Standard deviation of the residuals of log(wallclock).
+            n_samples (int): Number of runs the model was fitted on.
+        """
+        self.coefficients = None if coefficients is None else np.asarray(coefficients)
+        self.residual_std = residual_std
+        self.n_samples = n_samples
+
+    def fit(self, records, regularisation=1e-6):
+        """
+        Fits the model to records holding material parameters, mesh size, mass scale and WallclockTime.
+        A small ridge term keeps the fit well posed when a feature does not vary, e.g. a fixed mesh size.
+
+        Args:
+            records (list): List of dicts as returned by ReadResultsHeader.
+            regularisation (float): Ridge regularisation of the feature coefficients.
+
+        Returns:
+            WallclockModel: The fitted model.
+        """
+        if not records:
+            raise ValueError("No records with a wallclock time to fit")
+        X = np.array([features(record) for record in records])
+        y = np.log([float(record["WallclockTime"]) for record in records])
+
+        # Centre the features so that the ridge term does not pull on the intercept
+        mean = X.mean(axis=0)
+        Xc = X - mean
+        A = Xc.T @ Xc + regularisation * len(records) * np.eye(X.shape[1])
+        weights = np.linalg.solve(A, Xc.T @ (y - y.mean()))
+        intercept = y.mean() - mean @ weights
+
+        self.coefficients = np.concatenate([[intercept], weights])
+        residuals = y - self.predict_log(X)
+        self.residual_std = float(residuals.std()) if len(records) > 1 else 0.0
+        self.n_samples = len(records)
+        return self
+
+    def predict_log(self, X):
+        if self.coefficients is None:
+            raise ValueError("The model has not been fitted")
+        return self.coefficients[0] + np.asarray(X) @ self.coefficients[1:]
+
+    def predict(self, records):
+        """
+        Predicts the wallclock time of one record or a list of records.
+
+        Args:
+            records (dict or list): Material parameters with mesh size and mass scale.
+
+        Returns:
+            float or array: Predicted wallclock time in seconds.
+        """
+        if isinstance(records, dict):
+            return float(np.exp(self.predict_log(features(records))))
+        X = np.array([features(record) for record in records])
+        return np.exp(self.predict_log(X))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "features": feature_names,
+                    "coefficients": self.coefficients.tolist(),
+                    "residual_std": self.residual_std,
+                    "n_samples": self.n_samples,
+                },
+                f,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data["features"] != feature_names:
+            raise ValueError(f"{path} was fitted on other features: {data['features']}")
+        return cls(data["coefficients"], data["residual_std"], data["n_samples"])
+
+
+def ReadResults(pattern, defaults=None):
+    """
+    Reads the headers of all results files matching a glob pattern or in a folder.
+
+    Args:
+        pattern (str): Folder or glob pattern of results files.
+        defaults (dict): Values used when a header lacks them, e.g. mesh size and mass scale of older runs.
+
+    Returns:
+        list: Records of the runs that have a wallclock time and all features.
+    """
+    records = []
+    skipped = {}
+    for path in ResultsFiles(pattern):
+        record = dict(defaults or {})
+        record.update(ReadResultsHeader(path))
+        if "WallclockTime" not in record:
+            continue
+        missing = missing_features(record)
+        if missing:
+            skipped.setdefault(", ".join(missing), []).append(path)
+            continue
+        record["path"] = path
+        records.append(record)
+    for missing, paths in skipped.items():
+        print(f"Skipped {len(paths)} results files without {missing}, e.g. {paths[0]}")
+    return records
+
+
+def FitFromResults(pattern, defaults=None):
+    """Fits a WallclockModel to all results files matching a glob pattern or in a folder."""
+    return WallclockModel().fit(ReadResults(pattern, defaults))
+
+
+def ReadParameters(path):
+    """Reads a material parameter sweep written by material_parameter_generator.py as a list of dicts."""
+    with open(path, "r") as f:
+        return [
+            {key: parse_value(value, key) for key, value in row.items()}
+            for row in csv.DictReader(f)
+        ]
+
+
+def format_duration(seconds):
+    hours, rest = divmod(int(round(seconds)), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Predict the wallclock time of a sweep from previous runs."
+    )
+    parser.add_argument(
+        "--results", required=True, nargs="+", help="Folders or globs of results"
+    )
+    parser.add_argument(
+        "--parameters",
+        help="Parameter sweep .csv written by material_parameter_generator.py",
+    )
+    parser.add_argument(
+        "--mesh-size", type=float, help="Mesh size of the new sweep, with --parameters"
+    )
+    parser.add_argument(
+        "--mass-scale",
+        type=float,
+        help="Mass scale of the new sweep, with --parameters",
+    )
+    parser.add_argument(
+        "--default-mesh-size",
+        type=float,
+        help="Mesh size of previous runs whose results do not record it",
+    )
+    parser.add_argument(
+        "--default-mass-scale",
+        type=float,
+        help="Mass scale of previous runs whose results do not record it",
+    )
+    parser.add_argument("--cpus", type=int, help="Cpus per job of the new sweep")
+    parser.add_argument("--jobs", type=int, default=1, help="Concurrent jobs")
+    parser.add_argument("--save", help="Write the fitted model to this .json file")
+    parser.add_argument("--per-run", action="store_true", help="List every run")
+    args = parser.parse_args()
+    if args.parameters and (args.mesh_size is None or args.mass_scale is None):
+        parser.error(
+            "--parameters requires the --mesh-size and --mass-scale of the sweep"
+        )
+
+    defaults = {}
+    if args.default_mesh_size is not None:
+        defaults["mesh_size"] = args.default_mesh_size
+    if args.default_mass_scale is not None:
+        defaults["mass_scale"] = args.default_mass_scale
+
+    records = []
+    for pattern in args.results:
+        records += ReadResults(pattern, defaults)
+    model = WallclockModel().fit(records)
+    print(
+        f"Fitted on {model.n_samples} runs, log residual std {model.residual_std:.3f} "
+        f"(factor {np.exp(model.residual_std):.2f})"
+    )
+    for name, coefficient in zip(["intercept"] + feature_names, model.coefficients):
+        print(f"  {name:>16s}: {coefficient: .4f}")
+    if args.save:
+        model.save(args.save)
+
+    if args.parameters:
+        # The settings of the new sweep are not those of the previous runs
+        settings = {"mesh_size": args.mesh_size, "mass_scale": args.mass_scale}
+        if args.cpus is not None:
+            settings["num_cpus"] = args.cpus
+        sweep = [dict(settings, **arg) for arg in ReadParameters(args.parameters)]
+        predictions = model.predict(sweep)
+        if args.per_run:
+            for arg, prediction in zip(sweep, predictions):
+                print(f"  {arg['id']}: {format_duration(prediction)}")
+        total = predictions.sum()
+        print(f"Runs: {len(sweep)}")
+        print(
+            f"Expected per run: {format_duration(predictions.mean())} mean, "
+            f"{format_duration(predictions.min())} min, "
+            f"{format_duration(predictions.max())} max"
+        )
+        print(
+            f"Expected total: {format_duration(total)} ({total / 3600.0:.1f} job hours)"
+        )
+        print(
+            f"Expected sweep time with {args.jobs} concurrent jobs: "
+            f"{format_duration(max(total / args.jobs, predictions.max()))}"
+        )
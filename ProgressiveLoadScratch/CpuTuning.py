@@ -0,0 +1,155 @@
+"""
+Strong-scaling analysis of the solver and selection of the cpus per job.
+
+CpuScalingStudy.py times a shortened scratch for a matrix of cpu and domain counts. The step
+times and the load amplitude are scaled down together, so the timed run covers the whole load
+path in fewer increments; it is for timing only and its results are not used.
+The timings are reduced here to speedup and parallel efficiency, and the best settings
+are stored per mesh size in a JSON file. For a sweep, the per-job cpu count that gives the
+highest total throughput on a node is usually several narrow jobs rather than one wide one:
+
+    throughput(k) = floor(total cpus / k) / wallclock(k)
+"""
+
+import json
+import os
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_tuning_path = os.path.join(repo_root, "runs", "cpu_tuning.json")
+
+
+def mesh_key(mesh_size):
+    return f"{float(mesh_size):.6g}"
+
+
+def BestPerCpuCount(timings):
+    """
+    Picks the fastest domain count for every cpu count.
+
+    Args:
+        timings (list): Dicts with num_cpus, num_domains and wallclock_time.
+
+    Returns:
+        dict: num_cpus -> fastest timing dict.
+    """
+    best = {}
+    for timing in timings:
+        cpus = int(timing["num_cpus"])
+        if cpus not in best or timing["wallclock_time"] < best[cpus]["wallclock_time"]:
+            best[cpus] = timing
+    return best
+
+
+def ScalingReport(timings):
+    """
+    Computes speedup and parallel efficiency relative to the smallest cpu count.
+
+    Args:
+        timings (list): Dicts with num_cpus, num_domains and wallclock_time.
+
+    Returns:
+        list: One dict per timing with speedup and efficiency added, sorted by cpus and domains.
+    """
+    best = BestPerCpuCount(timings)
+    if not best:
+        return []
+    base_cpus = min(best)
+    base_time = best[base_cpus]["wallclock_time"]
+    report = []
+    for timing in sorted(
+        timings, key=lambda t: (int(t["num_cpus"]), int(t["num_domains"]))
+    ):
+        speedup = base_time / timing["wallclock_time"]
+        row = dict(timing)
+        row["speedup"] = speedup
+        row["efficiency"] = speedup / (int(timing["num_cpus"]) / float(base_cpus))
+        report.append(row)
+    return report
+
+
+def BestJobWidth(timings, total_cpus):
+    """
+    Picks the cpus per job that maximise the number of jobs finished per hour on total_cpus cpus.
+
+    Args:
+        timings (list): Dicts with num_cpus, num_domains and wallclock_time.
+        total_cpus (int): Cpus available to the sweep.
+
+    Returns:
+        dict: num_cpus, num_domains and concurrent_jobs of the best width, and its jobs_per_hour.
+            None if no timing fits on total_cpus.
+    """
+    best = None
+    for cpus, timing in BestPerCpuCount(timings).items():
+        concurrent_jobs = total_cpus // cpus
+        if concurrent_jobs < 1:
+            continue
+        jobs_per_hour = concurrent_jobs * 3600.0 / timing["wallclock_time"]
+        if best is None or jobs_per_hour > best["jobs_per_hour"]:
+            best = {
+                "num_cpus": cpus,
+                "num_domains": int(timing["num_domains"]),
+                "concurrent_jobs": concurrent_jobs,
+                "jobs_per_hour": jobs_per_hour,
+            }
+    return best
+
+
+def PrintScalingReport(timings):
+    print(
+        f"{'cpus':>5s} {'domains':>8s} {'wallclock [s]':>14s} {'speedup':>8s} {'efficiency':>11s}"
+    )
+    for row in ScalingReport(timings):
+        print(
+            f"{int(row['num_cpus']):5d} {int(row['num_domains']):8d} {row['wallclock_time']:14.1f} "
+            f"{row['speedup']:8.2f} {row['efficiency']:11.2f}"
+        )
+
+
+class TuningStore:
+    """Scaling timings and best settings per mesh size, stored as JSON."""
+
+    def __init__(self, path=default_tuning_path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.data = json.load(f)
+
+    def update(self, mesh_size, timings):
+        """
+        Stores the timings of a mesh size together with its fastest single-job setting.
+        Without timings, e.g. when all runs of a study failed, a previous entry is kept.
+
+        Returns:
+            bool: True if the timings were stored.
+        """
+        if not timings:
+            return False
+        fastest = min(timings, key=lambda t: t["wallclock_time"])
+        self.data[mesh_key(mesh_size)] = {
+            "timings": timings,
+            "num_cpus": int(fastest["num_cpus"]),
+            "num_domains": int(fastest["num_domains"]),
+        }
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(self.path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        return True
+
+    def timings(self, mesh_size):
+        entry = self.data.get(mesh_key(mesh_size))
+        return entry["timings"] if entry else []
+
+    def fastest(self, mesh_size):
+        """Returns (num_cpus, num_domains) of the fastest single job, or None if the mesh size is not tuned."""
+        entry = self.data.get(mesh_key(mesh_size))
+        if entry is None:
+            return None
+        return entry["num_cpus"], entry["num_domains"]
+
+    def best_job_width(self, mesh_size, total_cpus):
+        """Returns BestJobWidth for the mesh size, or None if it is not tuned."""
+        return BestJobWidth(self.timings(mesh_size), total_cpus)
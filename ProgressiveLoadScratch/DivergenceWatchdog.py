@@ -0,0 +1,191 @@
+"""
+Early abort of explicit jobs that are not going to finish in useful time.
+
+Some material combinations collapse the stable time increment or keep adding mass
+through mass scaling. The watchdog tails the .sta file of a running job and flags it when
+
+    - the stable time increment drops below a fraction of its initial value,
+    - the total mass grows by more than a set percentage since the first increment, or
+    - the wallclock time projected from the progress of the total time exceeds a limit.
+
+The .sta rows of Abaqus/Explicit are read as:
+INCREMENT, STEP TIME, TOTAL TIME, WALL TIME (hh:mm:ss), STABLE INCREMENT, CRITICAL ELEMENT,
+KINETIC ENERGY, TOTAL ENERGY, PERCENT CHANGE MASS.
+"""
+
+import os
+import re
+from collections import namedtuple
+from . import Constants as C
+
+StaRow = namedtuple(
+    "StaRow",
+    [
+        "increment",
+        "step_time",
+        "total_time",
+        "wallclock",
+        "stable_increment",
+        "critical_element",
+        "kinetic_energy",
+        "total_energy",
+        "percent_change_mass",
+    ],
+)
+
+number = r"([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)"
+sta_row_pattern = re.compile(
+    r"^\s*(\d+)\s+"
+    + number
+    + r"\s+"
+    + number
+    + r"\s+(\d+):(\d+):(\d+)\s+"
+    + number
+    + r"\s+(\d+)\s+"
+    + number
+    + r"\s+"
+    + number
+    + r"\s+"
+    + number
+    + r"\s*$"
+)
+
+
+def ParseStaRow(line):
+    """Returns the StaRow of an increment line of an explicit .sta file, or None for other lines."""
+    match = sta_row_pattern.match(line)
+    if match is None:
+        return None
+    g = match.groups()
+    return StaRow(
+        increment=int(g[0]),
+        step_time=float(g[1]),
+        total_time=float(g[2]),
+        wallclock=int(g[3]) * 3600 + int(g[4]) * 60 + int(g[5]),
+        stable_increment=float(g[6]),
+        critical_element=int(g[7]),
+        kinetic_energy=float(g[8]),
+        total_energy=float(g[9]),
+        percent_change_mass=float(g[10]),
+    )
+
+
+class StaMonitor:
+    """Tails the .sta file of one job and checks new increments against the watchdog limits."""
+
+    def __init__(self, sta_path, watchdog):
+        self.sta_path = sta_path
+        self.watchdog = watchdog
+        self.offset = 0
+        self.first_row = None
+        self.last_row = None
+
+    def read_new_rows(self):
+        """Returns the increment rows written since the last call."""
+        if not os.path.exists(self.sta_path):
+            return []
+        rows = []
+        with open(self.sta_path, "r") as f:
+            f.seek(self.offset)
+            while True:
+                line = f.readline()
+                # Leave an incomplete last line for the next call
+                if not line or not line.endswith("\n"):
+                    break
+                self.offset = f.tell()
+                row = ParseStaRow(line)
+                if row is not None:
+                    rows.append(row)
+        return rows
+
+    def check(self, elapsed):
+        """
+        Reads new increments and checks them.
+
+        Args:
+            elapsed (float): Wallclock seconds since the job was started.
+
+        Returns:
+            str: The reason to abort the job, or None if it looks healthy.
+        """
+        for row in self.read_new_rows():
+            if self.first_row is None:
+                self.first_row = row
+            self.last_row = row
+            reason = self.watchdog.check_row(self.first_row, row)
+            if reason:
+                return reason
+        return self.watchdog.check_progress(self.last_row, elapsed)
+
+
+class DivergenceWatchdog:
+    """Limits beyond which a running explicit job is aborted."""
+
+    def __init__(
+        self,
+        min_increment_ratio=0.01,
+        max_mass_growth=10.0,
+        max_wallclock=None,
+        min_progress=0.02,
+        total_time=C.scratch_time + C.unload_time,
+        check_interval=30.0,
+    ):
+        """
+        Args:
+            min_increment_ratio (float): Abort when the stable increment falls below this fraction of the initial one.
+            max_mass_growth (float): Abort when the total mass has grown by more than this percentage since the first increment.
+            max_wallclock (float): Abort when the projected wallclock time of the job exceeds this many seconds. None disables the check.
+            min_progress (float): Fraction of the total time that must be reached before projecting the wallclock time.
+            total_time (float): Total analysis time of the job.
+            check_interval (float): Seconds between checks of a running job.
+        """
+        self.min_increment_ratio = min_increment_ratio
+        self.max_mass_growth = max_mass_growth
+        self.max_wallclock = max_wallclock
+        self.min_progress = min_progress
+        self.total_time = total_time
+        self.check_interval = check_interval
+
+    def monitor(self, sta_path):
+        return StaMonitor(sta_path, self)
+
+    def check_row(self, first_row, row):
+        if (
+            self.min_increment_ratio is not None
+            and first_row.stable_increment > 0.0
+            and row.stable_increment
+            < self.min_increment_ratio * first_row.stable_increment
+        ):
+            return (
+                f"Stable increment {row.stable_increment:.3e} dropped below "
+                f"{self.min_increment_ratio:g} of the initial {first_row.stable_increment:.3e} "
+                f"at increment {row.increment}"
+            )
+
+        if self.max_mass_growth is not None:
+            # Percent change in mass is relative to the unscaled mass
+            mass_ratio = (1.0 + row.percent_change_mass / 100.0) / (
+                1.0 + first_row.percent_change_mass / 100.0
+            )
+            if 100.0 * (mass_ratio - 1.0) > self.max_mass_growth:
+                return (
+                    f"Mass grew by {100.0 * (mass_ratio - 1.0):.1f}% since the first increment "
+                    f"(limit {self.max_mass_growth:g}%) at increment {row.increment}"
+                )
+        return None
+
+    def check_progress(self, row, elapsed):
+        if self.max_wallclock is None or row is None:
+            return None
+        progress = row.total_time / self.total_time
+        if progress < self.min_progress:
+            if elapsed > self.max_wallclock:
+                return f"Only {100.0 * progress:.1f}% done after {elapsed:.0f} s"
+            return None
+        projected = elapsed / progress
+        if projected > self.max_wallclock:
+            return (
+                f"Projected wallclock {projected:.0f} s exceeds the limit of "
+                f"{self.max_wallclock:.0f} s at {100.0 * progress:.1f}% of the total time"
+            )
+        return None
@@ -0,0 +1,215 @@
+"""
+Screening of the kinetic to internal energy ratio of all runs of a sweep.
+
+PostProcess writes the ALLKE and ALLIE history of the substrate as the KE and IE columns of
+the history of every results file. A run is quasi-static if KE stays a small fraction of IE over the scratch;
+otherwise inertia, e.g. from too much mass scaling, contaminates the reaction forces.
+
+Only the history is read: the history member of an .npz file, or for the .csv files of earlier
+sweeps the lines up to the end of the history, next to the much longer node columns. Files are read by a pool of processes,
+and the ratio statistics of all runs are computed at once on a NaN-padded array of histories.
+The samples before IE reaches min_ie_fraction of its final value are left out, as the ratio
+of the first contact is dominated by the small IE.
+
+Command line use:
+    python -m ProgressiveLoadScratch.EnergyScreening --results runs/MaterialSweepNew/SimDataOutputs
+        --summary runs/MaterialSweepNew/energy_screening.csv --max-ratio 0.1 --workers 8
+"""
+
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .CostModel import mesh_size
+from .MassScaling import CalibrateReferenceStrain
+from .ResultsFile import ReadResultsFile, ResultsFiles, history_columns
+
+summary_columns = [
+    "file",
+    "id",
+    "mass_scale",
+    "mesh_size",
+    "n_samples",
+    "ke_ie_max",
+    "ke_ie_mean",
+    "ke_ie_p95",
+    "ke_ie_final",
+    "fraction_over",
+    "force_noise",
+    "reference_strain",
+    "flagged",
+]
+
+
+def ReadHistory(path):
+    """
+    Reads the header and the history of a results file, without the surface.
+
+    Returns:
+        dict: The header values and an array "history" of shape (samples, 6) with the history_columns.
+    """
+    return ReadResultsFile(path, surface=False)
+
+
+def ReadHistories(paths, workers=None):
+    """Reads the histories of many files with a pool of processes."""
+    if workers == 1 or len(paths) < 2:
+        return [ReadHistory(path) for path in paths]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(ReadHistory, paths, chunksize=16))
+
+
+def pad(histories, column):
+    """Stacks one column of histories of different length into a (runs, max samples) array padded with NaN."""
+    n = max([len(history) for history in histories] + [1])
+    padded = np.full((len(histories), n), np.nan)
+    for i, history in enumerate(histories):
+        padded[i, : len(history)] = history[:, column]
+    return padded
+
+
+def EnergyRatioStatistics(records, max_ratio=0.1, min_ie_fraction=0.05):
+    """
+    Computes KE / IE statistics of all runs at once.
+
+    Args:
+        records (list): Results of ReadHistory.
+        max_ratio (float): Ratio above which a sample is taken as dynamic.
+        min_ie_fraction (float): Samples with IE below this fraction of the final IE are ignored.
+
+    Returns:
+        dict: Arrays over the runs: n_samples, ke_ie_max, ke_ie_mean, ke_ie_p95, ke_ie_final,
+            fraction_over and force_noise.
+    """
+    histories = [record["history"] for record in records]
+    IE = pad(histories, history_columns.index("IE"))
+    KE = pad(histories, history_columns.index("KE"))
+    RF2 = pad(histories, history_columns.index("RF2"))
+    n_samples = np.array([len(history) for history in histories])
+
+    last = np.maximum(n_samples - 1, 0)
+    final_IE = IE[np.arange(len(histories)), last]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = KE / IE
+    ratio[~(IE > min_ie_fraction * final_IE[:, None])] = np.nan
+
+    valid = ~np.isnan(ratio)
+    n_valid = valid.sum(axis=1)
+    filled = np.where(valid, ratio, -np.inf)
+    statistics = {
+        "n_samples": n_samples,
+        "ke_ie_max": np.where(n_valid > 0, filled.max(axis=1), np.nan),
+        "ke_ie_mean": np.nansum(ratio, axis=1) / np.maximum(n_valid, 1),
+        "ke_ie_final": np.where(
+            n_valid > 0, ratio[np.arange(len(histories)), last], np.nan
+        ),
+        "fraction_over": (ratio > max_ratio).sum(axis=1) / np.maximum(n_valid, 1),
+    }
+    with np.errstate(all="ignore"):
+        statistics["ke_ie_p95"] = (
+            np.nanpercentile(ratio, 95, axis=1)
+            if valid.any()
+            else np.full(len(histories), np.nan)
+        )
+        # Oscillation of the normal force about its three point moving average, relative to its mean
+        smooth = (RF2[:, :-2] + RF2[:, 1:-1] + RF2[:, 2:]) / 3.0
+        statistics["force_noise"] = np.sqrt(
+            np.nanmean((RF2[:, 1:-1] - smooth) ** 2, axis=1)
+        ) / np.abs(np.nanmean(RF2, axis=1))
+    statistics["ke_ie_mean"][n_valid == 0] = np.nan
+    return statistics
+
+
+def ScreenResults(
+    patterns, max_ratio=0.1, max_mean_ratio=0.05, min_ie_fraction=0.05, workers=None
+):
+    """
+    Screens all results files matching glob patterns or in folders.
+
+    A run is flagged if its KE / IE exceeds max_ratio anywhere over the scratch, or max_mean_ratio on average.
+
+    Returns:
+        list: One summary row (dict with summary_columns) per run.
+    """
+    paths = []
+    for pattern in patterns:
+        paths += ResultsFiles(pattern)
+    records = ReadHistories(paths, workers)
+    if not records:
+        return []
+    statistics = EnergyRatioStatistics(records, max_ratio, min_ie_fraction)
+
+    rows = []
+    for i, record in enumerate(records):
+        row = {name: statistics[name][i] for name in statistics}
+        row["file"] = os.path.basename(record["path"])
+        row["id"] = record.get("id", "")
+        row["mass_scale"] = record.get("mass_scale", "")
+        try:
+            row["mesh_size"] = mesh_size(record)
+        except KeyError:
+            row["mesh_size"] = ""
+        row["reference_strain"] = ""
+        if row["ke_ie_mean"] > 0 and all(
+            key in record for key in ("mass_scale", "rho", "A")
+        ):
+            row["reference_strain"] = CalibrateReferenceStrain(
+                row["ke_ie_mean"],
+                float(record["mass_scale"]),
+                float(record["rho"]),
+                float(record["A"]),
+            )
+        row["flagged"] = bool(
+            row["ke_ie_max"] > max_ratio or row["ke_ie_mean"] > max_mean_ratio
+        )
+        rows.append(row)
+    return rows
+
+
+def WriteSummary(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=summary_columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    key: f"{value:.6g}" if isinstance(value, float) else value
+                    for key, value in row.items()
+                }
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Screen the KE/IE ratio of the runs of a sweep."
+    )
+    parser.add_argument(
+        "--results", required=True, nargs="+", help="Folders or globs of results"
+    )
+    parser.add_argument("--summary", help="Write the summary table to this .csv file")
+    parser.add_argument("--max-ratio", type=float, default=0.1)
+    parser.add_argument("--max-mean-ratio", type=float, default=0.05)
+    parser.add_argument("--min-ie-fraction", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, help="Reading processes")
+    args = parser.parse_args()
+
+    rows = ScreenResults(
+        args.results,
+        args.max_ratio,
+        args.max_mean_ratio,
+        args.min_ie_fraction,
+        args.workers,
+    )
+    if args.summary:
+        WriteSummary(args.summary, rows)
+    flagged = [row for row in rows if row["flagged"]]
+    print(f"Screened {len(rows)} runs, {len(flagged)} flagged")
+    if rows:
+        mean = np.array([row["ke_ie_mean"] for row in rows], dtype=float)
+        print(f"Mean KE/IE: median {np.nanmedian(mean):.3g}, max {np.nanmax(mean):.3g}")
+    for row in flagged:
+        print(
+            f"  {row['file']}: max KE/IE {row['ke_ie_max']:.3g}, mean {row['ke_ie_mean']:.3g}, "
+            f"{100 * row['fraction_over']:.0f}% of samples over {args.max_ratio:g}"
+        )
@@ -0,0 +1,239 @@
+"""
+Material-only templating of the scratch model input deck.
+
+Within a sweep only the substrate material and the friction coefficient change. The model
+is therefore written to an input deck once, and the material and friction data are moved
+into small *INCLUDE files. With automatic mass scaling, the mass scaling of the scratch step
+is moved into an include file as well. A run then consists of writing these include files and a one
+line job deck pointing at the template, without any work in the Abaqus kernel.
+
+The module is pure Python and does not need Abaqus.
+"""
+
+import os
+
+material_include_name = "material.inc"
+friction_include_name = "friction.inc"
+mass_scaling_include_name = "mass_scaling.inc"
+mass_scaling_keywords = ("fixed mass scaling", "variable mass scaling")
+
+
+def is_keyword(line):
+    return line.startswith("*") and not line.startswith("**")
+
+
+def keyword_name(line):
+    return line[1:].split(",")[0].strip().lower()
+
+
+def keyword_option(line, option):
+    """Returns the value of option in a keyword line, e.g. keyword_option("*Material, name=Steel", "name") -> "Steel"."""
+    for part in line.split(",")[1:]:
+        if "=" in part:
+            key, value = part.split("=", 1)
+            if key.strip().lower() == option:
+                return value.strip()
+    return None
+
+
+def format_data_line(values):
+    return " " + ", ".join(f"{float(v):.10g}" for v in values) + "\n"
+
+
+def MakeTemplate(
+    deck_text,
+    material_name="SubstrateMaterial",
+    interaction_name="IntProp-1",
+    mass_scaling=False,
+):
+    """
+    Replaces the material definition and the friction data of a written input deck with *INCLUDE statements.
+
+    The material block is taken to run from "*Material, name=<material_name>" up to the next comment line
+    or *Material keyword, which is how Abaqus/CAE writes the materials section.
+    The *Friction keyword line of the interaction property is kept so that options like the slip tolerance
+    are preserved; only its data line moves to the include file.
+
+    Args:
+        deck_text (str): Contents of the input deck written by Abaqus/CAE.
+        material_name (str): Name of the substrate material.
+        interaction_name (str): Name of the contact property holding the friction coefficient.
+        mass_scaling (bool): If True, the *Fixed Mass Scaling or *Variable Mass Scaling lines of the
+            steps are replaced by an include as well, so every run can have its own mass scaling.
+
+    Returns:
+        str: The template deck.
+    """
+    lines = deck_text.splitlines(True)
+    template = []
+    found_material = False
+    found_friction = False
+    found_mass_scaling = False
+    in_material = False
+    in_interaction = False
+    skip_data = False
+
+    for line in lines:
+        stripped = line.strip()
+
+        if skip_data:
+            if is_keyword(stripped) or stripped.startswith("**"):
+                skip_data = False
+            else:
+                continue
+
+        if in_material:
+            if stripped.startswith("**") or (
+                is_keyword(stripped) and keyword_name(stripped) == "material"
+            ):
+                in_material = False
+            else:
+                continue
+
+        if is_keyword(stripped):
+            name = keyword_name(stripped)
+            if name == "material" and keyword_option(stripped, "name") == material_name:
+                template.append(line)
+                template.append(f"*INCLUDE, INPUT={material_include_name}\n")
+                in_material = True
+                found_material = True
+                continue
+            if name == "surface interaction":
+                in_interaction = keyword_option(stripped, "name") == interaction_name
+            elif name == "friction" and in_interaction:
+                template.append(line)
+                template.append(f"*INCLUDE, INPUT={friction_include_name}\n")
+                skip_data = True
+                found_friction = True
+                continue
+            if mass_scaling and name in mass_scaling_keywords:
+                template.append(f"*INCLUDE, INPUT={mass_scaling_include_name}\n")
+                found_mass_scaling = True
+                continue
+
+        template.append(line)
+
+    if not found_material:
+        raise ValueError(f"Material '{material_name}' not found in input deck")
+    if not found_friction:
+        raise ValueError(f"*Friction of '{interaction_name}' not found in input deck")
+    if mass_scaling and not found_mass_scaling:
+        raise ValueError("No mass scaling found in input deck")
+
+    return "".join(template)
+
+
+def MaterialInclude(parameters):
+    """
+    Writes the material options of the substrate, mirroring SubstrateMaterialAssignment.
+
+    Johnson-Cook damage initiation and energy based damage evolution are added when the
+    parameters contain D1, D2, D3 and kc.
+
+    Args:
+        parameters (dict): Material parameters with at least rho, E, nu, A, B and n.
+
+    Returns:
+        str: Contents of the material include file.
+    """
+    E = float(parameters["E"])
+    nu = float(parameters["nu"])
+    text = "*Density\n" + format_data_line([parameters["rho"]])
+    text += "*Elastic\n" + format_data_line([E, nu])
+    text += "*Plastic, hardening=JOHNSON COOK\n"
+    text += format_data_line(
+        [parameters["A"], parameters["B"], parameters["n"], 0.0, 0.0, 0.0]
+    )
+    if "D1" in parameters and "kc" in parameters:
+        text += "*Damage Initiation, criterion=JOHNSON COOK\n"
+        text += format_data_line(
+            [parameters["D1"], parameters["D2"], parameters["D3"], 0, 0, 0, 0, 0]
+        )
+        E_star = E / (1 - nu**2)
+        fractureEnergy = float(parameters["kc"]) ** 2 / E_star
+        text += "*Damage Evolution, type=ENERGY, softening=LINEAR\n"
+        text += format_data_line([fractureEnergy])
+    return text
+
+
+def FrictionInclude(mu):
+    """Returns the data line of the *Friction option for the coefficient of friction mu."""
+    return format_data_line([mu])
+
+
+def MassScalingInclude(mass_scale, target_time_increment=0.0):
+    """Returns the mass scaling option of the scratch step, as written by mass_scaling_definition."""
+    if target_time_increment:
+        return (
+            f"*Variable Mass Scaling, dt={float(target_time_increment):.10g}, "
+            "type=below min, number interval=10\n"
+        )
+    return f"*Fixed Mass Scaling, factor={float(mass_scale):.10g}\n"
+
+
+class InputDeckTemplate:
+    """A template deck on disk from which the decks of individual runs are written."""
+
+    def __init__(self, template_path):
+        """
+        Args:
+            template_path (str): Path to a template deck made by MakeTemplate.
+        """
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(template_path)
+        self.template_path = os.path.abspath(template_path)
+
+    @classmethod
+    def from_input_deck(cls, deck_path, template_path=None, **kwargs):
+        """
+        Makes a template from an input deck written by Abaqus/CAE.
+
+        Args:
+            deck_path (str): Path to the written input deck.
+            template_path (str): Where to write the template. Defaults to <deck>_Template.inp.
+            **kwargs: Passed on to MakeTemplate.
+
+        Returns:
+            InputDeckTemplate: The template.
+        """
+        if template_path is None:
+            template_path = os.path.splitext(deck_path)[0] + "_Template.inp"
+        with open(deck_path, "r") as f:
+            template = MakeTemplate(f.read(), **kwargs)
+        with open(template_path, "w") as f:
+            f.write(template)
+        return cls(template_path)
+
+    def write_run(self, job_name, run_dir, parameters):
+        """
+        Writes <run_dir>/<job_name>.inp and the include files holding the material and friction of the run.
+
+        Args:
+            job_name (str): Name of the job.
+            run_dir (str): Directory the job is solved in.
+            parameters (dict): Material parameters including mu. If they include mass_scale and
+                target_time_increment, the mass scaling include file is written too.
+
+        Returns:
+            str: Path to the job deck.
+        """
+        if not os.path.exists(run_dir):
+            os.makedirs(run_dir)
+        with open(os.path.join(run_dir, material_include_name), "w") as f:
+            f.write(MaterialInclude(parameters))
+        with open(os.path.join(run_dir, friction_include_name), "w") as f:
+            f.write(FrictionInclude(parameters["mu"]))
+        if "mass_scale" in parameters:
+            with open(os.path.join(run_dir, mass_scaling_include_name), "w") as f:
+                f.write(
+                    MassScalingInclude(
+                        parameters["mass_scale"],
+                        parameters.get("target_time_increment", 0.0),
+                    )
+                )
+
+        deck_path = os.path.join(run_dir, job_name + ".inp")
+        with open(deck_path, "w") as f:
+            f.write(f"** Job {job_name}, id {parameters.get('id', '')}\n")
+            f.write(f"*INCLUDE, INPUT={self.template_path}\n")
+        return deck_path
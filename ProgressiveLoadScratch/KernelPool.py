@@ -0,0 +1,329 @@
+"""
+Pool of long-lived Abaqus/CAE kernels serving model build and input deck requests.
+
+Starting "abaqus cae noGUI=..." costs a kernel start-up, and a study script then builds its
+models one at a time. The pool keeps a number of KernelWorker.py kernels running, each taking
+requests from a queue directory, so the decks of e.g. a mesh study are written in parallel and
+a kernel that already has a model open only patches what changed.
+
+The queue is a directory of JSON files, which both the driver and the kernels can use without
+extra packages:
+
+    <queue_dir>/requests/<id>.json    submitted requests, written atomically
+    <queue_dir>/claimed/<id>.json     requests taken by a worker, moved there by an atomic rename
+    <queue_dir>/results/<id>.json     results, with status "ok" or "error"
+    <queue_dir>/stop                  asks the workers to exit once the requests are done
+
+A request is {"type": "write_input" or "build", "model": <ScratchModelSetup arguments>,
+"material": <material parameters>, "job_name": ..., "run_dir": ..., "num_cpus": ...}.
+
+The module is pure Python. Run through benchmarks/fake_abaqus.py, the workers use the stand-in kernel.
+
+Command line use:
+    python -m ProgressiveLoadScratch.KernelPool --workers 3 --mesh 0.010 0.008 0.006 --run-dir runs/MeshDecks
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+from . import Constants as C
+
+worker_script = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "KernelWorker.py"
+)
+
+
+def write_json(path, data):
+    """Writes data to path through a temporary file, so readers never see a partial file."""
+    tmp = path + f".tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, default=float)
+    os.replace(tmp, path)
+
+
+class RequestQueue:
+    """Directory-based queue of kernel requests and their results."""
+
+    def __init__(self, queue_dir):
+        self.queue_dir = os.path.abspath(queue_dir)
+        for name in ("requests", "claimed", "results"):
+            folder = os.path.join(self.queue_dir, name)
+            if not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+
+    def path(self, folder, request_id):
+        return os.path.join(self.queue_dir, folder, request_id + ".json")
+
+    @property
+    def stop_path(self):
+        return os.path.join(self.queue_dir, "stop")
+
+    def submit(self, request):
+        """Adds a request to the queue and returns its id. Ids sort in submission order."""
+        request_id = f"{time.time():.6f}_{uuid.uuid4().hex[:8]}"
+        write_json(self.path("requests", request_id), dict(request, id=request_id))
+        return request_id
+
+    def claim(self):
+        """Takes the oldest submitted request, or returns None if there is none."""
+        for name in sorted(os.listdir(os.path.join(self.queue_dir, "requests"))):
+            if not name.endswith(".json"):
+                continue
+            request_id = name[: -len(".json")]
+            claimed = self.path("claimed", request_id)
+            try:
+                # Only one worker succeeds in moving the file
+                os.rename(self.path("requests", request_id), claimed)
+            except OSError:
+                continue
+            with open(claimed, "r") as f:
+                return json.load(f)
+        return None
+
+    def complete(self, request_id, result):
+        write_json(self.path("results", request_id), dict(result, id=request_id))
+        try:
+            os.remove(self.path("claimed", request_id))
+        except OSError:
+            pass
+
+    def result(self, request_id):
+        """Returns the result of a request, or None if it is not done."""
+        path = self.path("results", request_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def n_pending(self):
+        return sum(
+            name.endswith(".json")
+            for name in os.listdir(os.path.join(self.queue_dir, "requests"))
+        )
+
+    def stop(self):
+        open(self.stop_path, "w").close()
+
+    def stopping(self):
+        return os.path.exists(self.stop_path)
+
+
+def Serve(queue, handle, worker_name="worker", poll_interval=0.2, idle_timeout=None):
+    """
+    Worker loop: takes requests from the queue and writes the results of handle(request).
+
+    Exceptions raised by handle are returned as results with status "error", so one bad
+    request does not take the kernel down.
+
+    Args:
+        queue (RequestQueue): The queue to serve.
+        handle: Callable returning a dict of results for a request.
+        worker_name (str): Name recorded in the results.
+        poll_interval (float): Seconds between looks at an empty queue.
+        idle_timeout (float): Exit after this many seconds without requests. None waits for the stop file.
+
+    Returns:
+        int: Number of requests served.
+    """
+    n_served = 0
+    idle_since = time.time()
+    while True:
+        request = queue.claim()
+        if request is None:
+            if queue.stopping():
+                break
+            if idle_timeout is not None and time.time() - idle_since > idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        start = time.time()
+        result = {"worker": worker_name, "pid": os.getpid()}
+        try:
+            result["result"] = handle(request)
+            result["status"] = "ok"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = f"{type(e).__name__}: {e}"
+            result["traceback"] = traceback.format_exc()
+        result["elapsed"] = time.time() - start
+        queue.complete(request["id"], result)
+        print(
+            f"{worker_name}: {request.get('type')} {request['id']} {result['status']} in {result['elapsed']:.1f} s"
+        )
+        sys.stdout.flush()
+        n_served += 1
+        idle_since = time.time()
+    return n_served
+
+
+class KernelPool:
+    """A number of KernelWorker.py kernels serving one request queue."""
+
+    worker_prefix = "kernel"
+
+    def __init__(
+        self,
+        n_workers=2,
+        queue_dir="KernelQueue",
+        worker_command=None,
+        poll_interval=0.2,
+    ):
+        """
+        Args:
+            n_workers (int): Number of kernels.
+            queue_dir (str): Directory of the request queue.
+            worker_command (list): Command starting a CAE kernel on a script.
+                Defaults to C.abaqus_command + ["cae"].
+            poll_interval (float): Seconds between looks at the queue, in the workers and when waiting for results.
+        """
+        self.n_workers = n_workers
+        self.queue = RequestQueue(queue_dir)
+        self.worker_command = list(worker_command or C.abaqus_command + ["cae"])
+        self.poll_interval = poll_interval
+        self.processes = []
+
+    def worker_arguments(self, name):
+        """Arguments of the worker command starting the worker script on the queue."""
+        return [
+            "noGUI=" + worker_script,
+            "--",
+            self.queue.queue_dir,
+            name,
+            str(self.poll_interval),
+        ]
+
+    def start(self):
+        if os.path.exists(self.queue.stop_path):
+            os.remove(self.queue.stop_path)
+        for i in range(self.n_workers):
+            name = f"{self.worker_prefix}{i}"
+            log = open(os.path.join(self.queue.queue_dir, name + ".log"), "w")
+            self.processes.append(
+                subprocess.Popen(
+                    self.worker_command + self.worker_arguments(name),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+            )
+            log.close()
+        return self
+
+    def alive(self):
+        return sum(process.poll() is None for process in self.processes)
+
+    def submit(self, request):
+        return self.queue.submit(request)
+
+    def wait(self, request_ids, timeout=None):
+        """
+        Waits for the results of the requests.
+
+        Returns:
+            list: The results, in the order of request_ids.
+        """
+        start = time.time()
+        results = {}
+        while len(results) < len(request_ids):
+            for request_id in request_ids:
+                if request_id not in results:
+                    result = self.queue.result(request_id)
+                    if result is not None:
+                        results[request_id] = result
+            if len(results) == len(request_ids):
+                break
+            if self.processes and not self.alive():
+                raise RuntimeError(
+                    f"All kernel workers exited with {len(request_ids) - len(results)} requests left, "
+                    f"see the logs in {self.queue.queue_dir}"
+                )
+            if timeout is not None and time.time() - start > timeout:
+                raise TimeoutError(
+                    f"{len(request_ids) - len(results)} requests not done after {timeout} s"
+                )
+            time.sleep(self.poll_interval)
+        return [results[request_id] for request_id in request_ids]
+
+    def map(self, requests, timeout=None):
+        """Submits the requests and returns their results in order."""
+        return self.wait([self.submit(request) for request in requests], timeout)
+
+    def shutdown(self, wait=True):
+        """Lets the workers finish the queued requests and exit."""
+        self.queue.stop()
+        if wait:
+            for process in self.processes:
+                process.wait()
+        self.processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+
+def WriteInputRequest(job_name, run_dir, model, material, num_cpus=C.num_cpus):
+    """Request for the input deck <run_dir>/<job_name>.inp of a model with ScratchModelSetup arguments model."""
+    return {
+        "type": "write_input",
+        "job_name": job_name,
+        "run_dir": os.path.abspath(run_dir),
+        "model": model,
+        "material": material,
+        "num_cpus": num_cpus,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write the input decks of a mesh study with a pool of CAE kernels."
+    )
+    parser.add_argument("--workers", type=int, default=2, help="Number of kernels")
+    parser.add_argument(
+        "--mesh", type=float, nargs="+", required=True, help="Mesh sizes"
+    )
+    parser.add_argument("--mass-scale", type=float, default=5e5)
+    parser.add_argument(
+        "--no-ale", action="store_true", help="Build the models without ALE"
+    )
+    parser.add_argument("--run-dir", default=os.path.join("runs", "MeshDecks"))
+    parser.add_argument("--queue-dir", default=os.path.join("runs", "KernelQueue"))
+    parser.add_argument(
+        "--material",
+        default='{"rho": 8e-09, "E": 200000.0, "nu": 0.3, "A": 700.0, "B": 700.0, "n": 0.5, "mu": 0.1}',
+        help="Material parameters as JSON",
+    )
+    args = parser.parse_args()
+
+    requests = [
+        WriteInputRequest(
+            f"Mesh{mesh_size:g}",
+            os.path.join(args.run_dir, f"Mesh{mesh_size:g}"),
+            {
+                "SubstrateSizeX": mesh_size,
+                "SubstrateSizeY": mesh_size,
+                "SubstrateSizeZ": mesh_size,
+                "mass_scale": args.mass_scale,
+                "use_ALE": not args.no_ale,
+                "include_wear": False,
+            },
+            json.loads(args.material),
+        )
+        for mesh_size in args.mesh
+    ]
+    with KernelPool(args.workers, args.queue_dir) as pool:
+        results = pool.map(requests)
+    for result in results:
+        if result["status"] == "ok":
+            print(
+                f"{result['result']['input_path']} ({result['worker']}, {result['elapsed']:.1f} s)"
+            )
+        else:
+            print(f"Failed on {result['worker']}: {result['error']}")
+    sys.exit(0 if all(result["status"] == "ok" for result in results) else 1)
@@ -0,0 +1,73 @@
+"""
+A CAE kernel serving model build and input deck requests from a KernelPool queue.
+
+The kernel keeps its models open between requests through ModelBuildCache, so requests
+for the same mesh only reassign the material and mass scaling before writing the deck.
+
+Usage: abaqus cae noGUI=ProgressiveLoadScratch/KernelWorker.py -- <queue dir> [<worker name>] [<poll interval>]
+"""
+
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+from ProgressiveLoadScratch import Constants as C  # noqa: E402
+from ProgressiveLoadScratch.helpers import write_input_deck  # noqa: E402
+from ProgressiveLoadScratch.KernelPool import RequestQueue, Serve  # noqa: E402
+from ProgressiveLoadScratch.ModelCache import ModelBuildCache, ModelKey  # noqa: E402
+from ProgressiveLoadScratch.SubstrateMaterial import (  # noqa: E402
+    AssignMaterialParameters,
+)
+
+
+def HandleRequest(request, modelCache):
+    """
+    Builds or opens the model of a request and, for "write_input", assigns the material and writes the deck.
+
+    Returns:
+        dict: input_path for "write_input", model_key for "build".
+    """
+    model = request["model"]
+    ScratchModel, SubstratePart = modelCache.ScratchModelSetup(
+        material=request.get("material"), **model
+    )
+    if request["type"] == "build":
+        return {
+            "model_key": ModelKey(
+                model.get("SubstrateSizeX", 0.020),
+                model.get("SubstrateSizeY", 0.020),
+                model.get("SubstrateSizeZ", 0.020),
+                model.get("use_ALE", True),
+                model.get("include_wear", True),
+            )
+        }
+    if request["type"] != "write_input":
+        raise ValueError(f"Unknown request type {request['type']}")
+
+    AssignMaterialParameters(ScratchModel, SubstratePart, request["material"])
+    input_path = write_input_deck(
+        request["job_name"],
+        request["run_dir"],
+        num_cpus=request.get("num_cpus", C.num_cpus),
+    )
+    return {"input_path": os.path.abspath(input_path)}
+
+
+if __name__ == "__main__":
+    # Arguments after "--" on the abaqus command line
+    args = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else sys.argv[1:]
+    queue = RequestQueue(args[0])
+    worker_name = args[1] if len(args) > 1 else f"kernel{os.getpid()}"
+    poll_interval = float(args[2]) if len(args) > 2 else 0.2
+    modelCache = ModelBuildCache(os.path.join(queue.queue_dir, "ModelCache"))
+
+    n_served = Serve(
+        queue,
+        lambda request: HandleRequest(request, modelCache),
+        worker_name=worker_name,
+        poll_interval=poll_interval,
+    )
+    print(f"{worker_name}: served {n_served} requests")
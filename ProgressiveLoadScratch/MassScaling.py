@@ -0,0 +1,180 @@
+"""
+Automatic choice of the mass scaling of the scratch step.
+
+Mass scaling by a factor f lengthens the stable increment by sqrt(f), but the scaled mass moving
+with the indenter adds kinetic energy. With the material of the deformed zone moving at about the
+scratch velocity v = scratch_length / scratch_time and deforming to a plastic strain of about
+reference_strain at the yield stress A, the ratio of kinetic to internal energy is
+
+    KE / IE ~ 0.5 f rho v^2 / (A reference_strain)
+
+Capping the ratio at max_kinetic_ratio, the quasi-static limit of a material is
+
+    f_qs = 2 max_kinetic_ratio A reference_strain / (rho v^2)
+
+Soft, dense materials get a small factor, hard, light ones a large one, instead of one factor
+for the whole sweep. Without a target the factor is f_qs, the cheapest run that stays
+quasi-static. With target_increments the factor is the one giving that many increments for
+the finest element of the mesh (see CostEstimate), clipped to [1, f_qs].
+
+reference_strain sets the plastic work per volume of the deformed zone and can be calibrated
+from the ALLKE / ALLIE of previous runs with CalibrateReferenceStrain.
+"""
+
+import numpy as np
+from . import Constants as C
+from .CostEstimate import EstimateCost
+
+# Highest ratio of kinetic to internal energy of a quasi-static run
+max_kinetic_ratio = 0.05
+# Plastic strain of the material deformed by the indenter
+reference_strain = 1.0
+
+
+def ScratchVelocity(scratch_length=C.scratch_length, scratch_time=C.scratch_time):
+    """Mean speed of the indenter along the scratch."""
+    return scratch_length / scratch_time
+
+
+def KineticToInternalRatio(
+    mass_scale, rho, A, velocity=None, reference_strain=reference_strain
+):
+    """Estimated ratio of kinetic to internal energy of a scratch with fixed mass scaling."""
+    if velocity is None:
+        velocity = ScratchVelocity()
+    return 0.5 * mass_scale * rho * velocity**2 / (A * reference_strain)
+
+
+def QuasiStaticMassScale(
+    rho,
+    A,
+    velocity=None,
+    max_kinetic_ratio=max_kinetic_ratio,
+    reference_strain=reference_strain,
+):
+    """Largest mass scaling factor keeping the estimated KE / IE at max_kinetic_ratio, at least 1."""
+    if velocity is None:
+        velocity = ScratchVelocity()
+    return max(
+        1.0, 2.0 * max_kinetic_ratio * A * reference_strain / (rho * velocity**2)
+    )
+
+
+def CalibrateReferenceStrain(kinetic_ratio, mass_scale, rho, A, velocity=None):
+    """Reference strain for which KineticToInternalRatio matches the KE / IE observed in a run."""
+    return KineticToInternalRatio(mass_scale, rho, A, velocity, 1.0) / kinetic_ratio
+
+
+def round_down(value, digits=2):
+    """Rounds down to a number of significant digits, so factors read well and stay below their limit."""
+    scale = 10.0 ** (np.floor(np.log10(value)) - digits + 1)
+    return float(np.floor(value / scale) * scale)
+
+
+def AutoMassScaling(
+    SubstrateSizeX,
+    SubstrateSizeY,
+    SubstrateSizeZ,
+    material,
+    variable=False,
+    target_increments=None,
+    max_kinetic_ratio=max_kinetic_ratio,
+    reference_strain=reference_strain,
+    scratch_time=C.scratch_time,
+    unload_time=C.unload_time,
+):
+    """
+    Picks the mass scaling of a material on a mesh.
+
+    Args:
+        SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ (float): Mesh sizes of the refined area.
+        material (dict): Material parameters with at least rho, E, nu and A.
+        variable (bool): If True, variable mass scaling to a target time increment is returned
+            instead of a fixed factor. Only the elements below the target are scaled, the finest first.
+        target_increments (int): Number of increments to aim for. If None, the quasi-static limit is used.
+        max_kinetic_ratio (float): Highest estimated ratio of kinetic to internal energy.
+        reference_strain (float): Plastic strain of the deformed zone in the energy estimate.
+        scratch_time (float): Time period of the scratch step, which sets the scratch velocity.
+        unload_time (float): Time period of the unloading step.
+
+    Returns:
+        dict: mass_scale and target_time_increment as taken by ScratchModelSetup, and the resulting
+            stable_increment, n_increments, kinetic_ratio and the quasi_static_limit of the factor.
+    """
+    rho = float(material["rho"])
+    A = float(material["A"])
+    velocity = ScratchVelocity(scratch_time=scratch_time)
+    total_time = scratch_time + unload_time
+    estimate = EstimateCost(
+        SubstrateSizeX,
+        SubstrateSizeY,
+        SubstrateSizeZ,
+        float(material["E"]),
+        float(material["nu"]),
+        rho,
+        1.0,
+        total_time,
+    )
+    limit = QuasiStaticMassScale(
+        rho,
+        A,
+        velocity,
+        max_kinetic_ratio=max_kinetic_ratio,
+        reference_strain=reference_strain,
+    )
+    factor = limit
+    if target_increments is not None:
+        needed = (total_time / target_increments / estimate["stable_increment"]) ** 2
+        factor = float(np.clip(needed, 1.0, limit))
+    factor = max(1.0, round_down(factor))
+    stable_increment = estimate["stable_increment"] * np.sqrt(factor)
+
+    return {
+        "mass_scale": 1.0 if variable else factor,
+        "target_time_increment": float(stable_increment) if variable else 0.0,
+        "stable_increment": float(stable_increment),
+        "n_increments": int(np.ceil(total_time / stable_increment)),
+        "kinetic_ratio": KineticToInternalRatio(
+            factor, rho, A, velocity, reference_strain
+        ),
+        "quasi_static_limit": limit,
+    }
+
+
+def ResolveMassScaling(
+    mass_scale,
+    target_time_increment,
+    SubstrateSizeX,
+    SubstrateSizeY,
+    SubstrateSizeZ,
+    material=None,
+    scratch_time=C.scratch_time,
+    unload_time=C.unload_time,
+):
+    """
+    Replaces "auto" in the mass scaling arguments of ScratchModelSetup by the values of AutoMassScaling.
+
+    mass_scale="auto" picks a fixed factor, target_time_increment="auto" a variable mass scaling target.
+
+    Returns:
+        tuple: mass_scale and target_time_increment as numbers.
+    """
+    if mass_scale != "auto" and target_time_increment != "auto":
+        return mass_scale, target_time_increment
+    if material is None:
+        raise ValueError("Automatic mass scaling needs the material parameters")
+    auto = AutoMassScaling(
+        SubstrateSizeX,
+        SubstrateSizeY,
+        SubstrateSizeZ,
+        material,
+        variable=target_time_increment == "auto",
+        scratch_time=scratch_time,
+        unload_time=unload_time,
+    )
+    print(
+        f"Automatic mass scaling: factor {auto['mass_scale']:g}, target increment "
+        f"{auto['target_time_increment']:g}, {auto['n_increments']} increments, "
+        f"estimated KE/IE {auto['kinetic_ratio']:.3f}"
+    )
+    return auto["mass_scale"], auto["target_time_increment"]
@@ -0,0 +1,212 @@
+"""
+Cache of built scratch models, so studies do not rebuild and remesh the same model.
+
+ScratchModelSetup redoes the substrate geometry, meshing, indenter, assembly, steps and
+contact on every call. The built model is saved to <cache_dir>/<key>.cae, keyed by the mesh
+sizes, the ALE and wear flags, the geometry constants and the source of the model building
+modules, and reopened on a hit. The mass scaling only changes the scratch step, so models
+differing in mass_scale or target_time_increment share an entry and the step is patched.
+The same holds for the step times.
+
+Kernels of a KernelPool share the cache directory. An entry is written under temporary names
+and moved into place, its .json sidecar before the .cae, so an existing .cae is complete and
+has its sidecar. A newly built model is reopened from its entry, so the session never keeps
+a temporary name.
+"""
+
+from part import *
+from material import *
+from section import *
+from assembly import *
+from step import *
+from interaction import *
+from load import *
+from mesh import *
+from optimization import *
+from job import *
+from sketch import *
+from visualization import *
+from connectorBehavior import *
+from odbAccess import *
+from abaqus import openMdb
+import hashlib
+import json
+import os
+from . import Constants as C
+from .ProgressiveLoadScratchTest import (
+    ScratchModelSetup,
+    set_mass_scaling,
+    set_step_times,
+)
+from .MassScaling import ResolveMassScaling
+from .ResultCache import canonical, constants_fingerprint
+
+# Modules whose code determines the built model
+model_source_files = (
+    "ProgressiveLoadScratchTest.py",
+    "SubstrateGeneration.py",
+    "RockwellIndenter.py",
+)
+
+
+def ModelKey(SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ, use_ALE, include_wear):
+    """Hashes everything but the mass scaling that determines the model built by ScratchModelSetup."""
+    sources = hashlib.sha256()
+    for name in model_source_files:
+        with open(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), name), "rb"
+        ) as f:
+            sources.update(f.read())
+    configuration = {
+        "mesh": [
+            canonical(SubstrateSizeX),
+            canonical(SubstrateSizeY),
+            canonical(SubstrateSizeZ),
+        ],
+        "use_ALE": bool(use_ALE),
+        "include_wear": bool(include_wear),
+        "constants": {
+            key: canonical(value) for key, value in constants_fingerprint().items()
+        },
+        "sources": sources.hexdigest(),
+    }
+    text = json.dumps(configuration, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class ModelBuildCache:
+    """Drop-in replacement for ScratchModelSetup that saves built models and reopens them."""
+
+    def __init__(self, cache_dir="ModelCache"):
+        """
+        Args:
+            cache_dir (str): Directory holding the .cae files. Can be shared between studies.
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.open_mass_scaling = None
+        self.open_step_times = None
+        self.open_key = None
+        self.open_pathName = None
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".cae")
+
+    def save(self, path, settings):
+        """
+        Saves the model in the mdb as a cache entry, the sidecar with its settings first,
+        and reopens it from the entry so the session refers to path.
+        """
+        stem = os.path.splitext(path)[0]
+        tmp = stem + f".tmp{os.getpid()}"
+        with open(tmp + ".json", "w") as f:
+            json.dump(settings, f, indent=2, default=float)
+        os.replace(tmp + ".json", stem + ".json")
+        mdb.saveAs(pathName=tmp + ".cae")
+        # Closing releases the lock on the temporary file, which can then be moved, also on Windows
+        mdb.close()
+        if os.path.exists(tmp + ".jnl"):
+            os.replace(tmp + ".jnl", stem + ".jnl")
+        # The .cae appears last, complete, for the other kernels sharing the cache
+        os.replace(tmp + ".cae", path)
+        openMdb(pathName=path)
+
+    def ScratchModelSetup(
+        self,
+        SubstrateSizeY=0.020,
+        SubstrateSizeX=0.020,
+        SubstrateSizeZ=0.020,
+        target_time_increment=0.0,
+        mass_scale=1e4,
+        use_ALE=True,
+        include_wear=True,
+        material=None,
+        scratch_time=C.scratch_time,
+        unload_time=C.unload_time,
+    ):
+        """
+        Returns the model of ScratchModelSetup with these arguments, built or taken from the cache.
+
+        If the model is already open in the session, e.g. in a loop over mass scales without mdb.close(),
+        only the mass scaling and the step times are changed. Otherwise a cached model is opened,
+        or the model is built in the current mdb and saved to the cache before the material is assigned.
+
+        With mass_scale or target_time_increment "auto", the mass scaling of the material is picked
+        before the cache is looked up, so models of different materials share an entry.
+
+        Returns:
+            ScratchModel: The Abaqus model object.
+            SubstratePart: The Abaqus part object of the substrate.
+        """
+        mass_scale, target_time_increment = ResolveMassScaling(
+            mass_scale,
+            target_time_increment,
+            SubstrateSizeX,
+            SubstrateSizeY,
+            SubstrateSizeZ,
+            material,
+            scratch_time,
+            unload_time,
+        )
+        key = ModelKey(
+            SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ, use_ALE, include_wear
+        )
+        path = self.path(key)
+        mass_scaling = (float(mass_scale), float(target_time_increment))
+        step_times = (float(scratch_time), float(unload_time))
+
+        if mdb.pathName and mdb.pathName == self.open_pathName and self.open_key == key:
+            print(f"Model {key} is open, changing the mass scaling and step times only")
+        elif os.path.exists(path):
+            print(f"Opening cached model {path}")
+            openMdb(pathName=path)
+            with open(os.path.splitext(path)[0] + ".json", "r") as f:
+                saved = json.load(f)
+            self.open_mass_scaling = tuple(saved["mass_scaling"])
+            self.open_step_times = tuple(
+                saved.get("step_times", (C.scratch_time, C.unload_time))
+            )
+            self.open_key = key
+            self.open_pathName = mdb.pathName
+        else:
+            if mdb.pathName:
+                # Another cached model is open and would clash with the new parts
+                mdb.close()
+            ScratchModelSetup(
+                SubstrateSizeY=SubstrateSizeY,
+                SubstrateSizeX=SubstrateSizeX,
+                SubstrateSizeZ=SubstrateSizeZ,
+                target_time_increment=target_time_increment,
+                mass_scale=mass_scale,
+                use_ALE=use_ALE,
+                include_wear=include_wear,
+                scratch_time=scratch_time,
+                unload_time=unload_time,
+            )
+            self.save(
+                path,
+                {
+                    "SubstrateSizeX": SubstrateSizeX,
+                    "SubstrateSizeY": SubstrateSizeY,
+                    "SubstrateSizeZ": SubstrateSizeZ,
+                    "use_ALE": use_ALE,
+                    "include_wear": include_wear,
+                    "mass_scaling": mass_scaling,
+                    "step_times": step_times,
+                },
+            )
+            self.open_key = key
+            self.open_pathName = mdb.pathName
+            self.open_mass_scaling = mass_scaling
+            self.open_step_times = step_times
+
+        # Also after a build, as the reopened model replaces the objects of the build
+        ScratchModel = mdb.models["Model-1"]
+        if self.open_mass_scaling != mass_scaling:
+            set_mass_scaling(ScratchModel, mass_scale, target_time_increment)
+            self.open_mass_scaling = mass_scaling
+        if self.open_step_times != step_times:
+            set_step_times(ScratchModel, scratch_time, unload_time)
+            self.open_step_times = step_times
+        return ScratchModel, ScratchModel.parts[C.substrate_name]
@@ -0,0 +1,130 @@
+"""
+Post-processing of finished jobs in a separate Abaqus Python process.
+
+Running PostProcess in its own "abaqus python" process keeps ODB extraction off the
+critical path of a sweep: the driver submits the next job while the worker reads the
+ODB of the previous one.
+
+Usage: abaqus python ProgressiveLoadScratch/PostProcessWorker.py <job path> <file name> <parameters json> <settings json> [<output folder>]
+
+With --serve, the worker takes extraction requests from a KernelPool queue until it is stopped
+(see BatchExtraction):
+
+    abaqus python ProgressiveLoadScratch/PostProcessWorker.py --serve <queue dir> [<worker name>] [<poll interval>]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if __name__ == "__main__":
+    sys.path.insert(0, repo_root)
+
+from ProgressiveLoadScratch import Constants as C  # noqa: E402
+from ProgressiveLoadScratch.ResultsFile import results_suffix  # noqa: E402
+
+
+def PostProcessInSubprocess(
+    jobName,
+    fileName,
+    materialParameters,
+    modelSettings=None,
+    python_command=None,
+    outputFolder="SimDataOutputs",
+):
+    """
+    Runs PostProcess(jobName, fileName, materialParameters, modelSettings) in an Abaqus Python process and waits for it.
+
+    Args:
+        jobName (str): Path to the job without extension, e.g. "MaterialSweepNew_00007/MaterialSweepNew_00007".
+        fileName (str): Name of the results file, without the _Results suffix.
+        materialParameters (dict): Material parameters written to the results header.
+        modelSettings (dict): Mesh sizes, mass scaling etc. written to the results header.
+        python_command (list): Command starting Abaqus Python. Defaults to C.abaqus_command + ["python"].
+        outputFolder (str): Folder of the results file.
+
+    Returns:
+        str: Path to the results file written by PostProcess.
+    """
+    if python_command is None:
+        python_command = C.abaqus_command + ["python"]
+    result = subprocess.run(
+        python_command
+        + [
+            os.path.abspath(__file__),
+            jobName,
+            fileName,
+            json.dumps(materialParameters, default=float),
+            json.dumps(modelSettings or {}, default=float),
+            os.path.abspath(outputFolder),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    output = result.stdout.strip().splitlines()
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"PostProcess of {jobName} exited with code {result.returncode}: "
+            + "\n".join(output[-5:])
+        )
+    # Not taken from the output, where Abaqus may print licence messages after the path
+    outputFilePath = os.path.join(outputFolder, fileName + results_suffix)
+    if not os.path.exists(outputFilePath):
+        raise RuntimeError(
+            f"PostProcess of {jobName} wrote no {outputFilePath}: "
+            + "\n".join(output[-5:])
+        )
+    return outputFilePath
+
+
+def HandleExtraction(request):
+    """
+    Runs PostProcess for an "extract" request of BatchExtraction.
+
+    Returns:
+        dict: output_path of the results file.
+    """
+    from ProgressiveLoadScratch.PostProcessing import PostProcess
+
+    if request["type"] != "extract":
+        raise ValueError(f"Unknown request type {request['type']}")
+    outputFilePath = PostProcess(
+        request["job"],
+        request["file_name"],
+        request["material"],
+        request["model_settings"],
+        outputFolder=request["output_folder"],
+        extraAttributes=request.get("attributes"),
+    )
+    return {"output_path": os.path.abspath(outputFilePath)}
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "--serve":
+        from ProgressiveLoadScratch.KernelPool import RequestQueue, Serve
+
+        queue = RequestQueue(sys.argv[2])
+        worker_name = sys.argv[3] if len(sys.argv) > 3 else f"worker{os.getpid()}"
+        poll_interval = float(sys.argv[4]) if len(sys.argv) > 4 else 0.2
+        n_served = Serve(
+            queue,
+            HandleExtraction,
+            worker_name=worker_name,
+            poll_interval=poll_interval,
+        )
+        print(f"{worker_name}: served {n_served} requests")
+        sys.exit(0)
+
+    from ProgressiveLoadScratch.PostProcessing import PostProcess
+
+    outputFilePath = PostProcess(
+        sys.argv[1],
+        sys.argv[2],
+        json.loads(sys.argv[3]),
+        json.loads(sys.argv[4]),
+        outputFolder=sys.argv[5] if len(sys.argv) > 5 else "SimDataOutputs",
+    )
+    print(outputFilePath)
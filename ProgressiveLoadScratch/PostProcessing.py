@@ -3,12 +3,105 @@ import numpy as np
 import os
 from . import Constants as C
 import re
-from itertools import zip_longest
-import csv
 import time
+from .ResultsFile import (
+    ExtractorFingerprint,
+    HistoryArray,
+    MeshFingerprint,
+    ReadSurfaceGeometry,
+    SurfaceArray,
+    SurfaceGeometryPath,
+    WriteResults,
+    WriteSurfaceGeometry,
+    csv_results_suffix,
+    results_suffix,
+)
+
+
+def BulkNodalData(fieldOutput, region):
+    """
+    Reads a nodal field output on a region through its bulk data blocks.
+
+    Returns:
+        tuple: Node labels and the (nodes, components) array of the values, concatenated over the blocks.
+    """
+    blocks = fieldOutput.getSubset(region=region).bulkDataBlocks
+    if not blocks:
+        return np.zeros(0, dtype=int), np.zeros((0, 3), dtype=np.float32)
+    labels = np.concatenate([np.asarray(block.nodeLabels) for block in blocks])
+    data = np.concatenate([np.asarray(block.data) for block in blocks])
+    return labels, data.reshape(len(labels), -1)
+
+
+def NodePermutation(labels, nodeLabels):
+    """Index of each of nodeLabels in labels, -1 where labels does not contain it."""
+    permutation = np.full(len(nodeLabels), -1, dtype=np.int64)
+    if len(labels):
+        order = np.argsort(labels)
+        index = np.clip(
+            np.searchsorted(labels, nodeLabels, sorter=order), 0, len(labels) - 1
+        )
+        found = labels[order[index]] == nodeLabels
+        permutation[found] = order[index[found]]
+    return permutation
+
+
+def UndeformedCoordinates(odb, region):
+    """
+    Node labels and original coordinates of a node set.
+
+    The coordinates are the COORD output of the first frame, read in bulk. ODBs without COORD
+    fall back to the coordinates of the node objects of the set.
+    """
+    firstFrame = odb.steps.values()[0].frames[0]
+    if "COORD" in firstFrame.fieldOutputs.keys():
+        return BulkNodalData(firstFrame.fieldOutputs["COORD"], region)
+    nodes = region.nodes[0]
+    return (
+        np.array([node.label for node in nodes]),
+        np.array([node.coordinates for node in nodes]),
+    )
+
 
+def ContactSurfaceGeometry(odb, region, labels):
+    """
+    Unique contact surface nodes in the order of the results file, sorted by z, then x
+    descending, then y, with their undeformed coordinates shifted by C.ys2 and C.dpo_z.
 
-def PostProcess(jobName, fileName, materialParameters):
+    Returns:
+        tuple: Sorted node labels, their (nodes, 3) undeformed coordinates and the permutation
+            taking nodal values read in bulk with the given labels to the sorted order.
+    """
+    nodeLabels, undeformed = UndeformedCoordinates(odb, region)
+    nodeLabels, first = np.unique(nodeLabels, return_index=True)
+    undeformed = undeformed[first] - np.array(
+        [0.0, C.ys2, C.dpo_z], dtype=undeformed.dtype
+    )
+    order = np.lexsort((undeformed[:, 1], -undeformed[:, 0], undeformed[:, 2]))
+    nodeLabels = nodeLabels[order]
+    return nodeLabels, undeformed[order], NodePermutation(labels, nodeLabels)
+
+
+def PostProcess(
+    jobName,
+    fileName,
+    materialParameters,
+    modelSettings=None,
+    export_csv=False,
+    outputFolder="SimDataOutputs",
+    extraAttributes=None,
+):
+    """
+    Extracts the force and energy histories and the final contact surface of a job to
+    <outputFolder>/<fileName>_Results.npz (see ResultsFile), and to a _Results.csv as well
+    with export_csv. jobName is the path of the .odb and .sta files without extension.
+    extraAttributes, e.g. the source ODB of a re-extraction, are added to the attributes.
+    The undeformed surface is written once per mesh to <outputFolder>/SurfaceGeometry and
+    the .npz holds the displacements of the surface nodes.
+
+    Returns:
+        str: Path to the .npz results file.
+    """
     odbName = jobName + ".odb"
     odb = openOdb(path=odbName, readOnly=True)
 
@@ -19,46 +112,32 @@ def PostProcess(jobName, fileName, materialParameters):
     # surface_names = odb.rootAssembly.surfaces.keys()
     # surface_region_name = next((s for s in surface_names if "S_" in s), None)
 
-    outputFileName = fileName + "_Results.csv"
-    outputFolder = "SimDataOutputs"
+    outputFileName = fileName + results_suffix
 
     if not os.path.exists(outputFolder):
-        os.makedirs(outputFolder)
+        # Several workers may create the folder of a batch at once
+        os.makedirs(outputFolder, exist_ok=True)
 
     outputFilePath = os.path.join(outputFolder, outputFileName)
 
-    allNodesInContactRegion = odb.rootAssembly.surfaces[
-        C.slave_surface_name.upper()
-    ].nodes[0]
-    unique_nodes = {node.label: node for node in allNodesInContactRegion}.values()
-
-    undeformedCoords = [
-        (
-            node.label,
-            node.coordinates[0],
-            node.coordinates[1] - C.ys2,
-            node.coordinates[2] - C.dpo_z,
-        )
-        for node in unique_nodes
-    ]
-
-    sortedUndeformedCoords = sorted(
-        undeformedCoords, key=lambda coord: (coord[3], -coord[1], coord[2])
-    )
-
+    # The undeformed surface is the same for all runs on a mesh, so it is only extracted for
+    # the first run; the others store their displacements in its node order
+    contactRegion = odb.rootAssembly.nodeSets[C.contact_region_nodes_name.upper()]
     displacementField = odb.steps.values()[-1].frames[-1].fieldOutputs["U"]
-
-    dispSubset = displacementField.getSubset(
-        region=odb.rootAssembly.nodeSets[C.contact_region_nodes_name.upper()]
-    )
-    displacements = {
-        value.nodeLabel: np.array(value.data) for value in dispSubset.values
-    }
-
-    deformedCoords = []
-    for nodeLabel, x, y, z in sortedUndeformedCoords:
-        disp = displacements.get(nodeLabel, np.array([0.0, 0.0, 0.0]))
-        deformedCoords.append((nodeLabel, x + disp[0], y + disp[1], z + disp[2]))
+    labels, data = BulkNodalData(displacementField, contactRegion)
+    extractor = ExtractorFingerprint()
+    geometryKey = MeshFingerprint(labels, modelSettings, extractor)
+    geometryPath = SurfaceGeometryPath(outputFilePath, geometryKey)
+    if os.path.exists(geometryPath):
+        nodeLabels, undeformed, permutation = ReadSurfaceGeometry(geometryPath)
+    else:
+        nodeLabels, undeformed, permutation = ContactSurfaceGeometry(
+            odb, contactRegion, labels
+        )
+        WriteSurfaceGeometry(geometryPath, nodeLabels, undeformed, permutation)
+    displacement = np.zeros((len(nodeLabels), 3), dtype=np.float32)
+    found = permutation >= 0
+    displacement[found] = data[permutation[found]]
 
     #### ---------------- ####
     # Get forces and energies
@@ -104,77 +183,30 @@ def PostProcess(jobName, fileName, materialParameters):
     if wallclock_time is None:
         raise ValueError(f"WALLCLOCK TIME not found in {sta_file}")
 
-    with open(outputFilePath, "w") as f:
-        writer = csv.writer(f)
-        f.write("# Simulated using Abaqus 2025 licenced by Aarhus Uniersity\n")
-        f.write("# Made by Peter Thorhauge Moellmann\n")
-        time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        f.write(f"# Simulation date and time: {time_str}\n")
-        f.write("# ----------------------------\n")
-        f.write(
-            f"# Indenter type: Rockwell with tip radius {C.tip_radius}mm and cone angle {C.cone_angle} degrees\n"
-        )
-        mat_str = ", ".join([f"{k}={v}" for k, v in materialParameters.items()])
-        f.write(f"# Material parameters: {mat_str}\n")
-        f.write(f"# WallclockTime={wallclock_time:.2f} s\n")
-
-        writer.writerow(
-            [
-                "Time",
-                "RF1",
-                "RF2",
-                "RF3",
-                "IE",
-                "KE",
-                "NodeLabel",
-                "x_undeformed",
-                "y_undeformed",
-                "z_undeformed",
-                "x_deformed",
-                "y_deformed",
-                "z_deformed",
-            ]
-        )
-
-        nodeLabels = []
-        xUndeformed = []
-        yUndeformed = []
-        zUndeformed = []
-        xDeformed = []
-        yDeformed = []
-        zDeformed = []
-        for (nodeLabel, x_und, y_und, z_und), (_, x_def, y_def, z_def) in zip(
-            sortedUndeformedCoords, deformedCoords
-        ):
-            nodeLabels.append(nodeLabel)
-            xUndeformed.append(x_und)
-            yUndeformed.append(y_und)
-            zUndeformed.append(z_und)
-            xDeformed.append(x_def)
-            yDeformed.append(y_def)
-            zDeformed.append(z_def)
-
-        rows = zip_longest(
-            time_array.reshape(
-                -1,
-            ),
-            rf1,
-            rf2,
-            rf3,
-            IE,
-            KE,
-            nodeLabels,
-            xUndeformed,
-            yUndeformed,
-            zUndeformed,
-            xDeformed,
-            yDeformed,
-            zDeformed,
-            fillvalue="",
+    attributes = {
+        "software": "Simulated using Abaqus 2025 licenced by Aarhus Uniersity",
+        "author": "Made by Peter Thorhauge Moellmann",
+        "date": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
+        "indenter": f"Rockwell with tip radius {C.tip_radius}mm and cone angle {C.cone_angle} degrees",
+        "material": materialParameters,
+        "model_settings": modelSettings or {},
+        "WallclockTime": wallclock_time,
+        "extractor": extractor,
+        "surface_geometry": geometryKey,
+    }
+    attributes.update(extraAttributes or {})
+    history = HistoryArray(time_array.reshape(-1), rf1, rf2, rf3, IE, KE)
+    WriteResults(outputFilePath, history, None, attributes, displacement)
+    if export_csv:
+        surface = SurfaceArray(nodeLabels, undeformed, undeformed + displacement)
+        WriteResults(
+            os.path.join(outputFolder, fileName + csv_results_suffix),
+            history,
+            surface,
+            attributes,
         )
 
-        writer.writerows(rows)
-
-    print(f"CSV results written: {outputFilePath}")
+    print(f"Results written: {outputFilePath}")
 
     odb.close()
+    return outputFilePath
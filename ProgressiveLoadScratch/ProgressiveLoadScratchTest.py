@@ -15,10 +15,118 @@ from odbAccess import *
 from .RockwellIndenter import RockwellIndenter
 from .SubstrateGeneration import SubstrateGeneration, SubstrateMeshing
 from . import Constants as C
+from .MassScaling import ResolveMassScaling
 
 # from SubstratePartitionPattern import FullPartitionOfFace
 
 
+def mass_scaling_definition(mass_scale, target_time_increment=0.0):
+    """
+    Returns the massScaling argument of the scratch step.
+
+    Args:
+        mass_scale: Fixed mass scaling factor, applied at the beginning of the step. Is not used if target_time_increment is not 0.0.
+        target_time_increment: Target stable time increment for variable mass scaling throughout the step.
+    """
+    return (
+        (
+            SEMI_AUTOMATIC,
+            MODEL,
+            AT_BEGINNING if target_time_increment == 0.0 else THROUGHOUT_STEP,
+            mass_scale if target_time_increment == 0.0 else 0.0,
+            target_time_increment,
+            BELOW_MIN if target_time_increment != 0.0 else None,
+            0,
+            10,  # Update mass scaling every # equally spaced intervals
+            0.0,
+            0.0,
+            0,
+            None,
+        ),
+    )
+
+
+def set_mass_scaling(
+    ScratchModel,
+    mass_scale,
+    target_time_increment=0.0,
+    step_name="ProgressiveScratchStep",
+):
+    """
+    Replaces the mass scaling of the scratch step of an existing model.
+    Nothing else in the model depends on the mass scaling, so a built model can be reused for other factors.
+
+    Args:
+        ScratchModel: The Abaqus model object built by ScratchModelSetup.
+        mass_scale: Fixed mass scaling factor. Is not used if target_time_increment is not 0.0.
+        target_time_increment: Target stable time increment for variable mass scaling. If 0.0, variable mass scaling is not used.
+        step_name: Name of the scratch step.
+    """
+    ScratchModel.steps[step_name].setValues(
+        massScaling=mass_scaling_definition(mass_scale, target_time_increment)
+    )
+    return ScratchModel
+
+
+def load_amplitude(scratch_time, unload_time):
+    """Data of the amplitude driving the indenter: ramp up over the scratch, back to zero over the unloading."""
+    return (
+        (0.0, 0.0),
+        (scratch_time, 1.0),
+        (unload_time + scratch_time, 0.0),
+    )
+
+
+def output_intervals(scratch_time, unload_time):
+    """
+    Output intervals for step times differing from Constants, keeping the number of samples per step.
+
+    Returns:
+        dict: Intervals "force" of the history outputs, "scratching" and "unloading" of the field outputs.
+    """
+    return {
+        "force": scratch_time * C.sample_force_frequency / C.scratch_time,
+        "scratching": scratch_time * C.sample_frequency_scratching / C.scratch_time,
+        "unloading": unload_time * C.sample_frequency_unloading / C.unload_time,
+    }
+
+
+def set_step_times(
+    ScratchModel,
+    scratch_time,
+    unload_time,
+    scratch_step_name="ProgressiveScratchStep",
+    unload_step_name="UnloadingStep",
+):
+    """
+    Replaces the step times of an existing model, together with the load amplitude and output intervals.
+    Like the mass scaling, the step times need no rebuild of the model.
+
+    Args:
+        ScratchModel: The Abaqus model object built by ScratchModelSetup.
+        scratch_time: Time period of the scratch step.
+        unload_time: Time period of the unloading step.
+    """
+    intervals = output_intervals(scratch_time, unload_time)
+    ScratchModel.steps[scratch_step_name].setValues(timePeriod=scratch_time)
+    ScratchModel.steps[unload_step_name].setValues(timePeriod=unload_time)
+    ScratchModel.amplitudes["Amp-1"].setValues(
+        data=load_amplitude(scratch_time, unload_time)
+    )
+    for name in ("ReactionForces", "Energy"):
+        ScratchModel.historyOutputRequests[name].setValues(
+            timeInterval=intervals["force"]
+        )
+    for name in ("FieldOutput", "ContactForce"):
+        ScratchModel.fieldOutputRequests[name].setValues(
+            timeInterval=intervals["scratching"]
+        )
+    ScratchModel.fieldOutputRequests["FieldOutput"].setValuesInStep(
+        stepName=unload_step_name, timeInterval=intervals["unloading"]
+    )
+    return ScratchModel
+
+
 def ScratchModelSetup(
     SubstrateSizeY=0.020,  # Very coarse mesh for fast simulations
     SubstrateSizeX=0.020,
@@ -27,6 +135,9 @@ def ScratchModelSetup(
     mass_scale=1e4,
     use_ALE=True,
     include_wear=True,
+    material=None,
+    scratch_time=C.scratch_time,
+    unload_time=C.unload_time,
 ):
     """
     Sets up the scratch model with substrate and indenter parts, assembly,
@@ -43,13 +154,30 @@ def ScratchModelSetup(
         SubstrateSizeY: The mesh size of the refined area in the y-direction
         SubstrateSizeZ: The mesh size of the refined area in the z-direction
         target_time_increment: Target stable time increment for variable mass scaling. If 0.0, variable mass scaling is not used.
+            If "auto", the target is picked from the material, see MassScaling.AutoMassScaling.
         mass_scale: Fixed mass scaling factor. Is not used if target_time_increment is not 0.0.
+            If "auto", the largest factor keeping the run quasi-static is picked from the material.
+        material: Material parameters (rho, E, nu, A), needed for automatic mass scaling only.
+        scratch_time: Time period of the scratch step. Output intervals scale with it.
+        unload_time: Time period of the unloading step.
 
     Returns:
         ScratchModel: The Abaqus model object with the complete scratch test setup.
         SubstratePart: The Abaqus part object of the substrate.
     """
 
+    mass_scale, target_time_increment = ResolveMassScaling(
+        mass_scale,
+        target_time_increment,
+        SubstrateSizeX,
+        SubstrateSizeY,
+        SubstrateSizeZ,
+        material,
+        scratch_time,
+        unload_time,
+    )
+    intervals = output_intervals(scratch_time, unload_time)
+
     # Set the replay options
     session.journalOptions.setValues(
         replayGeometry=COORDINATE, recoverGeometry=COORDINATE
@@ -113,25 +241,10 @@ def ScratchModelSetup(
     StepName1 = "ProgressiveScratchStep"
     ScratchModel.ExplicitDynamicsStep(
         improvedDtMethod=ON,
-        massScaling=(
-            (
-                SEMI_AUTOMATIC,
-                MODEL,
-                AT_BEGINNING if target_time_increment == 0.0 else THROUGHOUT_STEP,
-                mass_scale if target_time_increment == 0.0 else 0.0,
-                target_time_increment,
-                BELOW_MIN if target_time_increment != 0.0 else None,
-                0,
-                10,  # Update mass scaling every # equally spaced intervals
-                0.0,
-                0.0,
-                0,
-                None,
-            ),
-        ),
+        massScaling=mass_scaling_definition(mass_scale, target_time_increment),
         name=StepName1,
         previous="Initial",
-        timePeriod=C.scratch_time,
+        timePeriod=scratch_time,
         nlgeom=ON,
         linearBulkViscosity=0.06,
         quadBulkViscosity=1.4,
@@ -176,11 +289,7 @@ def ScratchModelSetup(
     )
 
     ScratchModel.TabularAmplitude(
-        data=(
-            (0.0, 0.0),
-            (C.scratch_time, 1.0),
-            (C.unload_time + C.scratch_time, 0.0),
-        ),
+        data=load_amplitude(scratch_time, unload_time),
         name="Amp-1",
         smooth=SOLVER_DEFAULT,
         timeSpan=TOTAL,
@@ -242,7 +351,7 @@ def ScratchModelSetup(
         rebar=EXCLUDE,
         region=IndenterInstance.sets[C.indenter_set_name],
         sectionPoints=DEFAULT,
-        timeInterval=C.sample_force_frequency,
+        timeInterval=intervals["force"],
         variables=("RF1", "RF2", "RF3"),
     )
 
@@ -250,7 +359,7 @@ def ScratchModelSetup(
         createStepName=StepName1,
         name="Energy",
         region=SubstrateInstance.sets["SubstrateSet"],
-        timeInterval=C.sample_force_frequency,
+        timeInterval=intervals["force"],
         variables=("ALLKE", "ALLIE"),
     )
 
@@ -258,7 +367,7 @@ def ScratchModelSetup(
         createStepName=StepName1,
         name="FieldOutput",
         region=SubstrateInstance.sets["SubstrateSet"],
-        timeInterval=C.sample_frequency_scratching,
+        timeInterval=intervals["scratching"],
         variables=(
             "MISES",
             "TRIAX",
@@ -282,7 +391,7 @@ def ScratchModelSetup(
         createStepName=StepName1,
         name="ContactForce",
         region=SubstrateInstance.sets["SubstrateSet"],
-        timeInterval=C.sample_frequency_scratching,
+        timeInterval=intervals["scratching"],
         variables=("CFORCE",),
     )
 
@@ -294,7 +403,7 @@ def ScratchModelSetup(
         improvedDtMethod=ON,
         name=StepName2,
         previous=StepName1,
-        timePeriod=C.unload_time,
+        timePeriod=unload_time,
     )
 
     ScratchModel.boundaryConditions["IndenterConstraint"].setValuesInStep(
@@ -302,7 +411,7 @@ def ScratchModelSetup(
     )
 
     ScratchModel.fieldOutputRequests["FieldOutput"].setValuesInStep(
-        stepName=StepName2, timeInterval=C.sample_frequency_unloading
+        stepName=StepName2, timeInterval=intervals["unloading"]
     )
     # ScratchModel.fieldOutputRequests["ContactForce"].setValuesInStep(
     #     stepName=StepName2, timeInterval=C.sample_frequency_unloading
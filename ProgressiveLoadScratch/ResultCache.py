@@ -0,0 +1,196 @@
+"""
+Content-addressed cache of simulation results.
+
+A run is identified by a hash of everything that determines its answer: the material
+values, the model settings (mesh sizes, mass scaling, ALE, wear) and the geometry,
+mesh and step time constants in Constants. Duplicate parameter rows and reruns of
+identical configurations then reuse the stored results file instead of solving again.
+
+Entries live in <cache_dir>/<key[:2]>/<key>/. The cache is limited in size and evicts
+the least recently used entries first; the modification time of an entry's directory
+records its last use.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from . import Constants as C
+from .ResultsFile import (
+    CopySurfaceGeometry,
+    LoadResults,
+    ResultsFiles,
+    WriteResults,
+    is_results_file,
+)
+
+# Constants that do not change the answer of a run
+excluded_constants = ("num_cpus", "num_domains")
+
+
+def constants_fingerprint():
+    """Returns the geometry, mesh, step time and naming constants that determine a run."""
+    return {
+        key: value
+        for key, value in sorted(vars(C).items())
+        if not key.startswith("_")
+        and key not in excluded_constants
+        and isinstance(value, (int, float, str))
+    }
+
+
+def canonical(value):
+    # 200000 and 200000.0 must give the same key
+    if isinstance(value, bool) or value is None:
+        return value
+    try:
+        return repr(float(value))
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def CacheKey(materialParameters, modelSettings):
+    """
+    Hashes a run configuration.
+
+    Args:
+        materialParameters (dict): Material values of the run. The parameter id is ignored.
+        modelSettings (dict): Mesh sizes, mass scaling, ALE flag etc. of the run. The numbers of cpus and domains are ignored.
+
+    Returns:
+        str: Hex digest identifying the configuration.
+    """
+    configuration = {
+        "material": {
+            key: canonical(value)
+            for key, value in materialParameters.items()
+            if key != "id"
+        },
+        "model": {
+            key: canonical(value)
+            for key, value in modelSettings.items()
+            if key not in excluded_constants
+        },
+        "constants": {
+            key: canonical(value) for key, value in constants_fingerprint().items()
+        },
+    }
+    text = json.dumps(configuration, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class ResultCache:
+    """Size-limited, least recently used cache of result files keyed by run configuration."""
+
+    def __init__(self, cache_dir, modelSettings, max_bytes=10 * 1024**3):
+        """
+        Args:
+            cache_dir (str): Directory holding the cache. Can be shared between sweeps.
+            modelSettings (dict): Model settings of the sweep, combined with the material values of each run.
+            max_bytes (int): Size limit of the cache.
+        """
+        self.cache_dir = cache_dir
+        self.modelSettings = dict(modelSettings)
+        self.max_bytes = max_bytes
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def key(self, materialParameters):
+        return CacheKey(materialParameters, self.modelSettings)
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, materialParameters, destination):
+        """
+        Copies the cached results file of a configuration to destination.
+
+        The material parameters of the file are replaced by the given ones, so the copy
+        carries the id of the run it stands in for.
+
+        Args:
+            materialParameters (dict): Material values of the run.
+            destination (str): Path to write the results file to. Its suffix sets the format,
+                so results cached as .csv are converted to .npz and vice versa.
+
+        Returns:
+            bool: True on a cache hit.
+        """
+        entry = self.entry_dir(self.key(materialParameters))
+        if not os.path.isdir(entry):
+            return False
+        names = ResultsFiles(entry)
+        if not names:
+            return False
+
+        folder = os.path.dirname(destination)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        # The surface of a compact results file is stored as displacements from its mesh
+        CopySurfaceGeometry(names[0], folder)
+        history, surface, attributes = LoadResults(names[0])
+        attributes["material"] = materialParameters
+        WriteResults(destination, history, surface, attributes)
+        os.utime(entry, None)
+        return True
+
+    def store(self, materialParameters, paths):
+        """
+        Adds the result files of a finished run to the cache and evicts old entries if it grew too large.
+        The surface geometry of a results file is stored with it.
+
+        Args:
+            materialParameters (dict): Material values of the run.
+            paths (list): Files to store, at least the results file.
+        """
+        entry = self.entry_dir(self.key(materialParameters))
+        tmp = entry + f".tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for path in paths:
+            shutil.copy(path, os.path.join(tmp, os.path.basename(path)))
+            if is_results_file(path):
+                CopySurfaceGeometry(path, tmp)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.rename(tmp, entry)
+        self.evict()
+
+    def entries(self):
+        """Returns (last use, size, path) of all entries."""
+        entries = []
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                path = os.path.join(prefix_dir, key)
+                if ".tmp" in key:
+                    continue
+                entries.append((os.path.getmtime(path), directory_size(path), path))
+        return entries
+
+    def evict(self):
+        """Deletes least recently used entries until the cache is within max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        return total
+
+    def clear(self, older_than=None):
+        """Deletes all entries, or only those not used in the last older_than seconds."""
+        now = time.time()
+        for last_use, _, path in self.entries():
+            if older_than is None or now - last_use > older_than:
+                shutil.rmtree(path, ignore_errors=True)
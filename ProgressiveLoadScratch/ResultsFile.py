@@ -0,0 +1,481 @@
+"""
+Results file of a run.
+
+PostProcess writes the results of a run to <fileName>_Results.npz, a compressed NumPy archive of
+
+    history       structured array with the float64 columns Time, RF1, RF2, RF3, IE and KE
+    displacement  float32 (nodes, 3) displacements of the contact surface nodes
+    attributes    JSON text with the material parameters, the model settings, the wallclock
+                  time, the descriptive header lines and the surface_geometry key
+
+The undeformed contact surface is the same for all runs on a mesh. It is written once per mesh
+to SurfaceGeometry/<key>.npz next to the results files, with the sorted node labels, their
+undeformed coordinates and the permutation from the bulk read order of PostProcess, and the
+displacements of a run are in its node order. Readers put the two together into the
+structured surface array, with the int32 NodeLabel and the float32 undeformed and deformed
+x, y and z. A results file without a surface_geometry holds that array as its "surface".
+
+The members of an .npz are only decompressed when accessed, so the attributes of thousands of
+runs are read without their surfaces. The _Results.csv layout of earlier sweeps, with the
+history and the surface side by side and the attributes in "#" lines, can still be written on
+request and is read by all readers here.
+
+Command line use, converting the .csv files of a sweep:
+    python -m ProgressiveLoadScratch.ResultsFile --convert runs/MaterialSweepNew/SimDataOutputs
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import shutil
+from itertools import zip_longest
+import numpy as np
+from . import Constants as C
+
+history_columns = ["Time", "RF1", "RF2", "RF3", "IE", "KE"]
+surface_columns = [
+    "NodeLabel",
+    "x_undeformed",
+    "y_undeformed",
+    "z_undeformed",
+    "x_deformed",
+    "y_deformed",
+    "z_deformed",
+]
+history_dtype = np.dtype([(name, np.float64) for name in history_columns])
+surface_dtype = np.dtype(
+    [("NodeLabel", np.int32)] + [(name, np.float32) for name in surface_columns[1:]]
+)
+
+results_suffix = "_Results.npz"
+csv_results_suffix = "_Results.csv"
+geometry_folder = "SurfaceGeometry"
+
+# Modules that determine what PostProcess extracts
+extractor_source_files = ("PostProcessing.py", "ResultsFile.py")
+# Geometry and contact constants used by PostProcess. Others, e.g. num_cpus or
+# abaqus_command, can change without making extracted results stale
+extractor_constants = (
+    "xs1",
+    "ys1",
+    "zs1",
+    "xs2",
+    "ys2",
+    "zs2",
+    "dpo_x",
+    "dpo_y",
+    "dpo_z",
+    "tip_radius",
+    "cone_angle",
+    "contact_region_nodes_name",
+    "slave_surface_name",
+)
+
+
+def parse_value(value, key=None):
+    value = value.strip()
+    if key == "id":
+        # Parameter ids are zero padded strings, e.g. "00007"
+        return value
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    if value in ("True", "False"):
+        return value == "True"
+    return value
+
+
+def parse_key_values(text):
+    record = {}
+    for item in text.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            record[key.strip()] = parse_value(value, key.strip())
+    return record
+
+
+def ExtractorFingerprint():
+    """
+    Hashes the source of the extraction and the constants it uses, recorded in the attributes
+    of the results it writes.
+    """
+    sources = hashlib.sha256()
+    for name in extractor_source_files:
+        with open(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), name), "rb"
+        ) as f:
+            sources.update(f.read())
+    constants = {name: getattr(C, name) for name in extractor_constants}
+    sources.update(json.dumps(constants, sort_keys=True, default=float).encode("utf-8"))
+    return sources.hexdigest()[:16]
+
+
+def MeshFingerprint(nodeLabels, modelSettings=None, extractor=None):
+    """
+    Identifies the contact surface of a mesh by its node labels in the order they are read, the
+    mesh sizes of the model settings and the extraction code.
+    """
+    sha = hashlib.sha256(np.asarray(nodeLabels, dtype=np.int64).tobytes())
+    mesh = {
+        key: value
+        for key, value in (modelSettings or {}).items()
+        if key.startswith("mesh_size")
+    }
+    sha.update(json.dumps(mesh, sort_keys=True, default=float).encode("utf-8"))
+    sha.update((extractor or ExtractorFingerprint()).encode("utf-8"))
+    return sha.hexdigest()[:16]
+
+
+def SurfaceGeometryPath(results_path, key):
+    return os.path.join(os.path.dirname(results_path), geometry_folder, key + ".npz")
+
+
+def WriteSurfaceGeometry(path, nodeLabels, undeformed, permutation):
+    """Writes the sorted node labels, (nodes, 3) undeformed coordinates and bulk read permutation of a mesh."""
+    # Several workers may write the geometry of a mesh at once
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + f".tmp{os.getpid()}.npz"
+    np.savez(
+        tmp,
+        node_labels=np.asarray(nodeLabels, dtype=np.int32),
+        undeformed=np.asarray(undeformed, dtype=np.float32),
+        permutation=np.asarray(permutation, dtype=np.int64),
+    )
+    os.replace(tmp, path)
+
+
+# Surface geometries read in this process, by path, with the modification time they were read at
+geometry_cache = {}
+
+
+def ReadSurfaceGeometry(path):
+    """
+    Reads a surface geometry, once per process as the runs of a sweep share it.
+
+    Returns:
+        tuple: Read-only arrays of the node labels, undeformed coordinates and permutation.
+    """
+    mtime = os.path.getmtime(path)
+    if path not in geometry_cache or geometry_cache[path][0] != mtime:
+        with np.load(path) as archive:
+            arrays = tuple(
+                archive[name] for name in ("node_labels", "undeformed", "permutation")
+            )
+        for array in arrays:
+            array.setflags(write=False)
+        geometry_cache[path] = (mtime, arrays)
+    return geometry_cache[path][1]
+
+
+def SurfaceGeometryFile(results_path):
+    """Path of the surface geometry of a results file, None if the file holds its whole surface."""
+    if not results_path.endswith(".npz"):
+        return None
+    key = ReadAttributes(results_path).get("surface_geometry")
+    return SurfaceGeometryPath(results_path, key) if key else None
+
+
+def CopySurfaceGeometry(results_path, folder):
+    """Copies the surface geometry of a results file to the SurfaceGeometry folder in folder, if not there yet."""
+    source = SurfaceGeometryFile(results_path)
+    if source is None:
+        return None
+    destination = os.path.join(folder, geometry_folder, os.path.basename(source))
+    if not os.path.exists(destination):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        tmp = destination + f".tmp{os.getpid()}"
+        shutil.copy(source, tmp)
+        os.replace(tmp, destination)
+    return destination
+
+
+def is_results_file(path):
+    return path.endswith((results_suffix, csv_results_suffix))
+
+
+def ResultsFiles(pattern):
+    """
+    Results files in a folder or matching a glob pattern, sorted by name.
+
+    A run written in both formats is listed once, by its .npz file.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*_Results.*")
+    paths = {}
+    for path in sorted(glob.glob(pattern)):
+        if not is_results_file(path):
+            continue
+        stem = path[: -len(results_suffix)]
+        if path.endswith(results_suffix) or stem not in paths:
+            paths[stem] = path
+    return sorted(paths.values())
+
+
+def HistoryArray(time, RF1, RF2, RF3, IE, KE):
+    """Structured history array of the force and energy histories."""
+    history = np.zeros(len(time), dtype=history_dtype)
+    for name, values in zip(history_columns, (time, RF1, RF2, RF3, IE, KE)):
+        history[name] = values
+    return history
+
+
+def SurfaceArray(nodeLabels, undeformed, deformed):
+    """Structured surface array of node labels and (nodes, 3) undeformed and deformed coordinates."""
+    surface = np.zeros(len(nodeLabels), dtype=surface_dtype)
+    surface["NodeLabel"] = nodeLabels
+    for i, axis in enumerate("xyz"):
+        surface[axis + "_undeformed"] = undeformed[:, i]
+        surface[axis + "_deformed"] = deformed[:, i]
+    return surface
+
+
+def columns(array, names):
+    """Stacks fields of a structured array into a float array of shape (rows, len(names))."""
+    return np.column_stack([array[name].astype(float) for name in names]).reshape(
+        len(array), len(names)
+    )
+
+
+def WriteResults(path, history, surface, attributes, displacement=None):
+    """
+    Writes a results file, as .npz or, for a path ending in .csv, in the .csv layout.
+
+    An .npz whose attributes name a surface_geometry present next to it stores the displacements
+    of the surface nodes only, the given ones or those of the surface. Otherwise it stores the
+    surface and the surface_geometry is left out of its attributes.
+
+    Args:
+        path (str): Path of the file.
+        history (np.ndarray): Structured array of history_dtype.
+        surface (np.ndarray): Structured array of surface_dtype. Not needed with the displacement.
+        attributes (dict): material and model_settings dicts, WallclockTime, the descriptive
+            software, author, date and indenter texts and the surface_geometry key.
+        displacement (np.ndarray): float32 (nodes, 3) displacements in the order of the surface geometry.
+    """
+    if path.endswith(".csv"):
+        WriteCsvResults(path, history, surface, attributes)
+        return
+    members = {"history": history}
+    key = attributes.get("surface_geometry")
+    geometry_path = SurfaceGeometryPath(path, key) if key else None
+    if displacement is None and geometry_path and os.path.exists(geometry_path):
+        nodeLabels, undeformed, _ = ReadSurfaceGeometry(geometry_path)
+        if np.array_equal(surface["NodeLabel"], nodeLabels):
+            deformed = np.column_stack([surface[name] for name in surface_columns[4:]])
+            displacement = deformed - undeformed
+    if displacement is not None:
+        if not (geometry_path and os.path.exists(geometry_path)):
+            raise ValueError(f"No surface geometry {key} for {path}")
+        members["displacement"] = np.asarray(displacement, dtype=np.float32)
+    else:
+        attributes = {
+            name: value
+            for name, value in attributes.items()
+            if name != "surface_geometry"
+        }
+        members["surface"] = surface
+    # Written under a temporary name, so readers never see a partial file
+    tmp = path + f".tmp{os.getpid()}.npz"
+    np.savez_compressed(
+        tmp,
+        attributes=np.array(json.dumps(attributes, default=float)),
+        **members,
+    )
+    os.replace(tmp, path)
+
+
+def WriteCsvResults(path, history, surface, attributes):
+    """Writes the .csv layout: the attributes as "#" lines and the history and surface side by side."""
+    with open(path, "w") as f:
+        writer = csv.writer(f)
+        for name in ("software", "author"):
+            if name in attributes:
+                f.write(f"# {attributes[name]}\n")
+        if "date" in attributes:
+            f.write(f"# Simulation date and time: {attributes['date']}\n")
+        f.write("# ----------------------------\n")
+        if "indenter" in attributes:
+            f.write(f"# Indenter type: {attributes['indenter']}\n")
+        mat_str = ", ".join([f"{k}={v}" for k, v in attributes["material"].items()])
+        f.write(f"# Material parameters: {mat_str}\n")
+        if attributes.get("model_settings"):
+            set_str = ", ".join(
+                [f"{k}={v}" for k, v in attributes["model_settings"].items()]
+            )
+            f.write(f"# Model settings: {set_str}\n")
+        f.write(f"# WallclockTime={attributes['WallclockTime']:.2f} s\n")
+
+        writer.writerow(history_columns + surface_columns)
+        rows = zip_longest(
+            *[history[name] for name in history_columns],
+            *[surface[name] for name in surface_columns],
+            fillvalue="",
+        )
+        writer.writerows(rows)
+
+
+def ReadCsvAttributes(f):
+    """Reads the "#" lines of an open .csv results file into attributes, up to and including the column names."""
+    attributes = {"material": {}, "model_settings": {}}
+    for line in f:
+        if not line.startswith("#"):
+            break
+        text = line[1:].strip()
+        if text.startswith("Material parameters:"):
+            attributes["material"] = parse_key_values(text.split(":", 1)[1])
+        elif text.startswith("Model settings:"):
+            attributes["model_settings"] = parse_key_values(text.split(":", 1)[1])
+        elif text.startswith("WallclockTime="):
+            attributes["WallclockTime"] = float(text.split("=", 1)[1].split()[0])
+        elif text.startswith("Indenter type:"):
+            attributes["indenter"] = text.split(":", 1)[1].strip()
+        elif text.startswith("Simulation date and time:"):
+            attributes["date"] = text.split(":", 1)[1].strip()
+        elif text.startswith("Simulated using"):
+            attributes["software"] = text
+        elif text.startswith("Made by"):
+            attributes["author"] = text
+    return attributes
+
+
+def ReadAttributes(path):
+    """Reads the attributes of a results file of either format, without its arrays."""
+    if path.endswith(".npz"):
+        with np.load(path) as archive:
+            return json.loads(str(archive["attributes"]))
+    with open(path, "r") as f:
+        return ReadCsvAttributes(f)
+
+
+def ReadCsv(path, surface=True):
+    """
+    Reads a .csv results file.
+
+    Without the surface, reading stops at the end of the history.
+
+    Returns:
+        tuple: Structured history and surface arrays, the surface empty if not read, and the attributes.
+    """
+    history_rows = []
+    surface_rows = []
+    n = len(history_columns)
+    with open(path, "r") as f:
+        attributes = ReadCsvAttributes(f)
+        for line in f:
+            fields = line.rstrip("\r\n").split(",")
+            if fields[0].strip():
+                history_rows.append(fields[:n])
+            elif not surface:
+                break
+            if surface and len(fields) > n and fields[n]:
+                surface_rows.append(fields[n:])
+    history = np.zeros(len(history_rows), dtype=history_dtype)
+    values = np.array(history_rows, dtype=float).reshape(-1, n)
+    for i, name in enumerate(history_columns):
+        history[name] = values[:, i]
+    records = np.zeros(len(surface_rows), dtype=surface_dtype)
+    values = np.array(surface_rows, dtype=float).reshape(-1, len(surface_columns))
+    for i, name in enumerate(surface_columns):
+        records[name] = values[:, i]
+    return history, records, attributes
+
+
+def LoadResults(path, surface=True):
+    """
+    Reads a results file of either format.
+
+    Returns:
+        tuple: Structured history and surface arrays, the surface empty if not read, and the attributes.
+    """
+    if not path.endswith(".npz"):
+        return ReadCsv(path, surface)
+    with np.load(path) as archive:
+        attributes = json.loads(str(archive["attributes"]))
+        history = archive["history"]
+        if not surface:
+            records = np.zeros(0, dtype=surface_dtype)
+        elif "displacement" in archive.files:
+            nodeLabels, undeformed, _ = ReadSurfaceGeometry(
+                SurfaceGeometryPath(path, attributes["surface_geometry"])
+            )
+            records = SurfaceArray(
+                nodeLabels, undeformed, undeformed + archive["displacement"]
+            )
+        else:
+            records = archive["surface"]
+    return history, records, attributes
+
+
+def flatten(attributes):
+    """Material parameters, model settings and wallclock time of the attributes in one dict."""
+    record = dict(attributes.get("material", {}))
+    record.update(attributes.get("model_settings", {}))
+    if "WallclockTime" in attributes:
+        record["WallclockTime"] = attributes["WallclockTime"]
+    return record
+
+
+def ReadResultsHeader(path):
+    """
+    Reads the material parameters, model settings and wallclock time of a results file.
+
+    Args:
+        path (str): Path to the results file.
+
+    Returns:
+        dict: The header values. The wallclock time is stored under "WallclockTime".
+    """
+    return flatten(ReadAttributes(path))
+
+
+def ReadResultsFile(path, surface=True):
+    """
+    Reads a results file into one record.
+
+    Returns:
+        dict: The header values, an array "history" of shape (samples, 6) with the history_columns,
+            the "path" and, with the surface, arrays "node_labels", "undeformed" and "deformed".
+    """
+    history, records, attributes = LoadResults(path, surface)
+    record = flatten(attributes)
+    record["history"] = columns(history, history_columns)
+    record["path"] = path
+    if surface:
+        record["node_labels"] = records["NodeLabel"].astype(int)
+        record["undeformed"] = columns(records, surface_columns[1:4])
+        record["deformed"] = columns(records, surface_columns[4:])
+    return record
+
+
+def ConvertResults(path, suffix=results_suffix):
+    """Writes a results file in the other format next to it and returns the new path."""
+    history, records, attributes = LoadResults(path)
+    destination = path[: -len(results_suffix)] + suffix
+    WriteResults(destination, history, records, attributes)
+    return destination
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert results files between the .csv and .npz formats."
+    )
+    parser.add_argument(
+        "--convert", required=True, nargs="+", help="Folders or globs of results"
+    )
+    parser.add_argument(
+        "--to", choices=["npz", "csv"], default="npz", help="Format to write"
+    )
+    args = parser.parse_args()
+
+    suffix = results_suffix if args.to == "npz" else csv_results_suffix
+    for pattern in args.convert:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*_Results.*")
+        for path in sorted(glob.glob(pattern)):
+            if is_results_file(path) and not path.endswith(suffix):
+                print(f"{path} -> {ConvertResults(path, suffix)}")
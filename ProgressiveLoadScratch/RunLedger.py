@@ -0,0 +1,151 @@
+"""
+Persistent ledger of the runs in a parameter sweep.
+
+The state of every parameter id (queued, running, done, failed, aborted or interrupted) is stored
+in a SQLite database together with timings and output paths. A sweep that is restarted after a
+crash skips the ids that are done and picks up the ones that were queued or interrupted while
+running, so start and stop ids no longer have to be edited by hand.
+"""
+
+import sqlite3
+import time
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ABORTED = "aborted"
+INTERRUPTED = "interrupted"
+
+
+class RunLedger:
+    """SQLite-backed record of the runs in a sweep, keyed by parameter id."""
+
+    def __init__(self, path="RunLedger.sqlite"):
+        """
+        Args:
+            path (str): Path to the database file. It is created if it does not exist.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30.0)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                job_name TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                queued_at REAL,
+                started_at REAL,
+                finished_at REAL,
+                wallclock_time REAL,
+                returncode INTEGER,
+                output_path TEXT,
+                message TEXT
+            )
+            """)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def queue(self, run_ids):
+        """Adds run ids that are not in the ledger yet as queued."""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO runs (run_id, status, queued_at) VALUES (?, ?, ?)",
+                [(str(run_id), QUEUED, now) for run_id in run_ids],
+            )
+
+    def pending(self, run_ids, retry_failed=False):
+        """
+        Returns the run ids that still have to be solved, in the given order.
+
+        Runs that are queued, were interrupted with the sweep or were left running by a crashed
+        sweep are pending.
+        Done runs are skipped, and so are failed and aborted runs unless retry_failed is True.
+
+        Args:
+            run_ids (list): The run ids of the sweep.
+            retry_failed (bool): If True, failed and aborted runs are solved again.
+
+        Returns:
+            list: The pending run ids.
+        """
+        self.queue(run_ids)
+        skip = (DONE,) if retry_failed else (DONE, FAILED, ABORTED)
+        finished = {
+            row[0]
+            for row in self.connection.execute(
+                f"SELECT run_id FROM runs WHERE status IN ({', '.join('?' * len(skip))})",
+                skip,
+            )
+        }
+        return [run_id for run_id in run_ids if str(run_id) not in finished]
+
+    def mark_running(self, run_id, job_name=None):
+        with self.connection:
+            self.connection.execute(
+                """
+                UPDATE runs SET status = ?, job_name = ?, started_at = ?, finished_at = NULL,
+                    attempts = attempts + 1, returncode = NULL, message = NULL
+                WHERE run_id = ?
+                """,
+                (RUNNING, job_name, time.time(), str(run_id)),
+            )
+
+    def mark_done(
+        self, run_id, wallclock_time=None, output_path=None, returncode=0, message=None
+    ):
+        self._finish(run_id, DONE, wallclock_time, output_path, returncode, message)
+
+    def mark_failed(self, run_id, message=None, wallclock_time=None, returncode=None):
+        self._finish(run_id, FAILED, wallclock_time, None, returncode, message)
+
+    def mark_aborted(self, run_id, reason, wallclock_time=None):
+        self._finish(run_id, ABORTED, wallclock_time, None, None, reason)
+
+    def mark_interrupted(self, run_id, reason, wallclock_time=None):
+        self._finish(run_id, INTERRUPTED, wallclock_time, None, None, reason)
+
+    def _finish(self, run_id, status, wallclock_time, output_path, returncode, message):
+        with self.connection:
+            self.connection.execute(
+                """
+                UPDATE runs SET status = ?, finished_at = ?, wallclock_time = ?,
+                    output_path = ?, returncode = ?, message = ?
+                WHERE run_id = ?
+                """,
+                (
+                    status,
+                    time.time(),
+                    wallclock_time,
+                    output_path,
+                    returncode,
+                    message,
+                    str(run_id),
+                ),
+            )
+
+    def status(self, run_id):
+        """Returns the status of a run id, or None if it is not in the ledger."""
+        row = self.connection.execute(
+            "SELECT status FROM runs WHERE run_id = ?", (str(run_id),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def record(self, run_id):
+        """Returns all columns of a run id as a dict, or None if it is not in the ledger."""
+        cursor = self.connection.execute(
+            "SELECT * FROM runs WHERE run_id = ?", (str(run_id),)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def summary(self):
+        """Returns the number of runs per status."""
+        return dict(
+            self.connection.execute("SELECT status, COUNT(*) FROM runs GROUP BY status")
+        )
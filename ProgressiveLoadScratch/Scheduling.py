@@ -0,0 +1,75 @@
+"""
+Ordering of sweep jobs by predicted runtime.
+
+With several jobs in flight, a few long jobs started at the end of a sweep leave most
+slots idle while they finish. Submitting the jobs longest-processing-time first (LPT) to
+the first free slot keeps the makespan within 4/3 of the optimum. The makespan of a
+sweep is compared against the ideal max(total / slots, longest job).
+"""
+
+import heapq
+
+
+def LongestProcessingTimeOrder(items, predicted_times):
+    """
+    Sorts items by decreasing predicted runtime.
+
+    Args:
+        items (list): The items to order, e.g. material parameter dicts.
+        predicted_times (list): Predicted runtime of each item.
+
+    Returns:
+        list: The items, longest first. Items with equal predictions keep their order.
+    """
+    order = sorted(range(len(items)), key=lambda i: -predicted_times[i])
+    return [items[i] for i in order]
+
+
+def SimulateSchedule(durations, n_slots):
+    """
+    Simulates list scheduling: each job, in the given order, starts on the first slot that becomes free.
+
+    Args:
+        durations (list): Runtime of each job in submission order.
+        n_slots (int): Number of jobs running at the same time.
+
+    Returns:
+        tuple: The makespan and the start time of every job.
+    """
+    slots = [0.0] * n_slots
+    heapq.heapify(slots)
+    start_times = []
+    for duration in durations:
+        start = heapq.heappop(slots)
+        start_times.append(start)
+        heapq.heappush(slots, start + duration)
+    return max(slots) if durations else 0.0, start_times
+
+
+def IdealMakespan(durations, n_slots):
+    """Lower bound on the makespan: perfectly balanced slots, but no shorter than the longest job."""
+    if not durations:
+        return 0.0
+    return max(sum(durations) / float(n_slots), max(durations))
+
+
+def MakespanReport(makespan, durations, n_slots):
+    """
+    Compares an achieved makespan with the ideal one.
+
+    Args:
+        makespan (float): Time from the first job start to the last job end.
+        durations (list): Runtime of each job.
+        n_slots (int): Number of jobs running at the same time.
+
+    Returns:
+        dict: The makespan, the ideal makespan, their ratio and the share of slot time left idle.
+    """
+    ideal = IdealMakespan(durations, n_slots)
+    capacity = makespan * n_slots
+    return {
+        "makespan": makespan,
+        "ideal_makespan": ideal,
+        "ratio": makespan / ideal if ideal > 0 else 1.0,
+        "idle_fraction": 1.0 - sum(durations) / capacity if capacity > 0 else 0.0,
+    }
@@ -0,0 +1,257 @@
+"""
+CAE-free launching of the Abaqus solver on pre-generated input decks.
+
+Each solve runs "abaqus job=<name> input=<deck> cpus=<n> ... interactive" as a managed
+subprocess in the directory of its input deck. The exit code, the captured standard output
+and the paths to the .sta and .msg files are kept on the SolverRun object, so a single
+driver process can run many solves without holding a CAE session open.
+
+The executable is taken from Constants.abaqus_command and can be replaced by a stand-in
+solver script such as benchmarks/fake_abaqus.py. A relative .py path in the command is taken
+relative to the directory of the driver, not of the run.
+
+Command line use:
+    python -m ProgressiveLoadScratch.SolverLauncher --cpus 12 --jobs 2 runs/a/a.inp runs/b/b.inp
+"""
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+from . import Constants as C
+
+
+class SolverRun:
+    """A single solve of an input deck by the command-line solver."""
+
+    def __init__(
+        self,
+        input_path,
+        job_name=None,
+        num_cpus=C.num_cpus,
+        num_domains=None,
+        memory_percentage=90,
+        solver_command=C.abaqus_command,
+        env=None,
+    ):
+        """
+        Args:
+            input_path (str): Path to the input deck. The job is solved in the directory of the deck.
+            job_name (str): Name of the job. Defaults to the name of the input deck.
+            num_cpus (int): Number of cpus used by the solver.
+            num_domains (int): Number of domains. Defaults to num_cpus.
+            memory_percentage (int): Share of the physical memory the solver may use.
+            solver_command (list): Command launching the solver. Its .py entries are made absolute.
+            env (dict): Extra environment variables for the solver process.
+        """
+        self.run_dir = os.path.dirname(os.path.abspath(input_path))
+        self.input_name = os.path.basename(input_path)
+        self.job_name = job_name or os.path.splitext(self.input_name)[0]
+        self.num_cpus = num_cpus
+        self.num_domains = num_domains or num_cpus
+        self.memory_percentage = memory_percentage
+        # The solver runs in the run directory, where a relative script path is not found
+        self.solver_command = [
+            os.path.abspath(part) if part.endswith(".py") else part
+            for part in solver_command
+        ]
+        self.env = env
+
+        self.process = None
+        self.returncode = None
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def command(self):
+        return self.solver_command + [
+            "job=" + self.job_name,
+            "input=" + self.input_name,
+            f"cpus={self.num_cpus}",
+            "parallel=domain",
+            f"domains={self.num_domains}",
+            "mp_mode=mpi",
+            f"memory={self.memory_percentage}%",
+            "interactive",
+        ]
+
+    def path(self, extension):
+        return os.path.join(self.run_dir, self.job_name + extension)
+
+    @property
+    def stdout_path(self):
+        # Abaqus writes its own <job>.log, so the captured output goes to <job>.out
+        return self.path(".out")
+
+    @property
+    def sta_path(self):
+        return self.path(".sta")
+
+    @property
+    def msg_path(self):
+        return self.path(".msg")
+
+    @property
+    def odb_path(self):
+        return self.path(".odb")
+
+    @property
+    def succeeded(self):
+        return self.returncode == 0
+
+    @property
+    def wallclock_time(self):
+        if self.start_time is None:
+            return None
+        end_time = self.end_time if self.end_time is not None else time.time()
+        return end_time - self.start_time
+
+    def start(self):
+        """Launches the solver without waiting for it."""
+        env = None
+        if self.env:
+            env = dict(os.environ)
+            env.update({key: str(value) for key, value in self.env.items()})
+        self._stdout = open(self.stdout_path, "w")
+        self.start_time = time.time()
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                cwd=self.run_dir,
+                stdout=self._stdout,
+                stderr=subprocess.STDOUT,
+                env=env,
+            )
+        except BaseException:
+            self._stdout.close()
+            raise
+        return self
+
+    def poll(self):
+        """Returns the exit code if the solver has exited, otherwise None, also before it is started."""
+        if self.returncode is not None:
+            return self.returncode
+        if self.process is None or self.process.poll() is None:
+            return None
+        self._exited()
+        return self.returncode
+
+    def wait(self, timeout=None):
+        """Blocks until the solver has exited and returns its exit code."""
+        self.process.wait(timeout=timeout)
+        self._exited()
+        return self.returncode
+
+    def terminate(self, timeout=30.0):
+        """
+        Asks Abaqus to terminate the job and stops the driver process,
+        killing it if it has not exited after timeout seconds.
+        """
+        if self.process is None or self.poll() is not None:
+            return
+        try:
+            subprocess.call(
+                self.solver_command + ["terminate", "job=" + self.job_name],
+                cwd=self.run_dir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.process.terminate()
+        try:
+            self.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.wait()
+
+    def stdout(self):
+        """Returns the captured standard output of the solver."""
+        if not os.path.exists(self.stdout_path):
+            return ""
+        with open(self.stdout_path, "r") as f:
+            return f.read()
+
+    def _exited(self):
+        if self.returncode is None:
+            self.returncode = self.process.returncode
+            self.end_time = time.time()
+            self._stdout.close()
+
+
+def RunInputDecks(
+    input_paths,
+    max_concurrent_jobs=1,
+    num_cpus=C.num_cpus,
+    solver_command=C.abaqus_command,
+    poll_interval=2.0,
+):
+    """
+    Solves a list of input decks with at most max_concurrent_jobs solvers in flight.
+    The cpus are split evenly over the concurrent jobs.
+
+    Args:
+        input_paths (list): Paths to the input decks.
+        max_concurrent_jobs (int): Number of jobs solved at the same time.
+        num_cpus (int): Total number of cpus shared by all concurrent jobs.
+        solver_command (list): Command launching the solver.
+        poll_interval (float): Seconds between checks of the running solver processes.
+
+    Returns:
+        list: The finished SolverRun objects, in the order of input_paths.
+    """
+    cpus_per_job = max(1, num_cpus // max_concurrent_jobs)
+    runs = [
+        SolverRun(
+            path,
+            num_cpus=cpus_per_job,
+            memory_percentage=max(1, 90 // max_concurrent_jobs),
+            solver_command=solver_command,
+        )
+        for path in input_paths
+    ]
+    pending = list(runs)
+    running = []
+
+    while pending or running:
+        while pending and len(running) < max_concurrent_jobs:
+            running.append(pending.pop(0).start())
+
+        finished = [run for run in running if run.poll() is not None]
+        for run in finished:
+            running.remove(run)
+            print(
+                f"{run.job_name}: exit code {run.returncode} after {run.wallclock_time:.1f} s"
+            )
+
+        if running and not finished:
+            time.sleep(poll_interval)
+
+    return runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Solve input decks with the Abaqus command-line solver."
+    )
+    parser.add_argument("input_paths", nargs="+", help="Input decks to solve")
+    parser.add_argument("--cpus", type=int, default=C.num_cpus, help="Total cpus")
+    parser.add_argument("--jobs", type=int, default=1, help="Concurrent jobs")
+    parser.add_argument(
+        "--abaqus",
+        default=None,
+        help='Solver command, e.g. "abaqus" or "python benchmarks/fake_abaqus.py"',
+    )
+    args = parser.parse_args()
+
+    solver_command = shlex.split(args.abaqus) if args.abaqus else C.abaqus_command
+    runs = RunInputDecks(
+        args.input_paths,
+        max_concurrent_jobs=args.jobs,
+        num_cpus=args.cpus,
+        solver_command=solver_command,
+    )
+    sys.exit(0 if all(run.succeeded for run in runs) else 1)
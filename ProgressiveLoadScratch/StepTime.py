@@ -0,0 +1,111 @@
+"""
+Selection of the step time of the scratch.
+
+The scratch is quasi-static, so its step time is only a numerical parameter: the explicit
+solver takes as many increments as the step time divided by the stable increment, and a
+shorter scratch is proportionally cheaper. A faster indenter adds inertia though, which shows
+as oscillating reaction forces and a growing ratio of kinetic to internal energy.
+
+StepTimeStudy solves the scratch for decreasing step times on a fixed mesh and material. The
+longest step time is the reference. Every shorter one is compared with it through the relative
+L2 change of the RF2 and RF3 histories over the fraction of the step time and of the final
+surface (Convergence.ConvergenceError), and its KE / IE is screened as in EnergyScreening. The
+study stops at the first step time failing either check, and the shortest step time passing
+both is selected. The selections are stored per mesh size in a JSON file like the cpu tuning.
+"""
+
+import json
+import os
+from . import Constants as C
+from .Convergence import ConvergenceError, ReadRun
+from .CpuTuning import mesh_key
+from .EnergyScreening import EnergyRatioStatistics
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_step_time_path = os.path.join(repo_root, "runs", "step_times.json")
+
+
+def StepTimeStudy(
+    step_times, run_step_time, tolerance=0.02, max_ratio=0.1, min_ie_fraction=0.05
+):
+    """
+    Runs decreasing scratch step times until inertia changes the results.
+
+    Args:
+        step_times (list): Scratch step times. The longest is the reference and the others are run
+            from the longest to the shortest.
+        run_step_time: Callable solving the scratch in a step time and returning the path of its results file.
+        tolerance (float): Largest relative change of forces and surface from the reference.
+        max_ratio (float): Largest KE / IE over the scratch.
+        min_ie_fraction (float): Samples with IE below this fraction of the final IE are not screened.
+
+    Returns:
+        dict: "history" with one dict per step time run (scratch_time, path, errors from the
+            reference, ke_ie_max, ke_ie_mean and passed), and the "selected" step time, None if
+            not even the reference passed.
+    """
+    history = []
+    selected = None
+    reference = None
+    for scratch_time in sorted(step_times, reverse=True):
+        path = run_step_time(scratch_time)
+        run = ReadRun(path)
+        statistics = EnergyRatioStatistics([run], max_ratio, min_ie_fraction)
+        entry = {
+            "scratch_time": scratch_time,
+            "path": path,
+            "ke_ie_max": float(statistics["ke_ie_max"][0]),
+            "ke_ie_mean": float(statistics["ke_ie_mean"][0]),
+        }
+        passed = entry["ke_ie_max"] <= max_ratio
+        if reference is None:
+            reference = run
+        else:
+            errors = ConvergenceError(run, reference, normalise_time=True)
+            entry.update(errors)
+            passed = passed and errors["max"] < tolerance
+        entry["passed"] = bool(passed)
+        history.append(entry)
+        print(
+            f"Scratch time {scratch_time:g}: max KE/IE {entry['ke_ie_max']:.3g}"
+            + (f", change {entry['max']:.3g}" if "max" in entry else "")
+            + ("" if passed else " -- failed")
+        )
+        if not passed:
+            break
+        selected = scratch_time
+    return {"history": history, "selected": selected}
+
+
+class StepTimeStore:
+    """Selected scratch step times per mesh size, stored as JSON."""
+
+    def __init__(self, path=default_step_time_path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.data = json.load(f)
+
+    def update(self, mesh_size, study, unload_time=C.unload_time):
+        """Stores a StepTimeStudy of a mesh size. The unloading step is shortened in proportion."""
+        selected = study["selected"]
+        self.data[mesh_key(mesh_size)] = {
+            "history": study["history"],
+            "scratch_time": selected,
+            "unload_time": (
+                None if selected is None else unload_time * selected / C.scratch_time
+            ),
+        }
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(self.path, "w") as f:
+            json.dump(self.data, f, indent=2)
+
+    def step_times(self, mesh_size):
+        """Returns (scratch_time, unload_time) selected for the mesh size, or None if it has no selection."""
+        entry = self.data.get(mesh_key(mesh_size))
+        if entry is None or entry["scratch_time"] is None:
+            return None
+        return entry["scratch_time"], entry["unload_time"]
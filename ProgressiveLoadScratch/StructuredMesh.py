@@ -0,0 +1,337 @@
+"""
+NumPy generator of the graded structured substrate mesh, without the Abaqus kernel.
+
+SubstrateMeshing seeds the partitioned substrate with a uniform size in the refined strip
+under the scratch and single-bias grading out to coarse_mesh_size_1/2, and meshes it with
+structured C3D8R elements. Here the same seeds are laid out along each axis:
+
+    x: [xs1, dpo_x] uniform SubstrateSizeX, [dpo_x, xs2] biased SubstrateSizeX -> coarse_mesh_size_2
+    y: [ys1, ys2 - dpo_y] biased coarse_mesh_size_1 -> SubstrateSizeY, [ys2 - dpo_y, ys2] uniform SubstrateSizeY
+    z: [zs1, dpo_z] biased coarse_mesh_size_1 -> SubstrateSizeZ, [dpo_z, zs2 - dpo_z] uniform SubstrateSizeZ,
+       [zs2 - dpo_z, zs2] biased SubstrateSizeZ -> coarse_mesh_size_1
+
+and the mesh is their tensor product. The refined area, the boundary faces and the element
+sizes match the CAE mesh. Away from the refined area Abaqus transfinitely interpolates between
+edges with different bias, so node positions there differ slightly from CAE.
+
+Element faces follow the C3D8 numbering: S1 z-min, S2 z-max, S3 y-min, S4 x-max, S5 y-max, S6 x-min.
+The contact surface is the S5 face of the top layer of the refined area.
+"""
+
+import numpy as np
+from . import Constants as C
+
+
+def UniformSeeds(length, size):
+    """Element lengths of an edge seeded by size. As with constraint=FINER, elements are never longer than size."""
+    n = max(1, int(np.ceil(length / size - 1e-9)))
+    return np.full(n, length / n)
+
+
+def BiasSeeds(length, min_size, max_size):
+    """
+    Element lengths of an edge seeded by single bias, growing geometrically from min_size to max_size.
+
+    The bias ratio max_size / min_size is kept, and the number of elements is the smallest for which the
+    first element is no longer than min_size.
+
+    Returns:
+        np.ndarray: Element lengths, smallest first.
+    """
+    if min_size >= length:
+        return np.array([length])
+    ratio = max_size / min_size
+    if ratio <= 1.0:
+        return UniformSeeds(length, min_size)
+    # Continuous estimate from the sum of the geometric series, then correct upwards
+    q = (length - min_size) / max(length - max_size, min_size)
+    n = 2 if q <= 1.0 else max(2, int(np.floor(1.0 + np.log(ratio) / np.log(q))))
+    while True:
+        sizes = ratio ** (np.arange(n) / (n - 1.0))
+        sizes *= length / sizes.sum()
+        if sizes[0] <= min_size * (1.0 + 1e-6):
+            return sizes
+        n += 1
+
+
+def Coordinates(*segments):
+    """Node coordinates along an axis from a start coordinate and consecutive element lengths."""
+    start = segments[0]
+    lengths = np.concatenate(segments[1:])
+    return start + np.concatenate([[0.0], np.cumsum(lengths)])
+
+
+def SubstrateSeeds(SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ):
+    """
+    Node coordinates along the three axes of the substrate for the mesh sizes of the refined area.
+
+    Returns:
+        tuple: x, y and z node coordinates.
+    """
+    x = Coordinates(
+        C.xs1,
+        UniformSeeds(C.dpo_x - C.xs1, SubstrateSizeX),
+        BiasSeeds(C.xs2 - C.dpo_x, SubstrateSizeX, C.coarse_mesh_size_2),
+    )
+    y = Coordinates(
+        C.ys1,
+        BiasSeeds(C.ys2 - C.dpo_y - C.ys1, SubstrateSizeY, C.coarse_mesh_size_1)[::-1],
+        UniformSeeds(C.dpo_y, SubstrateSizeY),
+    )
+    z = Coordinates(
+        C.zs1,
+        BiasSeeds(C.dpo_z, SubstrateSizeZ, C.coarse_mesh_size_1)[::-1],
+        UniformSeeds(C.zs2 - 2 * C.dpo_z - C.zs1, SubstrateSizeZ),
+        BiasSeeds(C.dpo_z, SubstrateSizeZ, C.coarse_mesh_size_1),
+    )
+    # Snap the ends of the partitions onto the geometry
+    x[-1], y[-1], z[-1] = C.xs2, C.ys2, C.zs2
+    return x, y, z
+
+
+def in_range(values, low, high, eps=1e-9):
+    return (values >= low - eps) & (values <= high + eps)
+
+
+class SubstrateMesh:
+    """Structured C3D8R mesh of the substrate with its node sets, element sets and contact surface."""
+
+    def __init__(self, SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ):
+        self.x, self.y, self.z = SubstrateSeeds(
+            SubstrateSizeX, SubstrateSizeY, SubstrateSizeZ
+        )
+        self.shape = (len(self.x), len(self.y), len(self.z))
+        nx, ny, nz = self.shape
+
+        # Node (i, j, k) has label 1 + i + nx * (j + ny * k)
+        xx, yy, zz = np.meshgrid(self.x, self.y, self.z, indexing="ij")
+        self.nodes = np.column_stack(
+            [xx.ravel(order="F"), yy.ravel(order="F"), zz.ravel(order="F")]
+        )
+        self.node_labels = np.arange(1, self.nodes.shape[0] + 1)
+
+        i, j, k = np.meshgrid(
+            np.arange(nx - 1), np.arange(ny - 1), np.arange(nz - 1), indexing="ij"
+        )
+        i, j, k = i.ravel(order="F"), j.ravel(order="F"), k.ravel(order="F")
+
+        def label(di, dj, dk):
+            return 1 + (i + di) + nx * ((j + dj) + ny * (k + dk))
+
+        self.elements = np.column_stack(
+            [
+                label(0, 0, 0),
+                label(1, 0, 0),
+                label(1, 1, 0),
+                label(0, 1, 0),
+                label(0, 0, 1),
+                label(1, 0, 1),
+                label(1, 1, 1),
+                label(0, 1, 1),
+            ]
+        )
+        self.element_labels = np.arange(1, self.elements.shape[0] + 1)
+        self.element_index = (i, j, k)
+
+    @property
+    def n_nodes(self):
+        return self.nodes.shape[0]
+
+    @property
+    def n_elements(self):
+        return self.elements.shape[0]
+
+    def element_centres(self):
+        i, j, k = self.element_index
+        return np.column_stack(
+            [
+                0.5 * (self.x[i] + self.x[i + 1]),
+                0.5 * (self.y[j] + self.y[j + 1]),
+                0.5 * (self.z[k] + self.z[k + 1]),
+            ]
+        )
+
+    def node_set(self, axis, value):
+        """Labels of the nodes on the plane where coordinate axis (0, 1 or 2) equals value."""
+        return self.node_labels[np.abs(self.nodes[:, axis] - value) < 1e-9]
+
+    def refined_elements(self):
+        """Labels of the elements in the refined area under the scratch."""
+        centres = self.element_centres()
+        inside = (
+            in_range(centres[:, 0], C.xs1, C.dpo_x)
+            & in_range(centres[:, 1], C.ys2 - C.dpo_y, C.ys2)
+            & in_range(centres[:, 2], C.zs1 + C.dpo_z, C.zs2 - C.dpo_z)
+        )
+        return self.element_labels[inside]
+
+    def contact_elements(self):
+        """Labels of the refined elements whose S5 face lies on the top of the substrate."""
+        i, j, k = self.element_index
+        top = j == self.shape[1] - 2
+        centres = self.element_centres()
+        inside = (
+            top
+            & in_range(centres[:, 0], C.xs1, C.dpo_x)
+            & in_range(centres[:, 2], C.zs1 + C.dpo_z, C.zs2 - C.dpo_z)
+        )
+        return self.element_labels[inside]
+
+    def contact_nodes(self):
+        """Labels of the nodes of the contact surface."""
+        faces = self.elements[self.contact_elements() - 1][:, [2, 6, 7, 3]]
+        return np.unique(faces)
+
+    def sets(self):
+        """Node and element sets with the names used in the model."""
+        return {
+            "nsets": {
+                "FIXEDBCSET": self.node_set(1, C.ys1),
+                "XsymmetryBCSet": self.node_set(0, C.xs1),
+                C.contact_region_nodes_name: self.contact_nodes(),
+            },
+            "elsets": {
+                C.substrate_set_name: self.element_labels,
+                "RefinedArea": self.refined_elements(),
+            },
+        }
+
+    def write_inp(self, f):
+        """Writes the *Node, *Element, *Nset, *Elset and *Surface blocks of the mesh to an open file."""
+        f.write("*Node\n")
+        write_rows(
+            f, np.column_stack([self.node_labels, self.nodes]), "%d, %.9g, %.9g, %.9g"
+        )
+        f.write("*Element, type=C3D8R\n")
+        write_rows(
+            f,
+            np.column_stack([self.element_labels, self.elements]),
+            ", ".join(["%d"] * 9),
+        )
+        sets = self.sets()
+        for name, labels in sets["nsets"].items():
+            f.write(f"*Nset, nset={name}\n")
+            write_labels(f, labels)
+        for name, labels in sets["elsets"].items():
+            f.write(f"*Elset, elset={name}\n")
+            write_labels(f, labels)
+        surface_set = "_" + C.slave_surface_name + "_S5"
+        f.write(f"*Elset, elset={surface_set}, internal\n")
+        write_labels(f, self.contact_elements())
+        f.write(f"*Surface, type=ELEMENT, name={C.slave_surface_name}\n")
+        f.write(f"{surface_set}, S5\n")
+
+
+def write_rows(f, rows, row_format, chunk=100000):
+    """Writes the rows of a 2-D array, formatting a chunk of rows at a time."""
+    for start in range(0, rows.shape[0], chunk):
+        block = rows[start : start + chunk]
+        text = ((row_format + "\n") * block.shape[0]) % tuple(block.ravel().tolist())
+        f.write(text)
+
+
+def write_labels(f, labels, per_line=16):
+    """Writes labels as data lines of at most 16 entries, the limit of *Nset and *Elset."""
+    labels = np.asarray(labels)
+    n_full = len(labels) // per_line * per_line
+    if n_full:
+        write_rows(
+            f, labels[:n_full].reshape(-1, per_line), ", ".join(["%d"] * per_line)
+        )
+    if len(labels) > n_full:
+        f.write(", ".join(str(label) for label in labels[n_full:]) + "\n")
+
+
+def ElementVolumes(mesh):
+    """Volumes of the elements from the determinant of the Jacobian at the element centre."""
+    xyz = mesh.nodes[mesh.elements - 1]  # (elements, 8, 3)
+    # Mean edge vectors along the element axes, in the C3D8 node order. Their triple
+    # product is the volume of a parallelepiped and negative for an inverted element
+    d_xi = 0.25 * (
+        (xyz[:, 1] - xyz[:, 0])
+        + (xyz[:, 2] - xyz[:, 3])
+        + (xyz[:, 5] - xyz[:, 4])
+        + (xyz[:, 6] - xyz[:, 7])
+    )
+    d_eta = 0.25 * (
+        (xyz[:, 3] - xyz[:, 0])
+        + (xyz[:, 2] - xyz[:, 1])
+        + (xyz[:, 7] - xyz[:, 4])
+        + (xyz[:, 6] - xyz[:, 5])
+    )
+    d_zeta = 0.25 * (
+        (xyz[:, 4] - xyz[:, 0])
+        + (xyz[:, 5] - xyz[:, 1])
+        + (xyz[:, 6] - xyz[:, 2])
+        + (xyz[:, 7] - xyz[:, 3])
+    )
+    return np.einsum("ij,ij->i", d_xi, np.cross(d_eta, d_zeta))
+
+
+def ElementQuality(mesh):
+    """
+    Quality measures of the elements.
+
+    Returns:
+        dict: Arrays volume, aspect_ratio (longest over shortest edge) and min_edge per element.
+    """
+    i, j, k = mesh.element_index
+    edges = np.column_stack(
+        [
+            mesh.x[i + 1] - mesh.x[i],
+            mesh.y[j + 1] - mesh.y[j],
+            mesh.z[k + 1] - mesh.z[k],
+        ]
+    )
+    return {
+        "volume": ElementVolumes(mesh),
+        "aspect_ratio": edges.max(axis=1) / edges.min(axis=1),
+        "min_edge": edges.min(axis=1),
+    }
+
+
+def CheckMesh(mesh, max_aspect_ratio=None, rtol=1e-9):
+    """
+    Checks the node and element counts, the connectivity and the element shapes of a mesh.
+
+    Args:
+        mesh (SubstrateMesh): The mesh to check.
+        max_aspect_ratio (float): If given, elements above this edge length ratio are reported.
+        rtol (float): Relative tolerance on the total volume.
+
+    Returns:
+        list: Descriptions of the problems found. Empty if the mesh is valid.
+    """
+    problems = []
+    nx, ny, nz = mesh.shape
+    if mesh.n_nodes != nx * ny * nz:
+        problems.append(f"{mesh.n_nodes} nodes, expected {nx * ny * nz}")
+    expected_elements = (nx - 1) * (ny - 1) * (nz - 1)
+    if mesh.n_elements != expected_elements:
+        problems.append(f"{mesh.n_elements} elements, expected {expected_elements}")
+    if len(np.unique(mesh.elements)) != mesh.n_nodes:
+        problems.append("Not every node belongs to an element")
+
+    quality = ElementQuality(mesh)
+    n_inverted = int(np.sum(quality["volume"] <= 0.0))
+    if n_inverted:
+        problems.append(f"{n_inverted} elements with non-positive volume")
+    box = (C.xs2 - C.xs1) * (C.ys2 - C.ys1) * (C.zs2 - C.zs1)
+    if abs(quality["volume"].sum() - box) > rtol * box:
+        problems.append(
+            f"Total volume {quality['volume'].sum():.9g}, expected {box:.9g}"
+        )
+    if max_aspect_ratio is not None:
+        n_stretched = int(np.sum(quality["aspect_ratio"] > max_aspect_ratio))
+        if n_stretched:
+            problems.append(
+                f"{n_stretched} elements with aspect ratio above {max_aspect_ratio:g}"
+            )
+
+    contact = mesh.contact_nodes()
+    expected_contact = (int(np.sum(in_range(mesh.x, C.xs1, C.dpo_x)))) * int(
+        np.sum(in_range(mesh.z, C.zs1 + C.dpo_z, C.zs2 - C.dpo_z))
+    )
+    if len(contact) != expected_contact:
+        problems.append(f"{len(contact)} contact nodes, expected {expected_contact}")
+    return problems
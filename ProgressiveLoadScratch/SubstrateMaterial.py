@@ -142,6 +142,8 @@ class SubstrateMaterialAssignment:
     def SectionAssignment(self):
         """
         Assigns the created material to the substrate part by creating and assigning a section.
+        A model kept open between runs already has the section assigned, and the section, which
+        refers to the material by name, is only replaced.
 
         Returns:
             ScratchModel: The Abaqus model object with the material and section assigned.
@@ -152,6 +154,11 @@ class SubstrateMaterialAssignment:
             material=self.MaterialName, name="SubstrateSection", thickness=None
         )
 
+        if any(
+            assignment.sectionName == "SubstrateSection"
+            for assignment in self.SubstratePart.sectionAssignments
+        ):
+            return self.ScratchModel, self.SubstratePart
         self.SubstratePart.SectionAssignment(
             offset=0.0,
             offsetField="",
@@ -183,3 +190,43 @@ class SubstrateMaterialAssignment:
                 property=((kappa,),)  # , referenceStress=Hardness
             )
         return self.ScratchModel
+
+
+def AssignMaterialParameters(ScratchModel, SubstratePart, parameters):
+    """
+    Assigns a material parameter dict, as found in the sweeps, to the substrate and sets the friction.
+    Johnson-Cook damage and its evolution are added when the parameters contain D1, D2, D3 and kc.
+
+    Args:
+        ScratchModel: The Abaqus model object.
+        SubstratePart: The Abaqus part object of the substrate.
+        parameters (dict): Material parameters with at least rho, E, nu, A, B, n and mu.
+
+    Returns:
+        SubstrateMaterialAssignment: The material assignment.
+    """
+    material = SubstrateMaterialAssignment(
+        ScratchModel,
+        SubstratePart,
+        rho=float(parameters["rho"]),
+        youngs_modulus=float(parameters["E"]),
+        poisson_ratio=float(parameters["nu"]),
+    )
+    material.JohnsonCookHardening(
+        A=float(parameters["A"]), B=float(parameters["B"]), n=float(parameters["n"])
+    )
+    if "D1" in parameters and "kc" in parameters:
+        material.JohnsonCookDamage(
+            d1=float(parameters["D1"]),
+            d2=float(parameters["D2"]),
+            d3=float(parameters["D3"]),
+        )
+        material.DamageEvolution(
+            kc=float(parameters["kc"]),
+            uts=float(parameters.get("uts", 0.0)),
+            E=float(parameters["E"]),
+            nu=float(parameters["nu"]),
+        )
+    material.SectionAssignment()
+    material.UpdateFrictionAndWear(float(parameters["mu"]))
+    return material
@@ -0,0 +1,233 @@
+"""
+Consolidated results of a sweep in one dataset.
+
+Every finished run appends its history and contact surface to the dataset of the sweep, a folder of
+
+    history/<column>.bin   the history column of all runs back to back, e.g. history/RF3.bin
+    surface/<column>.bin   the surface column of all runs back to back, e.g. surface/y_deformed.bin
+    index.jsonl            one line per run: file name, attributes and the first record and
+                           the number of records of its history and surface
+
+with the column types of ResultsFile. The files are only appended to: the columns of a run are
+written first and its index line last, so a run is part of the dataset once its index line is
+complete, and data left behind by an interrupted append is overwritten by the next one. There
+is a single writer, the sweep driver; any number of processes can read at the same time.
+
+Readers memory-map the columns, so a query only reads the pages it touches: the RF3 history
+of all runs is one contiguous file, and the final profiles of the runs with mu > 0.1 are
+slices of the surface columns:
+
+    dataset = SweepDataset("runs/MaterialSweepNew/SweepDataset")
+    rf3 = dataset.history_matrix("RF3")
+    profiles = dataset.surface("y_deformed", np.flatnonzero(dataset.parameter("mu") > 0.1))
+
+Command line use, adding the results files of a sweep that are not in its dataset yet:
+    python -m ProgressiveLoadScratch.SweepDataset --dataset runs/MaterialSweepNew/SweepDataset
+        --results runs/MaterialSweepNew/SimDataOutputs
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+from .ResultsFile import (
+    LoadResults,
+    ResultsFiles,
+    flatten,
+    history_columns,
+    history_dtype,
+    surface_columns,
+    surface_dtype,
+)
+
+index_name = "index.jsonl"
+
+
+def run_name(path):
+    """Name of a run in the dataset, the results file name without the _Results suffix."""
+    return os.path.basename(path).rsplit("_Results", 1)[0]
+
+
+class SweepDataset:
+    """Append-only store of the histories and surfaces of all runs of a sweep."""
+
+    def __init__(self, path):
+        self.path = path
+        self.runs = []
+        self.names = set()
+        self.refresh()
+
+    def column_path(self, group, name):
+        return os.path.join(self.path, group, name + ".bin")
+
+    def refresh(self):
+        """Reads the index again, picking up runs appended by the writer since it was last read."""
+        self.runs = []
+        index_path = os.path.join(self.path, index_name)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        # Index line of an append in progress or interrupted
+                        break
+                    self.runs.append(json.loads(line))
+        self.names = {run["name"] for run in self.runs}
+
+    def __len__(self):
+        return len(self.runs)
+
+    def end(self, group):
+        """Number of committed records of a group, where the next run is written."""
+        if not self.runs:
+            return 0
+        start, count = self.runs[-1][group]
+        return start + count
+
+    def write_columns(self, group, array, columns):
+        start = self.end(group)
+        folder = os.path.join(self.path, group)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        for name in columns:
+            path = self.column_path(group, name)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(start * array.dtype[name].itemsize)
+                f.write(np.ascontiguousarray(array[name]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        return [start, len(array)]
+
+    def append(self, results_path):
+        """
+        Appends the history and surface of a results file.
+
+        Returns:
+            bool: False if a run of that name is already in the dataset.
+        """
+        name = run_name(results_path)
+        if name in self.names:
+            return False
+        history, surface, attributes = LoadResults(results_path)
+        entry = {
+            "name": name,
+            "attributes": attributes,
+            "history": self.write_columns("history", history, history_columns),
+            "surface": self.write_columns("surface", surface, surface_columns),
+        }
+        index_path = os.path.join(self.path, index_name)
+        if os.path.exists(index_path) and os.path.getsize(index_path) > 0:
+            with open(index_path, "rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Drops the incomplete line of an interrupted append
+                    f.seek(0)
+                    f.truncate(f.read().rfind(b"\n") + 1)
+        with open(index_path, "a") as f:
+            f.write(json.dumps(entry, default=float) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.runs.append(entry)
+        self.names.add(name)
+        return True
+
+    def update(self, pattern):
+        """Appends all results files in a folder or matching a glob pattern that are not in the dataset."""
+        appended = 0
+        for path in ResultsFiles(pattern):
+            if run_name(path) not in self.names:
+                appended += self.append(path)
+        return appended
+
+    def parameter(self, name, default=np.nan):
+        """
+        A material parameter or model setting of all runs, e.g. parameter("mu") > 0.1 to select runs.
+
+        Returns:
+            np.ndarray: One value per run, float if all values are numbers.
+        """
+        values = [flatten(run["attributes"]).get(name, default) for run in self.runs]
+        try:
+            return np.array(values, dtype=float)
+        except (TypeError, ValueError):
+            return np.array(values, dtype=object)
+
+    def ids(self):
+        return [run["attributes"].get("material", {}).get("id") for run in self.runs]
+
+    def column(self, group, name):
+        """Memory map of a column over the committed records of all runs."""
+        dtype = (history_dtype if group == "history" else surface_dtype)[name]
+        n = self.end(group)
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(
+            self.column_path(group, name), dtype=dtype, mode="r", shape=(n,)
+        )
+
+    def slices(self, group, name, runs=None):
+        column = self.column(group, name)
+        if runs is None:
+            runs = range(len(self.runs))
+        return [
+            column[start : start + count]
+            for start, count in (self.runs[i][group] for i in runs)
+        ]
+
+    def history(self, name, runs=None):
+        """History column of runs (all if None), as a list of memory-mapped arrays."""
+        return self.slices("history", name, runs)
+
+    def surface(self, name, runs=None):
+        """Surface column of runs (all if None), as a list of memory-mapped arrays."""
+        return self.slices("surface", name, runs)
+
+    def history_matrix(self, name, runs=None, fill=np.nan):
+        """History column of runs as a (runs, most samples) array, shorter histories padded with fill."""
+        histories = self.history(name, runs)
+        matrix = np.full((len(histories), max([len(h) for h in histories] + [0])), fill)
+        for i, history in enumerate(histories):
+            matrix[i, : len(history)] = history
+        return matrix
+
+    def run(self, i):
+        """
+        A run as a record of ResultsFile.ReadResultsFile, for Convergence and EnergyScreening.
+        """
+        entry = self.runs[i]
+        record = flatten(entry["attributes"])
+        record["history"] = np.column_stack(
+            [self.history(name, [i])[0] for name in history_columns]
+        )
+        record["node_labels"] = np.asarray(self.surface("NodeLabel", [i])[0])
+        record["undeformed"] = np.column_stack(
+            [self.surface(name, [i])[0] for name in surface_columns[1:4]]
+        ).astype(float)
+        record["deformed"] = np.column_stack(
+            [self.surface(name, [i])[0] for name in surface_columns[4:]]
+        ).astype(float)
+        record["path"] = entry["name"]
+        return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Add the results files of a sweep to its consolidated dataset."
+    )
+    parser.add_argument("--dataset", required=True, help="Dataset folder")
+    parser.add_argument(
+        "--results", nargs="+", default=[], help="Folders or globs of results"
+    )
+    args = parser.parse_args()
+
+    dataset = SweepDataset(args.dataset)
+    for pattern in args.results:
+        print(f"Appended {dataset.update(pattern)} runs from {pattern}")
+    size = sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(args.dataset)
+        for name in names
+    )
+    print(
+        f"{len(dataset)} runs, {dataset.end('history')} history and "
+        f"{dataset.end('surface')} surface records, {size / 1024**2:.1f} MiB"
+    )
@@ -0,0 +1,440 @@
+"""
+Concurrent execution of material parameter sweeps.
+
+Every run in the sweep gets its own job name and run directory, so several solver
+processes can work side by side. The cpu budget in Constants is split evenly over
+the concurrent jobs. The module does not depend on the Abaqus kernel; writing the
+input deck and post-processing the results are handed in as callbacks.
+"""
+
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import Constants as C
+from .SolverLauncher import SolverRun
+from .Scheduling import LongestProcessingTimeOrder, MakespanReport
+from .ResultsFile import results_suffix
+
+
+class SweepJob:
+    """Book-keeping for a single run of the sweep."""
+
+    def __init__(self, run_id, job_name, run_dir, parameters):
+        """
+        Args:
+            run_id (str): Id of the parameter set, e.g. "00007".
+            job_name (str): Unique Abaqus job name of the run.
+            run_dir (str): Directory the job is solved in.
+            parameters (dict): The material parameters of the run.
+        """
+        self.run_id = run_id
+        self.job_name = job_name
+        self.run_dir = run_dir
+        self.parameters = parameters
+        self.cache_key = None
+        self.solver = None
+        self.monitor = None
+        self.last_check = 0.0
+        self.abort_reason = None
+        self.post_process_future = None
+        self.output_path = None
+        self.finished_time = None
+        self.status = "queued"
+
+    @property
+    def wallclock_time(self):
+        if self.solver is None:
+            return None
+        return self.solver.wallclock_time
+
+    @property
+    def post_process_latency(self):
+        """Seconds from the exit of the solver until the job was post-processed and archived."""
+        if (
+            self.finished_time is None
+            or self.solver is None
+            or self.solver.end_time is None
+        ):
+            return None
+        return self.finished_time - self.solver.end_time
+
+
+class SweepExecutor:
+    """
+    Runs the jobs of a parameter sweep with a fixed number of jobs in flight.
+
+    The executor calls write_input(job_name, run_dir, parameters) to create <run_dir>/<job_name>.inp,
+    launches the solver on it and, once the solver has exited, calls post_process(job_name, run_dir, parameters).
+    By default post-processing is done in the calling process, so the callback may use odbAccess.
+    With post_process_workers > 0 the callback runs on background threads instead, and the next job is
+    started as soon as a solver exits. The callback should then hand the work to a separate process,
+    e.g. PostProcessInSubprocess. The value returned by post_process is recorded as the output path of the run.
+    """
+
+    def __init__(
+        self,
+        write_input,
+        post_process,
+        sweep_name="Sweep",
+        max_concurrent_jobs=1,
+        num_cpus=C.num_cpus,
+        solver_command=C.abaqus_command,
+        output_folder="SimDataOutputs",
+        keep_run_dirs=False,
+        poll_interval=2.0,
+        ledger=None,
+        retry_failed=False,
+        post_process_workers=0,
+        predict_wallclock=None,
+        solver_env=None,
+        watchdog=None,
+        result_cache=None,
+        cpus_per_job=None,
+        domains_per_job=None,
+        dataset=None,
+    ):
+        """
+        Args:
+            write_input: Callable writing the input deck of a run.
+            post_process: Callable extracting the results of a finished run.
+            sweep_name (str): Prefix of the job names and run directories.
+            max_concurrent_jobs (int): Number of jobs solved at the same time.
+            num_cpus (int): Total number of cpus shared by all concurrent jobs.
+            solver_command (list): Command launching the solver. Can be replaced by a stand-in solver script.
+            output_folder (str): Folder the .sta and .odb files of finished runs are archived to.
+            keep_run_dirs (bool): If False, run directories of successful runs are deleted after archiving.
+            poll_interval (float): Seconds between checks of the running solver processes.
+            ledger (RunLedger): If given, runs that are done are skipped and the state of every run is recorded.
+            retry_failed (bool): If True, runs marked as failed in the ledger are solved again.
+            post_process_workers (int): Number of background threads running post_process. If 0,
+                post-processing blocks the submission of the next job.
+            predict_wallclock: Callable returning the predicted wallclock time of a parameter dict.
+                If given, jobs are submitted longest predicted runtime first.
+            solver_env: Callable returning extra environment variables of the solver for a parameter dict.
+            watchdog (DivergenceWatchdog): If given, running jobs are checked against its limits and
+                terminated when they cross them.
+            result_cache (ResultCache): If given, runs whose configuration is in the cache are not solved;
+                the cached results file is copied to the output folder instead. Duplicate configurations
+                within the sweep wait for the first one to finish.
+            cpus_per_job (int): Cpus of each job. Defaults to num_cpus split evenly over the concurrent jobs.
+            domains_per_job (int): Domains of each job. Defaults to cpus_per_job.
+            dataset (SweepDataset): If given, the results of every finished or cached run are appended to it.
+        """
+        if max_concurrent_jobs < 1:
+            raise ValueError("max_concurrent_jobs must be at least 1")
+
+        self.write_input = write_input
+        self.post_process = post_process
+        self.sweep_name = sweep_name
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.num_cpus = num_cpus
+        self.cpus_per_job = cpus_per_job or max(1, num_cpus // max_concurrent_jobs)
+        self.domains_per_job = domains_per_job or self.cpus_per_job
+        self.solver_command = list(solver_command)
+        self.output_folder = output_folder
+        self.keep_run_dirs = keep_run_dirs
+        self.poll_interval = poll_interval
+        self.ledger = ledger
+        self.retry_failed = retry_failed
+        self.post_process_workers = post_process_workers
+        self.predict_wallclock = predict_wallclock
+        self.solver_env = solver_env
+        self.watchdog = watchdog
+        self.result_cache = result_cache
+        self.dataset = dataset
+        self.report = None
+
+    def make_job(self, parameters):
+        run_id = str(parameters["id"])
+        job_name = self.sweep_name + "_" + run_id
+        job = SweepJob(run_id, job_name, job_name, parameters)
+        if self.result_cache is not None:
+            job.cache_key = self.result_cache.key(parameters)
+        return job
+
+    def next_job(self, pending, in_flight):
+        """Takes the next pending job that is not a duplicate of a job in flight."""
+        in_flight_keys = {job.cache_key for job in in_flight}
+        for i, job in enumerate(pending):
+            if job.cache_key is None or job.cache_key not in in_flight_keys:
+                return pending.pop(i)
+        return None
+
+    def fetch_cached(self, job):
+        """
+        Copies the cached results of a job to the output folder.
+
+        Returns:
+            bool: True on a cache hit.
+        """
+        if self.result_cache is None:
+            return False
+        destination = os.path.join(
+            self.output_folder, self.file_name(job) + results_suffix
+        )
+        if not self.result_cache.fetch(job.parameters, destination):
+            return False
+        job.status = "cached"
+        job.output_path = destination
+        if self.dataset is not None:
+            self.dataset.append(destination)
+        if self.ledger is not None:
+            self.ledger.mark_done(
+                job.run_id,
+                wallclock_time=0.0,
+                output_path=destination,
+                message="Result cache hit " + job.cache_key,
+            )
+        print(f"Reused cached results for {job.job_name}")
+        return True
+
+    def file_name(self, job):
+        return "sim" + job.run_id
+
+    def start(self, job):
+        """Writes the input deck of the job and launches the solver on it."""
+        # Leftovers of an interrupted attempt, e.g. a .lck file, would stop the solver
+        shutil.rmtree(job.run_dir, ignore_errors=True)
+        self.write_input(job.job_name, job.run_dir, job.parameters)
+        job.solver = SolverRun(
+            os.path.join(job.run_dir, job.job_name + ".inp"),
+            num_cpus=self.cpus_per_job,
+            num_domains=self.domains_per_job,
+            memory_percentage=max(1, 90 // self.max_concurrent_jobs),
+            solver_command=self.solver_command,
+            env=self.solver_env(job.parameters) if self.solver_env else None,
+        ).start()
+        job.status = "running"
+        if self.watchdog is not None:
+            job.monitor = self.watchdog.monitor(job.solver.sta_path)
+        if self.ledger is not None:
+            self.ledger.mark_running(job.run_id, job.job_name)
+        print(f"Started {job.job_name} on {self.cpus_per_job} cpus")
+
+    def check(self, job):
+        """
+        Checks a running job against the watchdog limits and terminates it if it crossed one.
+
+        Returns:
+            bool: True if the job was aborted.
+        """
+        if job.monitor is None:
+            return False
+        now = time.time()
+        if now - job.last_check < self.watchdog.check_interval:
+            return False
+        job.last_check = now
+        reason = job.monitor.check(job.solver.wallclock_time)
+        if reason is None:
+            return False
+        job.solver.terminate()
+        self.abort(job, reason)
+        return True
+
+    def abort(self, job, reason):
+        """Marks a terminated job as aborted in the ledger and in the output folder."""
+        job.status = "aborted"
+        job.abort_reason = reason
+        if not os.path.exists(self.output_folder):
+            os.makedirs(self.output_folder)
+        fileName = self.file_name(job)
+        with open(
+            os.path.join(self.output_folder, fileName + "_Aborted.csv"), "w"
+        ) as f:
+            mat_str = ", ".join([f"{k}={v}" for k, v in job.parameters.items()])
+            f.write(f"# Material parameters: {mat_str}\n")
+            f.write(f"# Aborted after {job.wallclock_time:.2f} s: {reason}\n")
+        if os.path.exists(job.solver.sta_path):
+            shutil.copy(
+                job.solver.sta_path, os.path.join(self.output_folder, fileName + ".sta")
+            )
+        if self.ledger is not None:
+            self.ledger.mark_aborted(
+                job.run_id, reason, wallclock_time=job.wallclock_time
+            )
+        print(f"Aborted {job.job_name}: {reason}")
+
+    def solved(self, job, post_process_pool):
+        """Hands a job whose solver has exited to post-processing."""
+        if not job.solver.succeeded:
+            self.fail(job, f"Solver exited with code {job.solver.returncode}")
+            return
+        job.status = "postprocessing"
+        if post_process_pool is None:
+            try:
+                job.output_path = self.post_process(
+                    job.job_name, job.run_dir, job.parameters
+                )
+            except Exception as e:
+                self.fail(job, f"Post-processing failed: {e}")
+                return
+            self.finish(job)
+        else:
+            job.post_process_future = post_process_pool.submit(
+                self.post_process, job.job_name, job.run_dir, job.parameters
+            )
+
+    def finish(self, job):
+        """Archives the files of a post-processed job and marks it as done."""
+        if (
+            self.result_cache is not None
+            and job.output_path
+            and os.path.exists(job.output_path)
+        ):
+            self.result_cache.store(job.parameters, [job.output_path])
+        if (
+            self.dataset is not None
+            and job.output_path
+            and os.path.exists(job.output_path)
+        ):
+            self.dataset.append(job.output_path)
+        self.archive(job)
+        job.status = "done"
+        job.finished_time = time.time()
+        if self.ledger is not None:
+            self.ledger.mark_done(
+                job.run_id,
+                wallclock_time=job.wallclock_time,
+                output_path=job.output_path,
+                returncode=job.solver.returncode,
+            )
+        print(f"Finished {job.job_name} in {job.wallclock_time:.1f} s")
+
+    def fail(self, job, message):
+        job.status = "failed"
+        if self.ledger is not None:
+            self.ledger.mark_failed(
+                job.run_id,
+                message=message,
+                wallclock_time=job.wallclock_time,
+                returncode=job.solver.returncode if job.solver else None,
+            )
+        print(f"{job.job_name} failed: {message}")
+
+    def interrupt(self, job, reason):
+        """Terminates the solver of a job left in flight by a stopped sweep. The ledger keeps it pending."""
+        if job.solver is not None:
+            job.solver.terminate()
+        job.status = "interrupted"
+        if self.ledger is not None:
+            self.ledger.mark_interrupted(
+                job.run_id, reason, wallclock_time=job.wallclock_time
+            )
+        print(f"Interrupted {job.job_name}")
+
+    def archive(self, job):
+        """Moves the .sta and .odb files of a finished job to the output folder."""
+        if not os.path.exists(self.output_folder):
+            os.makedirs(self.output_folder)
+        fileName = self.file_name(job)
+        for src, ext in ((job.solver.sta_path, ".sta"), (job.solver.odb_path, ".odb")):
+            if os.path.exists(src):
+                shutil.move(src, os.path.join(self.output_folder, fileName + ext))
+        if not self.keep_run_dirs:
+            shutil.rmtree(job.run_dir, ignore_errors=True)
+
+    def run(self, parameters):
+        """
+        Runs all parameter sets with at most max_concurrent_jobs solvers in flight.
+        With a ledger, only the parameter sets that are still pending are run.
+
+        Args:
+            parameters (list): List of material parameter dicts, each with an "id" key.
+
+        Returns:
+            list: The SweepJob objects of the runs that were started, in submission order.
+        """
+        if self.ledger is not None:
+            pending_ids = set(
+                self.ledger.pending(
+                    [str(arg["id"]) for arg in parameters],
+                    retry_failed=self.retry_failed,
+                )
+            )
+            n_skipped = len(parameters) - len(pending_ids)
+            parameters = [arg for arg in parameters if str(arg["id"]) in pending_ids]
+            print(f"Sweep {self.sweep_name}: skipping {n_skipped} finished runs")
+
+        if self.predict_wallclock is not None:
+            predictions = [self.predict_wallclock(arg) for arg in parameters]
+            parameters = LongestProcessingTimeOrder(parameters, predictions)
+
+        jobs = [self.make_job(arg) for arg in parameters]
+        pending = list(jobs)
+        running = []
+        postprocessing = []
+        post_process_pool = None
+        if self.post_process_workers > 0:
+            post_process_pool = ThreadPoolExecutor(self.post_process_workers)
+
+        try:
+            while pending or running or postprocessing:
+                while pending and len(running) < self.max_concurrent_jobs:
+                    job = self.next_job(pending, running + postprocessing)
+                    if job is None:
+                        break
+                    if self.fetch_cached(job):
+                        continue
+                    try:
+                        self.start(job)
+                    except Exception as e:
+                        # A run whose deck cannot be written or launched fails alone
+                        self.fail(job, f"Starting the run failed: {e}")
+                        continue
+                    running.append(job)
+
+                aborted = [job for job in running if self.check(job)]
+                for job in aborted:
+                    running.remove(job)
+
+                solved = [job for job in running if job.solver.poll() is not None]
+                for job in solved:
+                    running.remove(job)
+                    self.solved(job, post_process_pool)
+                    if job.post_process_future is not None:
+                        postprocessing.append(job)
+
+                processed = [
+                    job for job in postprocessing if job.post_process_future.done()
+                ]
+                for job in processed:
+                    postprocessing.remove(job)
+                    try:
+                        job.output_path = job.post_process_future.result()
+                    except Exception as e:
+                        self.fail(job, f"Post-processing failed: {e}")
+                        continue
+                    self.finish(job)
+
+                if (running or postprocessing) and not (aborted or solved or processed):
+                    time.sleep(self.poll_interval)
+        except BaseException as e:
+            # Solvers left running would hold their licence tokens after the driver is gone
+            reason = f"Sweep stopped by {type(e).__name__}"
+            for job in jobs:
+                if job.status in ("running", "postprocessing"):
+                    self.interrupt(job, reason)
+            raise
+        finally:
+            if post_process_pool is not None:
+                post_process_pool.shutdown(wait=True)
+
+        n_done = sum(job.status in ("done", "cached") for job in jobs)
+        print(f"Sweep {self.sweep_name}: {n_done} of {len(jobs)} runs finished")
+        self.report_makespan(jobs)
+        return jobs
+
+    def report_makespan(self, jobs):
+        """Compares the time the solvers took from first start to last exit with the ideal makespan."""
+        solved = [job.solver for job in jobs if job.solver and job.solver.end_time]
+        if not solved:
+            return
+        makespan = max(s.end_time for s in solved) - min(s.start_time for s in solved)
+        self.report = MakespanReport(
+            makespan, [s.wallclock_time for s in solved], self.max_concurrent_jobs
+        )
+        print(
+            f"Makespan {self.report['makespan']:.1f} s, ideal {self.report['ideal_makespan']:.1f} s "
+            f"(ratio {self.report['ratio']:.2f}, {100 * self.report['idle_fraction']:.0f}% slot time idle)"
+        )
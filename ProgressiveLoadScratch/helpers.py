@@ -12,11 +12,25 @@ from sketch import *
 from visualization import *
 from connectorBehavior import *
 from odbAccess import *
+import os
 from . import Constants as C
 
 
-def run_job_and_wait(jobName):
-    job = mdb.Job(
+def create_job(jobName, num_cpus=C.num_cpus, num_domains=None):
+    """
+    Creates the explicit analysis job for Model-1.
+
+    Args:
+        jobName (str): Name of the job.
+        num_cpus (int): Number of cpus used by the solver.
+        num_domains (int): Number of domains. Defaults to num_cpus.
+
+    Returns:
+        job: The Abaqus job object.
+    """
+    if num_domains is None:
+        num_domains = num_cpus
+    return mdb.Job(
         activateLoadBalancing=False,
         atTime=None,
         contactPrint=OFF,
@@ -31,8 +45,8 @@ def run_job_and_wait(jobName):
         multiprocessingMode=MPI,
         name=jobName,
         nodalOutputPrecision=SINGLE,
-        numCpus=C.num_cpus,
-        numDomains=C.num_domains,
+        numCpus=num_cpus,
+        numDomains=num_domains,
         parallelizationMethodExplicit=DOMAIN,
         queue=None,
         resultsFormat=ODB,
@@ -42,5 +56,35 @@ def run_job_and_wait(jobName):
         waitHours=0,
         waitMinutes=0,
     )
+
+
+def run_job_and_wait(jobName, num_cpus=C.num_cpus, num_domains=C.num_domains):
+    job = create_job(jobName, num_cpus=num_cpus, num_domains=num_domains)
     job.submit(consistencyChecking=OFF)
     job.waitForCompletion()
+
+
+def write_input_deck(jobName, run_dir, num_cpus=C.num_cpus):
+    """
+    Writes the input deck of the current model to <run_dir>/<jobName>.inp without submitting it.
+    The job object is deleted again so that sweeps do not accumulate jobs in the mdb.
+
+    Args:
+        jobName (str): Name of the job and input deck.
+        run_dir (str): Directory the input deck is written to.
+        num_cpus (int): Number of cpus the job is meant to run on.
+
+    Returns:
+        str: Path to the written input deck.
+    """
+    if not os.path.exists(run_dir):
+        os.makedirs(run_dir)
+    job = create_job(jobName, num_cpus=num_cpus)
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        job.writeInput(consistencyChecking=OFF)
+    finally:
+        os.chdir(cwd)
+        del mdb.jobs[jobName]
+    return os.path.join(run_dir, jobName + ".inp")
@@ -0,0 +1,159 @@
+from abaqus import *
+from abaqusConstants import *
+from ProgressiveLoadScratch.PostProcessing import *
+from ProgressiveLoadScratch.ModelCache import ModelBuildCache
+from ProgressiveLoadScratch.SubstrateMaterial import SubstrateMaterialAssignment
+import os
+from ProgressiveLoadScratch.helpers import run_job_and_wait
+
+# from material_parameters import parameters
+import shutil
+from cleanup import cleanupAbaqusJunk
+import ProgressiveLoadScratch.Constants as C
+from ProgressiveLoadScratch.ResultsFile import results_suffix
+from ProgressiveLoadScratch.StepTime import StepTimeStudy, StepTimeStore
+import json
+
+### ---------------- ###
+# SETTINGS
+### ---------------- ###
+jobName = "ScratchTimeStudy"
+
+# The scratch step time starts at C.scratch_time and is divided by reductionFactor down to
+# minScratchTime. The study stops at the first step time whose RF2/RF3 histories (over the fraction
+# of the step) or final surface change by more than tolerance from C.scratch_time, or whose KE/IE
+# exceeds maxKineticRatio. The shortest step time passing both is stored for the mesh size in
+# runs/step_times.json and picked up by SubmissionFile.py. The unloading step is scaled with it.
+reductionFactor = 2.0
+minScratchTime = C.scratch_time / 32.0
+tolerance = 0.02
+maxKineticRatio = 0.1
+scratchTimes = [C.scratch_time]
+while scratchTimes[-1] / reductionFactor >= minScratchTime:
+    scratchTimes.append(scratchTimes[-1] / reductionFactor)
+
+massScale = 5e5
+
+
+meshSize = [0.030, 0.020, 0.010, 0.006]
+meshSizeIdx = 3
+
+
+# Change abaqus working directory
+rundir = os.path.join("runs", "ScratchTimeStudy")
+if not os.path.exists(rundir):
+    os.makedirs(rundir)
+os.chdir(rundir)
+
+
+rho = 8.0e-09
+E = 200000.0
+nu = 0.3
+A = 700.0
+B = 700.0
+n = 0.5
+# D1 = 1.0
+# D2 = 0.5
+# D3 = -0.25
+# uts = 1000.0
+# kc = 2000
+mu = 0.1
+# kappa = 1e-4
+
+# make to dict
+material_params = {
+    "rho": rho,
+    "E": E,
+    "nu": nu,
+    "A": A,
+    "B": B,
+    "n": n,
+    # "D1": D1,
+    # "D2": D2,
+    # "D3": D3,
+    # "uts": uts,
+    # "kc": kc,
+    "mu": mu,
+    # "kappa": kappa,
+}
+
+include_wear = False
+
+# Built models are saved in runs/ModelCache and reopened when the study is run again
+modelCache = ModelBuildCache(os.path.join("..", "ModelCache"))
+
+
+def run_scratch_time(scratchTime):
+    fileName = "ScratchTime" + str(scratchTime)
+    resultsPath = os.path.join("SimDataOutputs", fileName + results_suffix)
+    if os.path.exists(resultsPath):
+        # Solved by an earlier run of the study
+        return resultsPath
+
+    ScratchModel, SubstratePart = modelCache.ScratchModelSetup(
+        SubstrateSizeY=meshSize[meshSizeIdx],
+        SubstrateSizeX=meshSize[meshSizeIdx],
+        SubstrateSizeZ=meshSize[meshSizeIdx],
+        mass_scale=massScale,
+        use_ALE=True,
+        include_wear=include_wear,
+        scratch_time=scratchTime,
+        unload_time=C.unload_time * scratchTime / C.scratch_time,
+    )
+
+    material = SubstrateMaterialAssignment(
+        ScratchModel,
+        SubstratePart,
+        rho=rho,
+        youngs_modulus=E,
+        poisson_ratio=nu,
+    )
+    material.JohnsonCookHardening(A=A, B=B, n=n)
+    # material.JohnsonCookDamage(d1=D1, d2=D2, d3=D3)
+    # material.DamageEvolution(kc=kc, uts=uts, E=E, nu=nu)
+    # material.DamageEvolution(u_pl_f)
+    material.SectionAssignment()
+    material.UpdateFrictionAndWear(mu)
+
+    run_job_and_wait(jobName)
+    PostProcess(
+        jobName,
+        fileName,
+        material_params,
+        {
+            "mesh_size_x": meshSize[meshSizeIdx],
+            "mesh_size_y": meshSize[meshSizeIdx],
+            "mesh_size_z": meshSize[meshSizeIdx],
+            "mass_scale": massScale,
+            "use_ALE": True,
+            "num_cpus": C.num_cpus,
+            "scratch_time": scratchTime,
+            "unload_time": C.unload_time * scratchTime / C.scratch_time,
+        },
+    )
+
+    # The model stays open, so the next iteration only changes the step times and
+    # replaces the material; its section assignment is kept
+    del mdb.jobs[jobName]
+    sta_file = jobName + ".sta"
+    target_dir = "SimDataOutputs/"
+    new_name = fileName + ".sta"
+    dst_file = os.path.join(target_dir, new_name)
+    shutil.move(sta_file, dst_file)
+
+    odb_file = jobName + ".odb"
+    target_dir = "SimDataOutputs/"
+    new_name = fileName + ".odb"
+    dst_file = os.path.join(target_dir, new_name)
+    shutil.move(odb_file, dst_file)
+    return resultsPath
+
+
+study = StepTimeStudy(scratchTimes, run_scratch_time, tolerance, maxKineticRatio)
+with open("ScratchTimeStudy.json", "w") as f:
+    json.dump(study, f, indent=2)
+StepTimeStore(os.path.join("..", "step_times.json")).update(
+    meshSize[meshSizeIdx], study
+)
+print(f"Selected scratch time: {study['selected']}")
+cleanupAbaqusJunk()
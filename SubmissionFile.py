@@ -1,13 +1,24 @@
 from abaqus import *
 from abaqusConstants import *
 import ProgressiveLoadScratch.Constants as C
-from ProgressiveLoadScratch.PostProcessing import PostProcess
+from ProgressiveLoadScratch.PostProcessWorker import PostProcessInSubprocess
 from ProgressiveLoadScratch.ProgressiveLoadScratchTest import ScratchModelSetup
 from ProgressiveLoadScratch.SubstrateMaterial import SubstrateMaterialAssignment
 import os
+import numpy as np
 from cleanup import cleanupAbaqusJunk
-from ProgressiveLoadScratch.helpers import run_job_and_wait
-import shutil
+from ProgressiveLoadScratch.helpers import write_input_deck
+from ProgressiveLoadScratch.SweepExecutor import SweepExecutor
+from ProgressiveLoadScratch.InputDeckTemplate import InputDeckTemplate
+from ProgressiveLoadScratch.RunLedger import RunLedger
+from ProgressiveLoadScratch.CostModel import ReadResults, WallclockModel
+from ProgressiveLoadScratch.CostEstimate import EstimateRun, OverBudget, format_estimate
+from ProgressiveLoadScratch.DivergenceWatchdog import DivergenceWatchdog
+from ProgressiveLoadScratch.ResultCache import ResultCache
+from ProgressiveLoadScratch.CpuTuning import TuningStore
+from ProgressiveLoadScratch.MassScaling import AutoMassScaling
+from ProgressiveLoadScratch.StepTime import StepTimeStore
+from ProgressiveLoadScratch.SweepDataset import SweepDataset
 
 from material_parameters.halton_discrete_material_parameter_sweep import parameters
 
@@ -21,6 +32,33 @@ jobName = "MaterialSweepNew"
 meshSize = [0.030, 0.020, 0.010, 0.008, 0.006, 0.004, 0.002]
 meshSizeIdx = 4
 
+# Number of jobs solved at the same time. The C.num_cpus cpus are split evenly over the jobs
+max_concurrent_jobs = 1
+cpus_per_job = C.num_cpus // max_concurrent_jobs
+domains_per_job = cpus_per_job
+
+# If CpuScalingStudy.py has been run for the mesh size, use the cpus per job with the highest throughput
+use_cpu_tuning = True
+if use_cpu_tuning:
+    bestWidth = TuningStore().best_job_width(meshSize[meshSizeIdx], C.num_cpus)
+    if bestWidth is not None:
+        max_concurrent_jobs = bestWidth["concurrent_jobs"]
+        cpus_per_job = bestWidth["num_cpus"]
+        domains_per_job = bestWidth["num_domains"]
+
+# Step times of the scratch and unloading steps. If ScratchTimeStudy.py has selected a shorter
+# scratch for the mesh size, that one is used
+scratch_time = C.scratch_time
+unload_time = C.unload_time
+use_step_time_selection = True
+if use_step_time_selection:
+    selectedStepTimes = StepTimeStore().step_times(meshSize[meshSizeIdx])
+    if selectedStepTimes is not None:
+        scratch_time, unload_time = selectedStepTimes
+
+# Number of "abaqus python" processes post-processing finished jobs while the next jobs are solved
+post_process_workers = 2
+
 
 # Change abaqus working directory
 rundir = os.path.join("runs", jobName)
@@ -29,70 +67,168 @@ if not os.path.exists(rundir):
 os.chdir(rundir)
 
 include_wear = False
+# Written to the results header so that runtimes can be related to the model settings
+modelSettings = {
+    "mesh_size_x": meshSize[meshSizeIdx],
+    "mesh_size_y": meshSize[meshSizeIdx],
+    "mesh_size_z": meshSize[meshSizeIdx],
+    "mass_scale": 5e5,
+    "use_ALE": True,
+    "include_wear": include_wear,
+    "num_cpus": cpus_per_job,
+}
+if (scratch_time, unload_time) != (C.scratch_time, C.unload_time):
+    modelSettings["scratch_time"] = scratch_time
+    modelSettings["unload_time"] = unload_time
+
+# If True, every material runs with the largest mass scaling factor that keeps it quasi-static
+# (MassScaling.py) instead of modelSettings["mass_scale"]. The factor is recorded per run.
+auto_mass_scaling = False
+if auto_mass_scaling:
+    parameters = [
+        dict(
+            arg,
+            mass_scale=AutoMassScaling(
+                modelSettings["mesh_size_x"],
+                modelSettings["mesh_size_y"],
+                modelSettings["mesh_size_z"],
+                arg,
+                scratch_time=scratch_time,
+                unload_time=unload_time,
+            )["mass_scale"],
+        )
+        for arg in parameters
+    ]
+
 # Setup scratch model. Only needs to be called once
 ScratchModel, SubstratePart = ScratchModelSetup(
-    SubstrateSizeY=meshSize[meshSizeIdx],
-    SubstrateSizeX=meshSize[meshSizeIdx],
-    SubstrateSizeZ=meshSize[meshSizeIdx],
-    mass_scale=5e5,
-    use_ALE=True,
-    include_wear=include_wear,
+    SubstrateSizeY=modelSettings["mesh_size_y"],
+    SubstrateSizeX=modelSettings["mesh_size_x"],
+    SubstrateSizeZ=modelSettings["mesh_size_z"],
+    mass_scale=modelSettings["mass_scale"],
+    use_ALE=modelSettings["use_ALE"],
+    include_wear=modelSettings["include_wear"],
+    scratch_time=scratch_time,
+    unload_time=unload_time,
 )
 
-# 34
-start_from_sim_id = 7  # Set to desired starting ID to skip completed simulations
-stop_at_id = 100  # Set to desired stopping ID. Runs this ID simulation
+# Runs with a configuration that has been solved before, in this or another sweep, reuse its results
+resultCache = ResultCache(
+    os.path.join("..", "ResultCache"), modelSettings, max_bytes=20 * 1024**3
+)
 
-for arg in parameters:
-    run_id = arg["id"]
-    if int(run_id) < start_from_sim_id:
-        continue
-
-    rho = float(arg["rho"])
-    E = float(arg["E"])
-    nu = float(arg["nu"])
-    A = float(arg["A"])
-    B = float(arg["B"])
-    n = float(arg["n"])
-    mu = float(arg["mu"])
-
-    fileName = "sim" + str(run_id)
-    # fileName = (
-    #     "Hard_contact_default_ALE_sweep1per20_sweep1per200" + "_sim" + str(run_id)
-    # )
-    # fileName = "scale_factor_cssf2.0_issf1.0_ocf2.0" + "_sim" + str(run_id)
-    # fileName = "test" + "_sim" + str(run_id)
-
-    material = SubstrateMaterialAssignment(
-        ScratchModel,
-        SubstratePart,
-        rho=rho,
-        youngs_modulus=E,
-        poisson_ratio=nu,
-    )
+# Jobs whose stable increment collapses, whose mass keeps growing or that would run longer
+# than max_wallclock seconds are terminated and marked as aborted
+watchdog = DivergenceWatchdog(
+    min_increment_ratio=0.01,
+    max_mass_growth=10.0,
+    max_wallclock=12 * 3600.0,
+    total_time=scratch_time + unload_time,
+)
 
-    material.JohnsonCookHardening(A=A, B=B, n=n)
-    material.SectionAssignment()
-    material.UpdateFrictionAndWear(mu)
+# The ledger records the state of every run. Restarting the script skips finished runs
+# and picks up runs that were interrupted. Set retry_failed to also rerun failed runs.
+ledger = RunLedger("RunLedger.sqlite")
+retry_failed = False
+
+# Every finished run is appended to one dataset of the sweep (SweepDataset.py), read with memory maps
+# instead of opening every results file. Runs finished before the dataset existed are added first.
+sweepDataset = SweepDataset("SweepDataset")
+sweepDataset.update("SimDataOutputs")
+
+# Geometry, mesh, steps, contact and outputs are the same for all runs. The model is written to
+# an input deck once, and only the material and friction include files are written per run.
+material = SubstrateMaterialAssignment(
+    ScratchModel,
+    SubstratePart,
+    rho=float(parameters[0]["rho"]),
+    youngs_modulus=float(parameters[0]["E"]),
+    poisson_ratio=float(parameters[0]["nu"]),
+)
+material.JohnsonCookHardening(
+    A=float(parameters[0]["A"]),
+    B=float(parameters[0]["B"]),
+    n=float(parameters[0]["n"]),
+)
+material.SectionAssignment()
+material.UpdateFrictionAndWear(float(parameters[0]["mu"]))
 
-    run_job_and_wait(jobName)
+templateDeck = write_input_deck(jobName, "Template")
+template = InputDeckTemplate.from_input_deck(
+    templateDeck, mass_scaling=auto_mass_scaling
+)
+mdb.close()
 
-    PostProcess(jobName, fileName, arg)
 
-    if int(run_id) == stop_at_id:
-        break
+def post_process(job_name, run_dir, arg):
+    fileName = "sim" + str(arg["id"])
+    # fileName = (
+    #     "Hard_contact_default_ALE_sweep1per20_sweep1per200" + "_sim" + str(arg["id"])
+    # )
+    # fileName = "scale_factor_cssf2.0_issf1.0_ocf2.0" + "_sim" + str(arg["id"])
+    # fileName = "test" + "_sim" + str(arg["id"])
+    return PostProcessInSubprocess(
+        os.path.join(run_dir, job_name),
+        fileName,
+        arg,
+        dict(
+            modelSettings, mass_scale=arg.get("mass_scale", modelSettings["mass_scale"])
+        ),
+    )
 
 
-mdb.close()
-sta_file = jobName + ".sta"
-target_dir = "SimDataOutputs/"
-new_name = fileName + ".sta"
-dst_file = os.path.join(target_dir, new_name)
-shutil.move(sta_file, dst_file)
-
-odb_file = jobName + ".odb"
-target_dir = "SimDataOutputs/"
-new_name = fileName + ".odb"
-dst_file = os.path.join(target_dir, new_name)
-shutil.move(odb_file, dst_file)
+# Runs whose estimated increments or memory exceed the budget are left out of the sweep
+max_increments = 500000
+max_memory = 64 * 1024**3
+runs = []
+for arg in parameters:
+    estimate = EstimateRun(arg, modelSettings)
+    reasons = OverBudget(estimate, max_increments, max_memory)
+    if reasons:
+        print(
+            f"Skipping {arg['id']} ({format_estimate(estimate)}): {'; '.join(reasons)}"
+        )
+    else:
+        runs.append(arg)
+
+# Jobs are submitted longest predicted runtime first. Until enough runs have finished to fit
+# the cost model, the estimated solver work stands in for the runtime. Results of older runs
+# without recorded model settings are left out of the fit, as their mesh and mass scale are unknown.
+previousRuns = ReadResults("SimDataOutputs")
+costModel = None
+if len(previousRuns) >= 20:
+    try:
+        costModel = WallclockModel().fit(previousRuns)
+    except (KeyError, ValueError, np.linalg.LinAlgError) as e:
+        print(
+            f"Cost model not fitted ({type(e).__name__}: {e}), ordering by estimated work"
+        )
+
+
+def predict_wallclock(arg):
+    if costModel is None:
+        return EstimateRun(arg, modelSettings)["element_increments"]
+    return costModel.predict(dict(modelSettings, **arg))
+
+
+executor = SweepExecutor(
+    template.write_run,
+    post_process,
+    sweep_name=jobName,
+    max_concurrent_jobs=max_concurrent_jobs,
+    num_cpus=C.num_cpus,
+    cpus_per_job=cpus_per_job,
+    domains_per_job=domains_per_job,
+    ledger=ledger,
+    retry_failed=retry_failed,
+    post_process_workers=post_process_workers,
+    predict_wallclock=predict_wallclock,
+    watchdog=watchdog,
+    result_cache=resultCache,
+    dataset=sweepDataset,
+)
+executor.run(runs)
+print(f"Ledger: {ledger.summary()}")
+ledger.close()
+
 cleanupAbaqusJunk()
@@ -0,0 +1,117 @@
+"""
+Offline benchmark of the batch re-extraction of archived ODBs, using the stand-in solver and kernel.
+
+A folder of synthetic archived runs, <name>.odb and <name>.sta as SweepExecutor leaves them, is
+written by the stand-in solver, and BatchExtraction.BatchExtract extracts them with pools of
+"abaqus python PostProcessWorker.py --serve" workers on fake_abaqus.py. Every pool size is timed
+with all ODBs extracted, followed by a second pass that finds all results up to date, and
+reported as
+
+    - ODBs per hour and MB/s of ODB extracted,
+    - the time of the up-to-date pass.
+
+FAKE_ODB_OPEN_TIME adds the seconds Abaqus takes to open a large ODB to every open.
+
+Usage:
+    python benchmarks/extraction_benchmark.py --odbs 32 --workers 1 2 4 --open-time 0.5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_root = os.path.dirname(benchmarks_dir)
+sys.path.insert(0, repo_root)
+sys.path.insert(0, benchmarks_dir)
+
+import fake_abaqus  # noqa: E402
+
+from ProgressiveLoadScratch.BatchExtraction import BatchExtract  # noqa: E402
+
+fake_abaqus_command = [sys.executable, os.path.join(benchmarks_dir, "fake_abaqus.py")]
+
+
+def ArchiveRuns(folder, n_odbs, mesh_size):
+    """Writes the .odb and .sta of n_odbs synthetic runs to folder, named as SweepExecutor archives them."""
+    os.makedirs(folder, exist_ok=True)
+    for i in range(n_odbs):
+        job_name = os.path.join(folder, f"sim{i:05d}")
+        fake_abaqus.solve(job_name, 0.0, mesh_size=mesh_size)
+        os.remove(job_name + ".msg")
+
+
+def RunSetting(folder, n_workers):
+    """
+    Extracts all ODBs of the folder with n_workers, then once more with all results up to date.
+
+    Returns:
+        dict: The pool size, ODBs per hour, MB/s and the time of the up-to-date pass.
+    """
+    python_command = fake_abaqus_command + ["python"]
+    report = BatchExtract(
+        [folder], n_workers=n_workers, force=True, worker_command=python_command
+    )
+    rerun = BatchExtract([folder], n_workers=n_workers, worker_command=python_command)
+    return {
+        "workers": n_workers,
+        "extracted": report["extracted"],
+        "failed": report["failed"],
+        "wall_time": report["elapsed"],
+        "odbs_per_hour": report["odbs_per_hour"],
+        "megabytes_per_second": report["megabytes_per_second"],
+        "skipped_on_rerun": rerun["skipped"],
+        "rerun_time": rerun["elapsed"],
+    }
+
+
+def PrintBenchmark(results):
+    print(
+        f"{'workers':>8s} {'extracted':>10s} {'failed':>7s} {'wall [s]':>9s} {'ODBs/hour':>10s} "
+        f"{'MB/s':>7s} {'up to date':>11s} {'rerun [s]':>10s}"
+    )
+    for row in results:
+        print(
+            f"{row['workers']:8d} {row['extracted']:10d} {row['failed']:7d} {row['wall_time']:9.1f} "
+            f"{row['odbs_per_hour']:10.0f} {row['megabytes_per_second']:7.1f} "
+            f"{row['skipped_on_rerun']:11d} {row['rerun_time']:10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--odbs", type=int, default=16, help="Archived ODBs")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--mesh-size", type=float, default=0.02, help="Mesh size of the synthetic ODBs"
+    )
+    parser.add_argument(
+        "--open-time", type=float, default=0.0, help="Seconds to open an ODB"
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the benchmark directory"
+    )
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    os.environ["FAKE_ODB_OPEN_TIME"] = str(args.open_time)
+    workdir = tempfile.mkdtemp(prefix="extraction_benchmark_")
+    try:
+        folder = os.path.join(workdir, "SimDataOutputs")
+        ArchiveRuns(folder, args.odbs, args.mesh_size)
+        results = [RunSetting(folder, n_workers) for n_workers in args.workers]
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    PrintBenchmark(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
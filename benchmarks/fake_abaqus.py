@@ -0,0 +1,272 @@
+"""
+Stand-in for the Abaqus command line, used to exercise the sweep drivers without a licence.
+
+"abaqus job=<name> input=<deck> cpus=<n> ... interactive" sleeps for a prescribed duration while
+writing an explicit-style .sta file, and leaves <name>.sta, <name>.msg and <name>.odb behind.
+The .odb file holds synthetic results in NumPy format: reaction forces and energies of a
+scratch, and the displacement of the contact surface nodes along a groove with pile-up.
+fake_kernel.openOdb reads it through the odbAccess interface.
+
+"python <script> <args>" and "cae noGUI=<script> -- <args>" run the script with this interpreter after
+installing the stand-in kernel modules of fake_kernel.py. ABAQUS_COMMAND is set for the script,
+so drivers started this way launch this stand-in for their solves and post-processing as well.
+
+Behaviour is controlled through environment variables:
+    FAKE_ABAQUS_DURATION: Solve time in seconds (default 1.0).
+    FAKE_ABAQUS_JITTER: Relative spread of the solve time between jobs (default 0.0).
+    FAKE_ABAQUS_EXIT_CODE: Exit code of the solve (default 0).
+    FAKE_ABAQUS_DIVERGE: If set to 1, the stable increment collapses halfway through the solve.
+    FAKE_ABAQUS_MESH_SIZE: Node spacing of the synthetic contact surface (default 0.02).
+
+Usage: set ABAQUS_COMMAND="python /path/to/benchmarks/fake_abaqus.py", or
+Constants.abaqus_command = [sys.executable, os.path.abspath("benchmarks/fake_abaqus.py")]
+"""
+
+import os
+import runpy
+import shlex
+import sys
+import time
+import zlib
+
+import numpy as np
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_root = os.path.dirname(benchmarks_dir)
+sys.path.insert(0, repo_root)
+
+from ProgressiveLoadScratch import Constants as C  # noqa: E402
+
+
+def parse_arguments(argv):
+    options = {}
+    for arg in argv:
+        if "=" in arg:
+            key, value = arg.split("=", 1)
+            options[key.lower()] = value
+        else:
+            options[arg.lower()] = True
+    return options
+
+
+def write_sta_header(f):
+    f.write(" Abaqus/Explicit (stand-in solver)\n")
+    f.write(" STEP 1  ORIGIN 0.0000E+00\n\n")
+    f.write(
+        "              STEP     TOTAL      WALL      STABLE    CRITICAL    KINETIC      TOTAL    PERCENT\n"
+    )
+    f.write(
+        "  INCREMENT     TIME      TIME      TIME   INCREMENT   ELEMENT     ENERGY     ENERGY  CHNG MASS\n"
+    )
+
+
+def write_sta_row(
+    f,
+    increment,
+    step_time,
+    wallclock,
+    stable_increment,
+    kinetic_energy=1e-3,
+    total_energy=1e-5,
+    percent_change_mass=0.0,
+):
+    hours, rest = divmod(int(wallclock), 3600)
+    minutes, seconds = divmod(rest, 60)
+    f.write(
+        f"{increment:11d}  {step_time:.3E} {step_time:.3E}  {hours:02d}:{minutes:02d}:{seconds:02d}"
+        f" {stable_increment:.3E}     1234  {kinetic_energy:.3E}  {total_energy:.3E}  {percent_change_mass:.3E}\n"
+    )
+    f.flush()
+
+
+def DeckScratchTime(deck_path):
+    """Time period of the first explicit step of an input deck, following *INCLUDE files. None if there is none."""
+    folder = os.path.dirname(os.path.abspath(deck_path))
+    with open(deck_path, "r") as f:
+        lines = f.readlines()
+    for i, line in enumerate(lines):
+        keyword = line.strip().lower()
+        if keyword.startswith("*include"):
+            include = os.path.join(folder, line.split("=", 1)[1].strip())
+            scratch_time = DeckScratchTime(include) if os.path.exists(include) else None
+            if scratch_time is not None:
+                return scratch_time
+        elif keyword.startswith("*dynamic, explicit") and i + 1 < len(lines):
+            return float(lines[i + 1].split(",")[1])
+    return None
+
+
+def SyntheticResults(
+    job_name, mesh_size=0.02, n_samples=101, scratch_time=C.scratch_time
+):
+    """
+    Makes up the results of a scratch: a force ramp with noise, dissipated energy and a groove in the contact surface.
+
+    The numbers are seeded by the job name, so a job gives the same results every time. A scratch faster than
+    C.scratch_time adds inertia: kinetic energy growing with the square of the speed and an oscillation of the forces.
+
+    Returns:
+        dict: Arrays time, RF1, RF2, RF3, ALLIE, ALLKE, node_labels, node_coordinates and U.
+    """
+    rng = np.random.default_rng(zlib.crc32(job_name.encode("utf-8")))
+    time_array = np.linspace(0.0, scratch_time, n_samples)
+    load = time_array / scratch_time
+    inertia = (C.scratch_time / scratch_time) ** 2
+    normal_force = 40.0 * load * (1.0 + 0.05 * rng.standard_normal(n_samples))
+    normal_force += 0.08 * (inertia - 1.0) * np.sin(16.0 * np.pi * load)
+    friction = rng.uniform(0.1, 0.5)
+    tangential_force = (
+        friction * normal_force * (1.0 + 0.1 * rng.standard_normal(n_samples))
+    )
+    sliding = load * C.scratch_length
+    internal_energy = np.concatenate(
+        [
+            [0.0],
+            np.cumsum(
+                0.5 * (tangential_force[1:] + tangential_force[:-1]) * np.diff(sliding)
+            ),
+        ]
+    )
+    kinetic_energy = (
+        1e-3 * inertia * internal_energy * (1.0 + 0.5 * np.sin(40.0 * load))
+    )
+
+    # Contact surface of the refined area, with coordinates as in the assembly
+    x = np.arange(C.xs1, C.dpo_x + 0.5 * mesh_size, mesh_size)
+    z = np.arange(C.dpo_z, C.zs2 - C.dpo_z + 0.5 * mesh_size, mesh_size)
+    xx, zz = np.meshgrid(x, z, indexing="ij")
+    coordinates = np.column_stack([xx.ravel(), np.full(xx.size, C.ys2), zz.ravel()])
+    labels = np.arange(1, xx.size + 1)
+
+    depth = -C.scratch_depth * 0.8
+    width = np.sqrt(2.0 * C.tip_radius * depth)
+    along = np.clip((coordinates[:, 2] - C.dpo_z) / C.scratch_length, 0.0, 1.0)
+    groove = -depth * along * np.clip(1.0 - (coordinates[:, 0] / width) ** 2, 0.0, None)
+    pile_up = (
+        0.3
+        * depth
+        * along
+        * np.exp(-(((coordinates[:, 0] - 1.3 * width) / (0.3 * width)) ** 2))
+    )
+    U = np.column_stack(
+        [
+            0.05 * depth * np.exp(-((coordinates[:, 0] / width) ** 2)) * along,
+            groove + pile_up,
+            0.02 * depth * along,
+        ]
+    )
+    U += 1e-5 * rng.standard_normal(U.shape)
+
+    return {
+        "time": time_array,
+        "RF1": 0.01 * rng.standard_normal(n_samples),
+        "RF2": normal_force,
+        "RF3": tangential_force,
+        "ALLIE": internal_energy,
+        "ALLKE": kinetic_energy,
+        "node_labels": labels,
+        "node_coordinates": coordinates,
+        "U": U.astype(np.float32),
+    }
+
+
+def solve(
+    job_name,
+    duration,
+    diverge=False,
+    n_frames=20,
+    step_time_period=C.scratch_time,
+    mesh_size=0.02,
+):
+    start = time.time()
+    results = SyntheticResults(job_name, mesh_size, scratch_time=step_time_period)
+    stable_increment = 1e-7
+    n_samples = len(results["time"])
+    with open(job_name + ".sta", "w") as sta:
+        write_sta_header(sta)
+        for frame in range(n_frames + 1):
+            if diverge and frame > n_frames // 2:
+                stable_increment /= 10.0
+            step_time = step_time_period * frame / n_frames
+            increment = int(round(step_time / stable_increment))
+            sample = min(n_samples - 1, frame * (n_samples - 1) // n_frames)
+            write_sta_row(
+                sta,
+                increment,
+                step_time,
+                time.time() - start,
+                stable_increment,
+                kinetic_energy=results["ALLKE"][sample],
+                total_energy=results["ALLIE"][sample] + results["ALLKE"][sample],
+            )
+            if frame < n_frames:
+                time.sleep(duration / n_frames)
+        sta.write("\n  THE ANALYSIS HAS COMPLETED SUCCESSFULLY\n")
+        sta.write(f"  WALLCLOCK TIME (SEC) = {time.time() - start:.2f}\n")
+
+    with open(job_name + ".msg", "w") as msg:
+        msg.write(" Stand-in solver message file\n")
+    # np.savez would append .npz to a file name
+    with open(job_name + ".odb", "wb") as odb:
+        np.savez(odb, **results)
+
+
+def run_script(script, args):
+    """Runs a kernel or Abaqus Python script with the stand-in kernel modules installed."""
+    import fake_kernel
+
+    os.environ["ABAQUS_COMMAND"] = " ".join(
+        shlex.quote(part) for part in [sys.executable, os.path.abspath(__file__)]
+    )
+    fake_kernel.install()
+    sys.argv = [script] + args
+    sys.path.insert(0, os.getcwd())
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    runpy.run_path(script, run_name="__main__")
+    return 0
+
+
+def main(argv):
+    if argv and argv[0] == "python":
+        # "abaqus python <script> <args>"
+        return run_script(argv[1], argv[2:])
+
+    if argv and argv[0] == "cae":
+        # "abaqus cae noGUI=<script> -- <args>"
+        options = parse_arguments(argv[: argv.index("--")] if "--" in argv else argv)
+        return run_script(
+            options["nogui"], argv[argv.index("--") :] if "--" in argv else []
+        )
+
+    options = parse_arguments(argv)
+    if "terminate" in options:
+        # "abaqus terminate job=<name>": the driver kills the process itself
+        return 0
+
+    job_name = options["job"]
+    duration = float(os.environ.get("FAKE_ABAQUS_DURATION", 1.0))
+    jitter = float(os.environ.get("FAKE_ABAQUS_JITTER", 0.0))
+    if jitter > 0.0:
+        rng = np.random.default_rng(zlib.crc32(job_name.encode("utf-8")))
+        duration *= float(np.exp(jitter * rng.standard_normal()))
+    exit_code = int(os.environ.get("FAKE_ABAQUS_EXIT_CODE", 0))
+    mesh_size = float(os.environ.get("FAKE_ABAQUS_MESH_SIZE", 0.02))
+
+    print(f"Abaqus JOB {job_name} (stand-in solver, cpus={options.get('cpus', 1)})")
+    diverge = os.environ.get("FAKE_ABAQUS_DIVERGE", "0") == "1"
+    scratch_time = None
+    if "input" in options and os.path.exists(options["input"]):
+        scratch_time = DeckScratchTime(options["input"])
+    solve(
+        job_name,
+        duration,
+        diverge,
+        step_time_period=scratch_time or C.scratch_time,
+        mesh_size=mesh_size,
+    )
+    print(f"Abaqus/Explicit exited with {exit_code}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,485 @@
+"""
+Stand-in for the Abaqus/CAE kernel and odbAccess, used to exercise the drivers without a licence.
+
+install() registers modules named abaqus, abaqusConstants, odbAccess, part, material, ... in
+sys.modules, so that scripts written for "abaqus cae noGUI=<script>" and "abaqus python"
+import and run under a plain Python interpreter.
+
+    - mdb records the calls made on it. Its model accepts any attribute, call or index.
+    - mdb.Job(...).writeInput() writes a small deck with the material, friction and mass
+      scaling of the recorded model, in the layout Abaqus/CAE uses, so the deck templating works on it.
+    - mdb.saveAs() and openMdb() store and restore the recorded calls.
+    - mdb.Job(...).submit() runs benchmarks/fake_abaqus.py on that deck.
+    - openOdb() reads the synthetic results written by fake_abaqus.py in place of an .odb file
+      and exposes them through the odbAccess objects PostProcess uses.
+
+Usage: python benchmarks/fake_abaqus.py cae noGUI=<script>, or
+       python benchmarks/fake_abaqus.py python <script> <args>
+"""
+
+import builtins
+import os
+import pickle
+import subprocess
+import sys
+import time
+import types
+
+import numpy as np
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Symbolic constants used by the scripts of the repository
+constant_names = [
+    "ALE",
+    "ALLIE",
+    "ALLKE",
+    "ANALYSIS",
+    "ANALYTIC_RIGID_SURFACE",
+    "AT_BEGINNING",
+    "BELOW_MIN",
+    "C3D10M",
+    "C3D4",
+    "C3D6",
+    "C3D8R",
+    "CARTESIAN",
+    "COORDINATE",
+    "COPLANAR_EDGES",
+    "DAMPING_COEFFICIENT",
+    "DEFAULT",
+    "DEFORMABLE_BODY",
+    "DISCRETE_RIGID_SURFACE",
+    "DISPLACEMENT",
+    "DOMAIN",
+    "ENERGY",
+    "EXCLUDE",
+    "EXPLICIT",
+    "FINER",
+    "FREE",
+    "FRICTIONLESS",
+    "FROM_SECTION",
+    "GEOMETRY_ENHANCED",
+    "GLOBAL",
+    "GRADED",
+    "HARD",
+    "HEX",
+    "JOHNSON_COOK",
+    "LINEAR",
+    "MIDDLE_SURFACE",
+    "MODEL",
+    "MPI",
+    "NODAL",
+    "ODB",
+    "OFF",
+    "ON",
+    "PENALTY",
+    "PERCENTAGE",
+    "REVOLUTION",
+    "RIGHT",
+    "SCALE_FACTOR",
+    "SELF",
+    "SEMI_AUTOMATIC",
+    "SET",
+    "SIDE1",
+    "SINGLE",
+    "SOLVER_DEFAULT",
+    "STANDARD",
+    "STEP",
+    "STRUCTURED",
+    "SWEEP",
+    "TET",
+    "THREE_D",
+    "THROUGHOUT_STEP",
+    "TOTAL",
+    "UNIFORM",
+    "UNKNOWN_HEX",
+    "UNKNOWN_WEDGE",
+    "UNSET",
+    "XYPLANE",
+    "XZPLANE",
+    "YZPLANE",
+]
+
+
+class SymbolicConstant(str):
+    def __repr__(self):
+        return str(self)
+
+
+constants = {name: SymbolicConstant(name) for name in constant_names}
+constants["ON"] = True
+constants["OFF"] = False
+
+
+class Recorder:
+    """Accepts any attribute access, call or index and logs the calls with their arguments."""
+
+    def __init__(self, path, log):
+        self._path = path
+        self._log = log
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Recorder(f"{self._path}.{name}", self._log)
+
+    def __call__(self, *args, **kwargs):
+        self._log.append((self._path, args, kwargs))
+        return Recorder(self._path + "()", self._log)
+
+    def __getitem__(self, key):
+        return Recorder(f"{self._path}[{key!r}]", self._log)
+
+    def __setitem__(self, key, value):
+        self._log.append((f"{self._path}[{key!r}]", (value,), {}))
+
+    def __delitem__(self, key):
+        self._log.append((f"del {self._path}[{key!r}]", (), {}))
+
+    def __iter__(self):
+        return iter(())
+
+    def __contains__(self, item):
+        return False
+
+    def __bool__(self):
+        return True
+
+    def keys(self):
+        return []
+
+    def last_call(self, suffix):
+        """Returns the keyword arguments of the last logged call whose path ends with suffix."""
+        for path, _, kwargs in reversed(self._log):
+            if path.endswith(suffix):
+                return kwargs
+        return None
+
+    def last_value(self, suffix, key, default=None):
+        """Returns the value of keyword key in the last logged call whose path ends with suffix and that sets it."""
+        for path, _, kwargs in reversed(self._log):
+            if path.endswith(suffix) and key in kwargs:
+                return kwargs[key]
+        return default
+
+
+def format_table(table):
+    return "".join(" " + ", ".join(f"{v:g}" for v in row) + "\n" for row in table)
+
+
+def DeckText(job_name, model):
+    """Writes the parts of an input deck the sweep drivers rely on, from the calls recorded on model."""
+    density = model.last_call(".Density") or {"table": ((7.85e-09,),)}
+    elastic = model.last_call(".Elastic") or {"table": ((200000.0, 0.3),)}
+    plastic = model.last_call(".Plastic")
+    friction = (
+        model.last_call("tangentialBehavior.setValues")
+        or model.last_call(".TangentialBehavior")
+        or {"table": ((0.0,),)}
+    )
+
+    lines = [
+        "*Heading\n",
+        f"** Job name: {job_name} Model name: Model-1\n",
+        "** Generated by: stand-in Abaqus/CAE kernel\n",
+        "*Preprint, echo=NO, model=NO, history=NO, contact=NO\n",
+        "**\n",
+        "** MATERIALS\n",
+        "**\n",
+        "*Material, name=SubstrateMaterial\n",
+        "*Density\n",
+        format_table(density["table"]),
+        "*Elastic\n",
+        format_table(elastic["table"]),
+    ]
+    if plastic:
+        lines += ["*Plastic, hardening=JOHNSON COOK\n", format_table(plastic["table"])]
+    lines += [
+        "**\n",
+        "** INTERACTION PROPERTIES\n",
+        "**\n",
+        "*Surface Interaction, name=IntProp-1\n",
+        "*Friction, slip tolerance=0.005\n",
+        format_table(friction["table"]),
+        "*Surface Behavior, pressure-overclosure=HARD\n",
+        "**\n",
+    ]
+    for step in [
+        kwargs
+        for path, _, kwargs in model._log
+        if path.endswith(".ExplicitDynamicsStep")
+    ]:
+        patched = f"steps[{step.get('name')!r}].setValues"
+        time_period = model.last_value(
+            patched, "timePeriod", step.get("timePeriod", 0.0)
+        )
+        lines += [
+            f"** STEP: {step.get('name')}\n",
+            "**\n",
+            f"*Step, name={step.get('name')}, nlgeom=YES\n",
+            "*Dynamic, Explicit, improved dt method=YES\n",
+            f", {time_period:g}\n",
+        ]
+        mass_scaling = model.last_value(patched, "massScaling", step.get("massScaling"))
+        if mass_scaling:
+            settings = mass_scaling[0]
+            if settings[4]:
+                lines.append(
+                    f"*Variable Mass Scaling, dt={settings[4]:g}, type=below min, number interval=10\n"
+                )
+            else:
+                lines.append(f"*Fixed Mass Scaling, factor={settings[3]:g}\n")
+        lines.append("*End Step\n")
+    return "".join(lines)
+
+
+class FakeJob:
+    def __init__(self, mdb, **kwargs):
+        self.mdb = mdb
+        self.name = kwargs["name"]
+        self.num_cpus = kwargs.get("numCpus", 1)
+        self.process = None
+
+    def writeInput(self, consistencyChecking=None):
+        with open(self.name + ".inp", "w") as f:
+            f.write(DeckText(self.name, self.mdb.models["Model-1"]))
+
+    def submit(self, consistencyChecking=None):
+        self.writeInput()
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(benchmarks_dir, "fake_abaqus.py"),
+                "job=" + self.name,
+                "input=" + self.name + ".inp",
+                f"cpus={self.num_cpus}",
+                "interactive",
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+
+    def waitForCompletion(self):
+        if self.process is not None:
+            self.process.wait()
+
+
+class FakeMdb:
+    """Model database whose single model records all calls made on it."""
+
+    def __init__(self):
+        self.close()
+
+    def close(self):
+        self.log = []
+        self.models = {"Model-1": Recorder("mdb.models['Model-1']", self.log)}
+        self.jobs = {}
+        self.pathName = ""
+
+    def saveAs(self, pathName):
+        with open(pathName, "wb") as f:
+            pickle.dump(self.log, f)
+        self.pathName = pathName
+
+    def open(self, pathName):
+        # Opened in place, so every reference to mdb sees the opened model
+        self.close()
+        with open(pathName, "rb") as f:
+            self.log.extend(pickle.load(f))
+        self.pathName = pathName
+
+    def Job(self, **kwargs):
+        job = FakeJob(self, **kwargs)
+        self.jobs[job.name] = job
+        return job
+
+
+#### ------------------------------ ####
+#   odbAccess on synthetic results
+#### ------------------------------ ####
+
+
+class Repository(dict):
+    """Abaqus repositories return lists from keys() and values()."""
+
+    def keys(self):
+        return list(dict.keys(self))
+
+    def values(self):
+        return list(dict.values(self))
+
+
+class AnyKey(dict):
+    """Repository holding one entry that is returned for any key, e.g. the contact surface."""
+
+    def __init__(self, value):
+        dict.__init__(self)
+        self.value = value
+
+    def __getitem__(self, key):
+        return self.value
+
+
+class OdbNode:
+    def __init__(self, label, coordinates):
+        self.label = label
+        self.coordinates = coordinates
+
+
+class FieldValue:
+    def __init__(self, nodeLabel, data):
+        self.nodeLabel = nodeLabel
+        self.data = data
+
+
+class FieldBulkData:
+    def __init__(self, nodeLabels, data, instance=None):
+        self.nodeLabels = nodeLabels
+        self.data = data
+        self.instance = instance
+
+
+class FieldOutput:
+    def __init__(self, labels, data, n_blocks=2):
+        self.labels = labels
+        self.data = data
+        self.n_blocks = n_blocks
+
+    @property
+    def bulkDataBlocks(self):
+        """Blocks of labels and float32 values, split like the blocks of several domains of an .odb."""
+        return [
+            FieldBulkData(labels, data.astype(np.float32))
+            for labels, data in zip(
+                np.array_split(self.labels, self.n_blocks),
+                np.array_split(self.data, self.n_blocks),
+            )
+        ]
+
+    @property
+    def values(self):
+        return [
+            FieldValue(int(label), tuple(float(v) for v in row))
+            for label, row in zip(self.labels, self.data)
+        ]
+
+    def getSubset(self, region=None):
+        return self
+
+
+class HistoryOutput:
+    def __init__(self, time, values):
+        self.data = tuple(zip(time.tolist(), values.tolist()))
+
+
+def OdbFromArrays(arrays):
+    """Builds the odbAccess object graph PostProcess walks from the arrays of a synthetic result file."""
+    labels = arrays["node_labels"]
+    coordinates = arrays["node_coordinates"]
+    nodes = [
+        OdbNode(int(label), tuple(float(v) for v in xyz))
+        for label, xyz in zip(labels, coordinates)
+    ]
+    surface = types.SimpleNamespace(nodes=[nodes])
+    rootAssembly = types.SimpleNamespace(
+        surfaces=AnyKey(surface),
+        nodeSets=AnyKey(types.SimpleNamespace(nodes=[nodes])),
+    )
+
+    time = arrays["time"]
+    indenter = types.SimpleNamespace(
+        historyOutputs=Repository(
+            (key, HistoryOutput(time, arrays[key])) for key in ("RF1", "RF2", "RF3")
+        )
+    )
+    substrate = types.SimpleNamespace(
+        historyOutputs=Repository(
+            (key, HistoryOutput(time, arrays[key])) for key in ("ALLIE", "ALLKE")
+        )
+    )
+    scratch_step = types.SimpleNamespace(
+        historyRegions=Repository(
+            [
+                ("Node ROCKWELLINDENTERINST.1", indenter),
+                ("ElementSet SUBSTRATEINST.SUBSTRATESET", substrate),
+            ]
+        ),
+        frames=[
+            types.SimpleNamespace(
+                fieldOutputs={"COORD": FieldOutput(labels, coordinates)}
+            )
+        ],
+    )
+    last_frame = types.SimpleNamespace(
+        fieldOutputs={"U": FieldOutput(labels, arrays["U"])}
+    )
+    unloading_step = types.SimpleNamespace(
+        historyRegions=Repository(), frames=[last_frame]
+    )
+    return types.SimpleNamespace(
+        rootAssembly=rootAssembly,
+        steps=Repository(
+            [
+                ("ProgressiveScratchStep", scratch_step),
+                ("UnloadingStep", unloading_step),
+            ]
+        ),
+        close=lambda: None,
+    )
+
+
+def openOdb(path, readOnly=True):
+    # Seconds spent opening, standing in for the time Abaqus takes to open a large .odb
+    time.sleep(float(os.environ.get("FAKE_ODB_OPEN_TIME", 0.0)))
+    with open(path, "rb") as f:
+        arrays = dict(np.load(f))
+    return OdbFromArrays(arrays)
+
+
+def ElemType(**kwargs):
+    return kwargs
+
+
+def install():
+    """Registers the stand-in kernel modules in sys.modules. Returns the mdb."""
+    mdb = FakeMdb()
+    session = Recorder("session", [])
+
+    abaqusConstants = types.ModuleType("abaqusConstants")
+    vars(abaqusConstants).update(constants)
+    sys.modules["abaqusConstants"] = abaqusConstants
+
+    abaqus = types.ModuleType("abaqus")
+    vars(abaqus).update(constants)
+    vars(abaqus).update(
+        mdb=mdb, session=session, openMdb=lambda pathName: mdb.open(pathName) or mdb
+    )
+    sys.modules["abaqus"] = abaqus
+    # Inside Abaqus/CAE, mdb and session are available without an import
+    builtins.mdb = mdb
+    builtins.session = session
+
+    odbAccess = types.ModuleType("odbAccess")
+    vars(odbAccess).update(constants)
+    odbAccess.openOdb = openOdb
+    sys.modules["odbAccess"] = odbAccess
+
+    for name in (
+        "part",
+        "material",
+        "section",
+        "assembly",
+        "step",
+        "interaction",
+        "load",
+        "mesh",
+        "optimization",
+        "job",
+        "sketch",
+        "visualization",
+        "connectorBehavior",
+    ):
+        module = types.ModuleType(name)
+        vars(module).update(constants)
+        module.ElemType = ElemType
+        sys.modules[name] = module
+    return mdb
@@ -0,0 +1,241 @@
+"""
+Offline benchmark of the sweep orchestration, using the stand-in Abaqus solver and kernel.
+
+The model is built and templated through the stand-in kernel exactly as SubmissionFile.py does
+it, and a sweep of synthetic material parameters is run by SweepExecutor on fake_abaqus.py, with
+post-processing of the synthetic ODBs in "abaqus python" worker processes. Every combination
+of concurrent jobs and post-processing workers is timed in a fresh directory, and reported as
+
+    - jobs per hour,
+    - idle-core share: cpu time not spent in a solver, out of wall time times the cpu budget,
+    - driver overhead: wall time beyond the ideal makespan of the solves that were run,
+    - post-processing latency: time from a solver exit until the run is archived.
+
+Usage:
+    python benchmarks/orchestration_benchmark.py --runs 24 --duration 1.0 --jitter 0.5 --concurrency 1 2 4 --post-process-workers 0 2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_root = os.path.dirname(benchmarks_dir)
+sys.path.insert(0, repo_root)
+sys.path.insert(0, benchmarks_dir)
+
+import fake_kernel  # noqa: E402
+
+mdb = fake_kernel.install()
+
+from ProgressiveLoadScratch import Constants as C  # noqa: E402
+from ProgressiveLoadScratch.helpers import write_input_deck  # noqa: E402
+from ProgressiveLoadScratch.InputDeckTemplate import InputDeckTemplate  # noqa: E402
+from ProgressiveLoadScratch.PostProcessWorker import (  # noqa: E402
+    PostProcessInSubprocess,
+)
+from ProgressiveLoadScratch.ProgressiveLoadScratchTest import (  # noqa: E402
+    ScratchModelSetup,
+)
+from ProgressiveLoadScratch.SubstrateMaterial import (  # noqa: E402
+    SubstrateMaterialAssignment,
+)
+from ProgressiveLoadScratch.SweepExecutor import SweepExecutor  # noqa: E402
+
+fake_abaqus_command = [sys.executable, os.path.join(benchmarks_dir, "fake_abaqus.py")]
+
+
+def SyntheticParameters(n_runs, seed=0):
+    """Material parameter sets in the ranges of material_parameter_generator.py."""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "id": f"{i:05d}",
+            "rho": 7.85e-09,
+            "E": float(rng.uniform(70e3, 300e3)),
+            "nu": 0.3,
+            "A": float(rng.uniform(100, 1500)),
+            "B": float(rng.uniform(100, 1700)),
+            "n": float(rng.uniform(0.1, 0.8)),
+            "mu": float(rng.uniform(0.0, 0.2)),
+        }
+        for i in range(n_runs)
+    ]
+
+
+def BuildTemplate(parameters, modelSettings):
+    """Builds the model in the stand-in kernel and writes the template deck, as SubmissionFile.py does."""
+    ScratchModel, SubstratePart = ScratchModelSetup(
+        SubstrateSizeY=modelSettings["mesh_size_y"],
+        SubstrateSizeX=modelSettings["mesh_size_x"],
+        SubstrateSizeZ=modelSettings["mesh_size_z"],
+        mass_scale=modelSettings["mass_scale"],
+        use_ALE=modelSettings["use_ALE"],
+        include_wear=False,
+    )
+    material = SubstrateMaterialAssignment(
+        ScratchModel,
+        SubstratePart,
+        rho=parameters["rho"],
+        youngs_modulus=parameters["E"],
+        poisson_ratio=parameters["nu"],
+    )
+    material.JohnsonCookHardening(
+        A=parameters["A"], B=parameters["B"], n=parameters["n"]
+    )
+    material.SectionAssignment()
+    material.UpdateFrictionAndWear(parameters["mu"])
+    template = InputDeckTemplate.from_input_deck(
+        write_input_deck("Benchmark", "Template")
+    )
+    mdb.close()
+    return template
+
+
+def RunSetting(
+    parameters,
+    max_concurrent_jobs,
+    post_process_workers,
+    num_cpus,
+    duration,
+    jitter,
+    poll_interval,
+):
+    """
+    Runs one sweep in the current directory and measures it.
+
+    Returns:
+        dict: The setting and its jobs per hour, idle-core share, driver overhead and post-processing latencies.
+    """
+    modelSettings = {
+        "mesh_size_x": 0.02,
+        "mesh_size_y": 0.02,
+        "mesh_size_z": 0.02,
+        "mass_scale": 5e5,
+        "use_ALE": True,
+        "num_cpus": num_cpus // max_concurrent_jobs,
+    }
+
+    start = time.time()
+    template = BuildTemplate(parameters[0], modelSettings)
+    build_time = time.time() - start
+
+    def post_process(job_name, run_dir, arg):
+        return PostProcessInSubprocess(
+            os.path.join(run_dir, job_name),
+            "sim" + str(arg["id"]),
+            arg,
+            modelSettings,
+            python_command=fake_abaqus_command + ["python"],
+        )
+
+    executor = SweepExecutor(
+        template.write_run,
+        post_process,
+        sweep_name="Benchmark",
+        max_concurrent_jobs=max_concurrent_jobs,
+        num_cpus=num_cpus,
+        solver_command=fake_abaqus_command,
+        poll_interval=poll_interval,
+        post_process_workers=post_process_workers,
+        solver_env=lambda arg: {
+            "FAKE_ABAQUS_DURATION": duration,
+            "FAKE_ABAQUS_JITTER": jitter,
+        },
+    )
+    jobs = executor.run(parameters)
+    wall_time = time.time() - start
+
+    done = [job for job in jobs if job.status == "done"]
+    solve_times = [job.wallclock_time for job in done]
+    latencies = [job.post_process_latency for job in done]
+    busy_cpu_time = sum(solve_times) * executor.cpus_per_job
+    ideal = executor.report["ideal_makespan"] if executor.report else 0.0
+    return {
+        "concurrent_jobs": max_concurrent_jobs,
+        "post_process_workers": post_process_workers,
+        "runs_done": len(done),
+        "wall_time": wall_time,
+        "build_time": build_time,
+        "jobs_per_hour": 3600.0 * len(done) / wall_time,
+        "idle_core_fraction": 1.0 - busy_cpu_time / (wall_time * num_cpus),
+        "driver_overhead": wall_time - ideal,
+        "makespan_ratio": executor.report["ratio"] if executor.report else None,
+        "post_process_latency_mean": float(np.mean(latencies)) if latencies else None,
+        "post_process_latency_max": float(np.max(latencies)) if latencies else None,
+    }
+
+
+def PrintBenchmark(results):
+    print(
+        f"{'jobs':>5s} {'pp workers':>11s} {'done':>5s} {'wall [s]':>9s} {'jobs/hour':>10s} "
+        f"{'idle cores':>11s} {'overhead [s]':>13s} {'pp latency mean/max [s]':>24s}"
+    )
+    for row in results:
+        print(
+            f"{row['concurrent_jobs']:5d} {row['post_process_workers']:11d} {row['runs_done']:5d} "
+            f"{row['wall_time']:9.1f} {row['jobs_per_hour']:10.0f} {100 * row['idle_core_fraction']:10.0f}% "
+            f"{row['driver_overhead']:13.1f} "
+            f"{row['post_process_latency_mean']:15.2f} / {row['post_process_latency_max']:5.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=16, help="Runs per sweep")
+    parser.add_argument(
+        "--duration", type=float, default=1.0, help="Median solve time in seconds"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.5, help="Log-normal spread of the solve times"
+    )
+    parser.add_argument(
+        "--cpus", type=int, default=C.num_cpus, help="Cpu budget of the sweep"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--post-process-workers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the benchmark directories"
+    )
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    parameters = SyntheticParameters(args.runs)
+    cwd = os.getcwd()
+    results = []
+    for max_concurrent_jobs in args.concurrency:
+        for post_process_workers in args.post_process_workers:
+            workdir = tempfile.mkdtemp(prefix="sweep_benchmark_")
+            os.chdir(workdir)
+            try:
+                results.append(
+                    RunSetting(
+                        parameters,
+                        max_concurrent_jobs,
+                        post_process_workers,
+                        args.cpus,
+                        args.duration,
+                        args.jitter,
+                        args.poll_interval,
+                    )
+                )
+            finally:
+                os.chdir(cwd)
+                if not args.keep:
+                    shutil.rmtree(workdir, ignore_errors=True)
+
+    PrintBenchmark(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
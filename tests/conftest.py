@@ -0,0 +1,43 @@
+"""
+Shared set-up of the tests: the repository and the stand-in Abaqus of benchmarks/ on the path.
+
+The tests run under a plain Python interpreter. Solves, CAE kernels and ODB reads go through
+benchmarks/fake_abaqus.py and benchmarks/fake_kernel.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_root = os.path.dirname(tests_dir)
+benchmarks_dir = os.path.join(repo_root, "benchmarks")
+for path in (repo_root, benchmarks_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def WriteTrivialInput(job_name, run_dir, parameters):
+    os.makedirs(run_dir, exist_ok=True)
+    with open(os.path.join(run_dir, job_name + ".inp"), "w") as f:
+        f.write("*Heading\n")
+
+
+@pytest.fixture
+def write_input():
+    """A write_input callback of SweepExecutor writing a trivial deck for the stand-in solver."""
+    return WriteTrivialInput
+
+
+@pytest.fixture
+def fake_abaqus_command():
+    """Command line of the stand-in Abaqus, used like C.abaqus_command."""
+    return [sys.executable, os.path.join(benchmarks_dir, "fake_abaqus.py")]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A fresh working directory for the test."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,141 @@
+"""
+Tests of the batch re-extraction of archived ODBs with PostProcessWorker.py on the stand-in reader.
+"""
+
+import os
+
+import fake_abaqus
+import pytest
+
+from ProgressiveLoadScratch.BatchExtraction import BatchExtract, OdbFiles, UpToDate
+from ProgressiveLoadScratch.PostProcessWorker import PostProcessInSubprocess
+from ProgressiveLoadScratch.ResultsFile import ReadAttributes, results_suffix
+
+n_odbs = 3
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """A folder of archived runs as SweepExecutor leaves them: sim<id>.odb and sim<id>.sta."""
+    folder = tmp_path / "SimDataOutputs"
+    folder.mkdir()
+    for i in range(n_odbs):
+        fake_abaqus.solve(str(folder / f"sim{i:05d}"), 0.0)
+        os.remove(folder / f"sim{i:05d}.msg")
+    return folder
+
+
+@pytest.fixture
+def extract(archive, fake_abaqus_command):
+    def extract(**kwargs):
+        return BatchExtract(
+            [str(archive)],
+            n_workers=2,
+            worker_command=fake_abaqus_command + ["python"],
+            timeout=300,
+            **kwargs,
+        )
+
+    return extract
+
+
+def results_path(archive, i):
+    return str(archive / f"sim{i:05d}{results_suffix}")
+
+
+def test_odb_files(archive):
+    odbs = OdbFiles([str(archive), str(archive / "sim0000[01].odb")])
+    assert odbs == [str(archive / f"sim{i:05d}.odb") for i in range(n_odbs)]
+
+
+def test_up_to_date_without_results(archive):
+    assert not UpToDate(str(archive / "sim00000.odb"), results_path(archive, 0))
+
+
+def test_extract_then_skip(archive, extract):
+    report = extract()
+    assert report["odbs"] == report["extracted"] == n_odbs
+    assert report["skipped"] == report["failed"] == 0
+    for i in range(n_odbs):
+        odb = str(archive / f"sim{i:05d}.odb")
+        assert UpToDate(odb, results_path(archive, i))
+        assert not UpToDate(odb, results_path(archive, i), fingerprint="older code")
+
+    report = extract()
+    assert (report["extracted"], report["skipped"]) == (0, n_odbs)
+    assert report["requests"] == [] and report["results"] == []
+
+
+def test_modified_odb_is_extracted_again(archive, extract):
+    extract()
+    odb = str(archive / "sim00001.odb")
+    stat = os.stat(odb)
+    os.utime(odb, (stat.st_atime, stat.st_mtime + 10.0))
+    assert not UpToDate(odb, results_path(archive, 1))
+
+    report = extract()
+    assert (report["extracted"], report["skipped"]) == (1, n_odbs - 1)
+    assert report["requests"][0]["job"] == odb[: -len(".odb")]
+
+
+def test_hash_ignores_the_modification_time(archive, extract):
+    extract(use_hash=True)
+    odb = str(archive / "sim00001.odb")
+    stat = os.stat(odb)
+    os.utime(odb, (stat.st_atime, stat.st_mtime + 10.0))
+    assert UpToDate(odb, results_path(archive, 1), use_hash=True)
+
+    report = extract(use_hash=True)
+    assert (report["extracted"], report["skipped"]) == (0, n_odbs)
+
+    with open(odb, "ab") as f:
+        f.write(b"\0")
+    assert not UpToDate(odb, results_path(archive, 1), use_hash=True)
+
+
+def test_force_extracts_all(archive, extract):
+    extract()
+    report = extract(force=True)
+    assert (report["extracted"], report["skipped"]) == (n_odbs, 0)
+
+
+def test_failed_extraction_is_reported(archive, extract):
+    with open(archive / "sim00001.odb", "wb") as f:
+        f.write(b"not an odb")
+
+    report = extract()
+
+    assert (report["extracted"], report["failed"]) == (n_odbs - 1, 1)
+    statuses = {
+        request["file_name"]: result["status"]
+        for request, result in zip(report["requests"], report["results"])
+    }
+    assert statuses == {"sim00000": "ok", "sim00001": "error", "sim00002": "ok"}
+    assert not os.path.exists(results_path(archive, 1))
+    assert [result["error"] for result in report["results"] if "error" in result]
+
+
+def test_extract_to_another_folder_keeps_the_run_attributes(
+    archive, workdir, extract, fake_abaqus_command
+):
+    material = {"id": "00000", "E": 210000.0, "A": 800.0}
+    model_settings = {"mesh_size_x": 0.02, "mass_scale": 5e5}
+    # The results of the sweep, next to the archived ODB
+    PostProcessInSubprocess(
+        str(archive / "sim00000"),
+        "sim00000",
+        material,
+        model_settings,
+        python_command=fake_abaqus_command + ["python"],
+    )
+    output_folder = workdir / "Reextracted"
+
+    report = extract(output_folder=str(output_folder))
+
+    assert (report["extracted"], report["failed"]) == (n_odbs, 0)
+    attributes = ReadAttributes(str(output_folder / ("sim00000" + results_suffix)))
+    assert attributes["material"] == material
+    assert attributes["model_settings"] == model_settings
+    assert attributes["source"]["odb"] == str(archive / "sim00000.odb")
+    other = ReadAttributes(str(output_folder / ("sim00001" + results_suffix)))
+    assert other["material"] == {}
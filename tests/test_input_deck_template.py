@@ -0,0 +1,196 @@
+"""
+Tests of the material-only templating of the input deck.
+"""
+
+import os
+
+import pytest
+
+from ProgressiveLoadScratch.InputDeckTemplate import (
+    FrictionInclude,
+    InputDeckTemplate,
+    MakeTemplate,
+    MassScalingInclude,
+    MaterialInclude,
+    friction_include_name,
+    mass_scaling_include_name,
+    material_include_name,
+)
+
+# The sections of a deck as Abaqus/CAE writes them
+deck = """*Heading
+** Job name: Template Model name: Model-1
+*Node
+      1,           0.,           0.,           0.
+**
+** MATERIALS
+**
+*Material, name=IndenterMaterial
+*Density
+ 3.5e-09,
+*Elastic
+ 1.05e+06, 0.07
+*Material, name=SubstrateMaterial
+*Density
+ 7.85e-09,
+*Elastic
+ 200000., 0.3
+*Plastic, hardening=JOHNSON COOK
+ 700., 700., 0.5, 0., 0., 0.
+**
+** INTERACTION PROPERTIES
+**
+*Surface Interaction, name=IntProp-0
+*Friction
+ 0.5,
+*Surface Interaction, name=IntProp-1
+*Friction, slip tolerance=0.005
+ 0.1,
+**
+** STEP: Scratch
+**
+*Step, name=Scratch, nlgeom=YES
+*Dynamic, Explicit
+, 1.
+*Bulk Viscosity
+ 0.06, 1.2
+*Fixed Mass Scaling, factor=500000.
+**
+*End Step
+"""
+
+parameters = {
+    "id": "00007",
+    "rho": 8e-09,
+    "E": 210000.0,
+    "nu": 0.29,
+    "A": 800.0,
+    "B": 600.0,
+    "n": 0.4,
+    "mu": 0.15,
+}
+
+
+def DataLines(text, keyword):
+    """Data lines following a keyword line, up to the next keyword or comment."""
+    lines = text.splitlines()
+    start = lines.index(keyword) + 1
+    data = []
+    for line in lines[start:]:
+        if line.startswith("*"):
+            break
+        data.append(line)
+    return data
+
+
+def test_material_and_friction_are_included():
+    template = MakeTemplate(deck)
+
+    assert DataLines(template, "*Material, name=SubstrateMaterial") == []
+    assert "*INCLUDE, INPUT=" + material_include_name in template
+    assert "*Plastic, hardening=JOHNSON COOK" not in template
+    assert DataLines(template, "*Friction, slip tolerance=0.005") == []
+    assert "*INCLUDE, INPUT=" + friction_include_name in template
+    # Other materials, interactions and the mass scaling are untouched
+    assert "*Material, name=IndenterMaterial\n*Density\n 3.5e-09,\n" in template
+    assert DataLines(template, "*Friction") == [" 0.5,"]
+    assert "*Fixed Mass Scaling, factor=500000." in template
+    assert mass_scaling_include_name not in template
+
+
+def test_mass_scaling_is_included():
+    template = MakeTemplate(deck, mass_scaling=True)
+
+    assert "*Fixed Mass Scaling" not in template
+    lines = template.splitlines()
+    include = lines.index("*INCLUDE, INPUT=" + mass_scaling_include_name)
+    assert lines[include - 1] == " 0.06, 1.2"
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"material_name": "Aluminium"}, "Material 'Aluminium' not found"),
+        ({"interaction_name": "IntProp-2"}, "*Friction of 'IntProp-2' not found"),
+    ],
+)
+def test_missing_block(kwargs, message):
+    with pytest.raises(ValueError, match=message.replace("*", r"\*")):
+        MakeTemplate(deck, **kwargs)
+
+
+def test_missing_mass_scaling():
+    without = deck.replace("*Fixed Mass Scaling, factor=500000.\n", "")
+    MakeTemplate(without)
+    with pytest.raises(ValueError, match="No mass scaling"):
+        MakeTemplate(without, mass_scaling=True)
+
+
+def test_material_include():
+    assert MaterialInclude(parameters) == (
+        "*Density\n 8e-09\n"
+        "*Elastic\n 210000, 0.29\n"
+        "*Plastic, hardening=JOHNSON COOK\n 800, 600, 0.4, 0, 0, 0\n"
+    )
+
+
+def test_material_include_with_damage():
+    text = MaterialInclude(dict(parameters, D1=0.1, D2=0.2, D3=-0.3, kc=50.0))
+    lines = text.splitlines()
+    assert lines[6:] == [
+        "*Damage Initiation, criterion=JOHNSON COOK",
+        " 0.1, 0.2, -0.3, 0, 0, 0, 0, 0",
+        "*Damage Evolution, type=ENERGY, softening=LINEAR",
+        f" {50.0**2 / (210000.0 / (1 - 0.29**2)):.10g}",
+    ]
+
+
+def test_friction_include():
+    assert FrictionInclude(0.15) == " 0.15\n"
+
+
+def test_mass_scaling_include():
+    assert MassScalingInclude(5e5) == "*Fixed Mass Scaling, factor=500000\n"
+    assert MassScalingInclude(5e5, 2.5e-7) == (
+        "*Variable Mass Scaling, dt=2.5e-07, type=below min, number interval=10\n"
+    )
+
+
+def test_write_run(tmp_path):
+    deck_path = tmp_path / "Template.inp"
+    deck_path.write_text(deck)
+    template = InputDeckTemplate.from_input_deck(str(deck_path))
+    assert template.template_path == str(tmp_path / "Template_Template.inp")
+
+    run_dir = tmp_path / "Sweep_00007"
+    job_deck = template.write_run("Sweep_00007", str(run_dir), parameters)
+
+    assert job_deck == str(run_dir / "Sweep_00007.inp")
+    lines = (run_dir / "Sweep_00007.inp").read_text().splitlines()
+    assert lines == [
+        "** Job Sweep_00007, id 00007",
+        "*INCLUDE, INPUT=" + template.template_path,
+    ]
+    assert (run_dir / material_include_name).read_text() == MaterialInclude(parameters)
+    assert (run_dir / friction_include_name).read_text() == FrictionInclude(0.15)
+    assert not os.path.exists(run_dir / mass_scaling_include_name)
+
+
+def test_write_run_with_mass_scaling(tmp_path):
+    deck_path = tmp_path / "Template.inp"
+    deck_path.write_text(deck)
+    template = InputDeckTemplate.from_input_deck(
+        str(deck_path), str(tmp_path / "Scaled.inp"), mass_scaling=True
+    )
+
+    run_dir = tmp_path / "run"
+    template.write_run(
+        "Job", str(run_dir), dict(parameters, mass_scale=1e6, target_time_increment=0.0)
+    )
+
+    assert (run_dir / mass_scaling_include_name).read_text() == MassScalingInclude(1e6)
+
+
+def test_missing_template(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        InputDeckTemplate(str(tmp_path / "missing.inp"))
@@ -0,0 +1,146 @@
+"""
+Tests of the kernel request queue and pool, with KernelWorker.py on the stand-in kernel.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+from ProgressiveLoadScratch.KernelPool import (
+    KernelPool,
+    RequestQueue,
+    Serve,
+    WriteInputRequest,
+)
+
+material = {
+    "rho": 8e-09,
+    "E": 200000.0,
+    "nu": 0.3,
+    "A": 700.0,
+    "B": 700.0,
+    "n": 0.5,
+    "mu": 0.1,
+}
+model = {
+    "SubstrateSizeX": 0.02,
+    "SubstrateSizeY": 0.02,
+    "SubstrateSizeZ": 0.02,
+    "mass_scale": 5e5,
+    "use_ALE": True,
+    "include_wear": False,
+}
+
+
+def test_claim_moves_the_oldest_request(tmp_path):
+    queue = RequestQueue(tmp_path / "queue")
+    first = queue.submit({"type": "build", "n": 1})
+    second = queue.submit({"type": "build", "n": 2})
+
+    request = queue.claim()
+    assert request["id"] == first and request["n"] == 1
+    assert not os.path.exists(queue.path("requests", first))
+    assert os.path.exists(queue.path("claimed", first))
+    assert queue.n_pending() == 1
+
+    queue.complete(first, {"status": "ok"})
+    assert not os.path.exists(queue.path("claimed", first))
+    assert queue.result(first) == {"status": "ok", "id": first}
+    assert queue.result(second) is None
+
+
+def test_each_request_is_claimed_once(tmp_path):
+    queue = RequestQueue(tmp_path / "queue")
+    request_ids = [queue.submit({"type": "build", "n": i}) for i in range(200)]
+    claimed = [[] for _ in range(8)]
+
+    def claim_all(claimed_by_thread):
+        while True:
+            request = queue.claim()
+            if request is None:
+                return
+            claimed_by_thread.append(request["id"])
+
+    threads = [threading.Thread(target=claim_all, args=(c,)) for c in claimed]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_claimed = [request_id for c in claimed for request_id in c]
+    assert sorted(all_claimed) == sorted(request_ids)
+    assert len(set(all_claimed)) == len(all_claimed)
+
+
+def test_serve_collects_results_and_errors(tmp_path):
+    queue = RequestQueue(tmp_path / "queue")
+
+    def handle(request):
+        if request["type"] != "square":
+            raise ValueError(f"Unknown request type {request['type']}")
+        if request["x"] < 0:
+            raise RuntimeError("negative")
+        return {"y": request["x"] ** 2}
+
+    requests = [
+        {"type": "square", "x": 3},
+        {"type": "square", "x": -1},
+        {"type": "cube", "x": 2},
+        {"type": "square", "x": 4},
+    ]
+    pool = KernelPool(queue_dir=tmp_path / "queue", poll_interval=0.01)
+    request_ids = [pool.submit(request) for request in requests]
+    n_served = Serve(queue, handle, "thread", poll_interval=0.01, idle_timeout=0.1)
+    results = pool.wait(request_ids, timeout=5)
+
+    assert n_served == 4
+    assert [result["status"] for result in results] == ["ok", "error", "error", "ok"]
+    assert results[0]["result"] == {"y": 9} and results[3]["result"] == {"y": 16}
+    assert results[1]["error"] == "RuntimeError: negative"
+    assert results[2]["error"].startswith("ValueError: Unknown request type")
+    assert all(result["worker"] == "thread" for result in results)
+
+
+def test_serve_exits_on_stop(tmp_path):
+    queue = RequestQueue(tmp_path / "queue")
+    queue.stop()
+    assert Serve(queue, lambda request: {}, poll_interval=0.01) == 0
+
+
+def test_wait_raises_when_all_workers_exit(tmp_path):
+    worker_command = [sys.executable, "-c", "raise SystemExit(1)"]
+    pool = KernelPool(2, tmp_path / "queue", worker_command, poll_interval=0.05)
+    pool.start()
+    request_id = pool.submit({"type": "build"})
+    with pytest.raises(RuntimeError, match="All kernel workers exited"):
+        pool.wait([request_id], timeout=60)
+
+
+def test_wait_times_out(tmp_path):
+    pool = KernelPool(queue_dir=tmp_path / "queue", poll_interval=0.01)
+    request_id = pool.submit({"type": "build"})
+    with pytest.raises(TimeoutError):
+        pool.wait([request_id], timeout=0.05)
+
+
+def test_concurrent_requests_for_the_same_model(tmp_path, fake_abaqus_command):
+    requests = [
+        WriteInputRequest(f"Job{i}", tmp_path / f"run{i}", model, material)
+        for i in range(12)
+    ]
+    requests.append(dict(requests[0], type="unknown"))
+    with KernelPool(
+        3, tmp_path / "queue", fake_abaqus_command + ["cae"], poll_interval=0.05
+    ) as pool:
+        results = pool.map(requests, timeout=300)
+
+    for result in results[:-1]:
+        assert result["status"] == "ok", result.get("traceback")
+        assert os.path.isfile(result["result"]["input_path"])
+    assert results[-1]["status"] == "error"
+    assert "Unknown request type" in results[-1]["error"]
+    assert len({result["worker"] for result in results}) > 1
+    cached = os.listdir(tmp_path / "queue" / "ModelCache")
+    assert not [name for name in cached if ".tmp" in name]
@@ -0,0 +1,69 @@
+"""
+Tests of the model build cache in this process, on the stand-in kernel.
+"""
+
+import os
+
+import fake_kernel
+import pytest
+
+model = {
+    "SubstrateSizeX": 0.02,
+    "SubstrateSizeY": 0.02,
+    "SubstrateSizeZ": 0.02,
+    "mass_scale": 5e5,
+    "use_ALE": True,
+    "include_wear": False,
+}
+
+
+@pytest.fixture(scope="module")
+def kernel():
+    # Installed once, as ModelCache binds openMdb of the stand-in kernel on import
+    return fake_kernel.install()
+
+
+@pytest.fixture
+def cache(kernel, tmp_path):
+    from ProgressiveLoadScratch.ModelCache import ModelBuildCache, ModelKey
+
+    mdb = kernel
+    mdb.close()
+    cache = ModelBuildCache(tmp_path / "ModelCache")
+    key = ModelKey(0.02, 0.02, 0.02, True, False)
+    return mdb, cache, cache.path(key)
+
+
+def test_built_model_is_reopened_from_its_entry(cache):
+    mdb, cache, path = cache
+    cache.ScratchModelSetup(**model)
+
+    assert mdb.pathName == path == cache.open_pathName
+    assert sorted(os.listdir(cache.cache_dir)) == [
+        os.path.basename(path),
+        os.path.splitext(os.path.basename(path))[0] + ".json",
+    ]
+
+
+def test_open_model_is_patched(cache, capsys):
+    mdb, cache, path = cache
+    cache.ScratchModelSetup(**model)
+    n_calls = len(mdb.log)
+
+    cache.ScratchModelSetup(**dict(model, mass_scale=1e6))
+
+    assert "is open, changing the mass scaling" in capsys.readouterr().out
+    assert mdb.pathName == path
+    assert len(mdb.log) > n_calls
+    assert os.listdir(cache.cache_dir) == os.listdir(os.path.dirname(path))
+
+
+def test_cached_model_is_opened(cache, capsys):
+    mdb, cache, path = cache
+    cache.ScratchModelSetup(**model)
+    mdb.close()
+
+    cache.ScratchModelSetup(**model)
+
+    assert f"Opening cached model {path}" in capsys.readouterr().out
+    assert mdb.pathName == path
@@ -0,0 +1,65 @@
+"""
+Tests of post-processing in an Abaqus Python process, on the stand-in solver and reader.
+"""
+
+import os
+import sys
+
+import fake_abaqus
+import pytest
+
+from ProgressiveLoadScratch.PostProcessWorker import PostProcessInSubprocess
+from ProgressiveLoadScratch.ResultsFile import ReadAttributes
+
+# Abaqus Python that prints a licence message after the script has finished
+chatty_python = """
+import subprocess, sys
+code = subprocess.call([sys.executable, {fake_abaqus!r}, "python"] + sys.argv[1:])
+print("Abaqus License Manager checked in the token")
+sys.exit(code)
+"""
+
+
+@pytest.fixture
+def job(workdir):
+    os.makedirs("Sweep_00007")
+    job = os.path.join("Sweep_00007", "Sweep_00007")
+    fake_abaqus.solve(job, 0.0)
+    return job
+
+
+def test_results_path_despite_trailing_output(job, workdir):
+    script = workdir / "chatty_abaqus.py"
+    script.write_text(chatty_python.format(fake_abaqus=fake_abaqus.__file__))
+
+    path = PostProcessInSubprocess(
+        job,
+        "sim00007",
+        {"id": "00007", "E": 210000.0},
+        {"mesh_size_x": 0.02},
+        python_command=[sys.executable, str(script)],
+    )
+
+    assert path == os.path.join("SimDataOutputs", "sim00007_Results.npz")
+    assert ReadAttributes(path)["material"] == {"id": "00007", "E": 210000.0}
+
+
+def test_output_folder(job, workdir, fake_abaqus_command):
+    path = PostProcessInSubprocess(
+        job,
+        "sim00007",
+        {"id": "00007"},
+        python_command=fake_abaqus_command + ["python"],
+        outputFolder=str(workdir / "Results"),
+    )
+
+    assert path == str(workdir / "Results" / "sim00007_Results.npz")
+    assert os.path.isfile(path)
+
+
+def test_failed_post_process(job, fake_abaqus_command):
+    os.remove(job + ".odb")
+    with pytest.raises(RuntimeError, match="exited with code"):
+        PostProcessInSubprocess(
+            job, "sim00007", {}, python_command=fake_abaqus_command + ["python"]
+        )
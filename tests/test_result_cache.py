@@ -0,0 +1,110 @@
+"""
+Tests of the content-addressed cache of results files.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ProgressiveLoadScratch.ResultCache import CacheKey, ResultCache, directory_size
+from ProgressiveLoadScratch.ResultsFile import (
+    HistoryArray,
+    LoadResults,
+    SurfaceArray,
+    WriteResults,
+)
+
+material = {"id": "00007", "rho": 8e-09, "E": 210000.0, "nu": 0.29}
+settings = {"mesh_size_x": 0.02, "ALE": False, "num_cpus": 4, "num_domains": 4}
+
+
+def WriteRun(path, material):
+    """Writes a small results file of a run."""
+    time = np.linspace(0.0, 1.0, 11)
+    history = HistoryArray(time, time, 2 * time, 3 * time, time**2, time**3)
+    undeformed = np.arange(12, dtype=float).reshape(4, 3)
+    surface = SurfaceArray([1, 2, 3, 4], undeformed, undeformed - 0.01)
+    attributes = {
+        "material": material,
+        "model_settings": settings,
+        "WallclockTime": 12.5,
+    }
+    WriteResults(str(path), history, surface, attributes)
+    return str(path)
+
+
+def test_key_ignores_the_id_and_the_parallelism():
+    key = CacheKey(material, settings)
+
+    assert CacheKey(dict(material, id="00008"), settings) == key
+    assert CacheKey(material, dict(settings, num_cpus=16)) == key
+    assert CacheKey(material, dict(settings, num_domains=16)) == key
+    assert CacheKey(dict(material, E=200000), settings) != key
+    assert CacheKey(material, dict(settings, mesh_size_x=0.01)) != key
+
+
+def test_key_of_integral_floats():
+    assert CacheKey(dict(material, E=200000), settings) == CacheKey(
+        dict(material, E=200000.0), settings
+    )
+
+
+def test_store_and_fetch(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), settings)
+    destination = str(tmp_path / "out" / "sim00008_Results.npz")
+    assert not cache.fetch(material, destination)
+
+    cache.store(material, [WriteRun(tmp_path / "sim00007_Results.npz", material)])
+    other = dict(material, id="00008")
+
+    assert cache.fetch(other, destination)
+    history, surface, attributes = LoadResults(destination)
+    assert attributes["material"] == other
+    assert len(history) == 11 and list(surface["NodeLabel"]) == [1, 2, 3, 4]
+    # Other settings miss
+    assert not ResultCache(str(tmp_path / "cache"), dict(settings, ALE=True)).fetch(
+        material, destination
+    )
+
+
+def test_fetch_converts_the_format(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), settings)
+    cache.store(material, [WriteRun(tmp_path / "sim00007_Results.npz", material)])
+    destination = str(tmp_path / "sim00007_Results.csv")
+
+    assert cache.fetch(material, destination)
+    history, surface, _ = LoadResults(destination)
+    assert len(history) == 11 and len(surface) == 4
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    materials = [dict(material, E=200000.0 + i) for i in range(3)]
+    cache = ResultCache(str(tmp_path / "cache"), settings, max_bytes=float("inf"))
+    for i, values in enumerate(materials):
+        cache.store(values, [WriteRun(tmp_path / f"sim{i}_Results.npz", values)])
+        os.utime(cache.entry_dir(cache.key(values)), (1000.0 + i, 1000.0 + i))
+    size = directory_size(cache.entry_dir(cache.key(materials[0])))
+
+    # A fetch marks the oldest entry as used
+    assert cache.fetch(materials[0], str(tmp_path / "fetched_Results.npz"))
+    # Room for two entries
+    cache.max_bytes = 2 * size + size // 2
+    cache.evict()
+
+    assert [
+        cache.fetch(values, str(tmp_path / "x_Results.npz")) for values in materials
+    ] == [True, False, True]
+    assert len(cache.entries()) == 2
+
+
+@pytest.mark.parametrize("older_than, left", [(None, 0), (3600.0, 1)])
+def test_clear(tmp_path, older_than, left):
+    cache = ResultCache(str(tmp_path / "cache"), settings)
+    for i, values in enumerate([material, dict(material, E=1.0)]):
+        cache.store(values, [WriteRun(tmp_path / f"sim{i}_Results.npz", values)])
+    os.utime(cache.entry_dir(cache.key(material)), (1000.0, 1000.0))
+
+    cache.clear(older_than)
+
+    assert len(cache.entries()) == left
@@ -0,0 +1,140 @@
+"""
+Tests of the results files and the fingerprints of the extraction.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ProgressiveLoadScratch import Constants as C
+from ProgressiveLoadScratch.ResultsFile import (
+    ConvertResults,
+    ExtractorFingerprint,
+    HistoryArray,
+    LoadResults,
+    MeshFingerprint,
+    ReadAttributes,
+    ReadResultsFile,
+    SurfaceArray,
+    SurfaceGeometryPath,
+    WriteResults,
+    WriteSurfaceGeometry,
+)
+
+attributes = {
+    "material": {"id": "00007", "E": 210000.0, "nu": 0.29},
+    "model_settings": {"mesh_size_x": 0.02, "ALE": False},
+    "WallclockTime": 12.5,
+}
+
+
+def Arrays():
+    """History and surface of a small run, the surface nodes sorted by label."""
+    time = np.linspace(0.0, 1.0, 11)
+    history = HistoryArray(time, -time, 2 * time, 3 * time, time**2, time**3)
+    undeformed = np.arange(12, dtype=float).reshape(4, 3)
+    deformed = undeformed + [0.0, 0.0, -0.25]
+    return history, SurfaceArray([3, 5, 8, 13], undeformed, deformed)
+
+
+@pytest.mark.parametrize("suffix", ["_Results.npz", "_Results.csv"])
+def test_round_trip(tmp_path, suffix):
+    path = str(tmp_path / ("sim00007" + suffix))
+    history, surface = Arrays()
+    WriteResults(path, history, surface, attributes)
+
+    read_history, read_surface, read_attributes = LoadResults(path)
+
+    for name in history.dtype.names:
+        np.testing.assert_allclose(read_history[name], history[name])
+    for name in surface.dtype.names:
+        np.testing.assert_allclose(read_surface[name], surface[name])
+    assert read_attributes["material"] == attributes["material"]
+    assert read_attributes["model_settings"] == attributes["model_settings"]
+    assert read_attributes["WallclockTime"] == 12.5
+    assert ReadAttributes(path)["material"] == attributes["material"]
+
+
+@pytest.mark.parametrize("suffix", ["_Results.npz", "_Results.csv"])
+def test_load_without_the_surface(tmp_path, suffix):
+    path = str(tmp_path / ("sim00007" + suffix))
+    history, surface = Arrays()
+    WriteResults(path, history, surface, attributes)
+
+    read_history, read_surface, _ = LoadResults(path, surface=False)
+
+    assert len(read_history) == len(history) and len(read_surface) == 0
+
+
+def test_displacement_only(tmp_path):
+    path = str(tmp_path / "sim00007_Results.npz")
+    history, surface = Arrays()
+    undeformed = np.column_stack([surface[axis + "_undeformed"] for axis in "xyz"])
+    WriteSurfaceGeometry(
+        SurfaceGeometryPath(path, "mesh0"),
+        surface["NodeLabel"],
+        undeformed,
+        [0, 1, 2, 3],
+    )
+
+    WriteResults(path, history, surface, dict(attributes, surface_geometry="mesh0"))
+
+    with np.load(path) as archive:
+        assert "displacement" in archive.files and "surface" not in archive.files
+    record = ReadResultsFile(path)
+    assert list(record["node_labels"]) == [3, 5, 8, 13]
+    np.testing.assert_allclose(record["undeformed"], undeformed)
+    np.testing.assert_allclose(record["deformed"][:, 2], undeformed[:, 2] - 0.25)
+    assert record["E"] == 210000.0 and record["WallclockTime"] == 12.5
+
+
+def test_without_the_surface_geometry_the_surface_is_stored(tmp_path):
+    path = str(tmp_path / "sim00007_Results.npz")
+    history, surface = Arrays()
+
+    WriteResults(path, history, surface, dict(attributes, surface_geometry="mesh0"))
+
+    with np.load(path) as archive:
+        assert "surface" in archive.files
+    assert "surface_geometry" not in ReadAttributes(path)
+    with pytest.raises(ValueError, match="No surface geometry"):
+        WriteResults(
+            path,
+            history,
+            None,
+            dict(attributes, surface_geometry="mesh0"),
+            displacement=np.zeros((4, 3)),
+        )
+
+
+def test_convert(tmp_path):
+    path = str(tmp_path / "sim00007_Results.npz")
+    history, surface = Arrays()
+    WriteResults(path, history, surface, attributes)
+
+    converted = ConvertResults(path, "_Results.csv")
+
+    assert converted == str(tmp_path / "sim00007_Results.csv")
+    assert os.path.isfile(converted)
+    record = ReadResultsFile(converted)
+    np.testing.assert_allclose(record["history"], ReadResultsFile(path)["history"])
+    assert list(record["node_labels"]) == [3, 5, 8, 13]
+
+
+def test_fingerprint_ignores_unrelated_constants(monkeypatch):
+    fingerprint = ExtractorFingerprint()
+    key = MeshFingerprint([1, 2, 3], {"mesh_size_x": 0.02})
+    monkeypatch.setattr(C, "num_cpus", C.num_cpus + 1)
+    monkeypatch.setattr(C, "abaqus_command", ["/opt/abaqus/abq2025"])
+    monkeypatch.setattr(C, "scratch_time", 2 * C.scratch_time)
+
+    assert ExtractorFingerprint() == fingerprint
+    assert MeshFingerprint([1, 2, 3], {"mesh_size_x": 0.02}) == key
+
+
+def test_fingerprint_follows_the_geometry(monkeypatch):
+    fingerprint = ExtractorFingerprint()
+    monkeypatch.setattr(C, "ys2", 2 * C.ys2)
+
+    assert ExtractorFingerprint() != fingerprint
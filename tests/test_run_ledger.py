@@ -0,0 +1,99 @@
+"""
+Tests of the resumable run ledger.
+"""
+
+import pytest
+
+from ProgressiveLoadScratch.RunLedger import RunLedger
+
+run_ids = ["00000", "00001", "00002", "00003", "00004", "00005"]
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = RunLedger(str(tmp_path / "ledger.sqlite"))
+    yield ledger
+    ledger.close()
+
+
+def test_new_runs_are_pending_in_order(ledger):
+    assert ledger.pending(run_ids) == run_ids
+    assert ledger.summary() == {"queued": len(run_ids)}
+    assert ledger.status("00003") == "queued"
+    assert ledger.status("99999") is None and ledger.record("99999") is None
+
+
+def test_transitions(ledger):
+    ledger.pending(run_ids)
+    for run_id in run_ids[:5]:
+        ledger.mark_running(run_id, "Sweep_" + run_id)
+    ledger.mark_done("00000", wallclock_time=12.5, output_path="sim00000_Results.npz")
+    ledger.mark_failed("00001", message="Solver exited with code 1", returncode=1)
+    ledger.mark_aborted("00002", "Stable increment collapsed", wallclock_time=3.0)
+    ledger.mark_interrupted("00003", "Sweep stopped by KeyboardInterrupt")
+
+    assert ledger.summary() == {
+        "done": 1,
+        "failed": 1,
+        "aborted": 1,
+        "interrupted": 1,
+        "running": 1,
+        "queued": 1,
+    }
+    record = ledger.record("00000")
+    assert record["status"] == "done" and record["job_name"] == "Sweep_00000"
+    assert record["wallclock_time"] == 12.5 and record["returncode"] == 0
+    assert record["output_path"] == "sim00000_Results.npz"
+    assert record["attempts"] == 1
+    assert record["started_at"] <= record["finished_at"]
+    assert ledger.record("00001")["returncode"] == 1
+    assert ledger.record("00002")["message"] == "Stable increment collapsed"
+
+
+def test_restart_skips_finished_runs(ledger):
+    ledger.pending(run_ids)
+    ledger.mark_running("00000")
+    ledger.mark_done("00000")
+    ledger.mark_running("00001")
+    ledger.mark_failed("00001")
+    ledger.mark_running("00002")
+    ledger.mark_aborted("00002", "diverged")
+    ledger.mark_running("00003")
+    ledger.mark_interrupted("00003", "stopped")
+    # A crashed driver leaves 00004 running
+    ledger.mark_running("00004")
+
+    assert ledger.pending(run_ids) == ["00003", "00004", "00005"]
+    assert ledger.pending(run_ids, retry_failed=True) == [
+        "00001",
+        "00002",
+        "00003",
+        "00004",
+        "00005",
+    ]
+
+
+def test_retry_counts_attempts_and_clears_the_failure(ledger):
+    ledger.pending(run_ids)
+    ledger.mark_running("00001")
+    ledger.mark_failed("00001", message="license", returncode=1)
+    ledger.mark_running("00001")
+
+    record = ledger.record("00001")
+    assert record["status"] == "running" and record["attempts"] == 2
+    assert record["message"] is None and record["returncode"] is None
+    assert record["finished_at"] is None
+
+
+def test_ledger_persists(tmp_path):
+    path = str(tmp_path / "ledger.sqlite")
+    ledger = RunLedger(path)
+    ledger.pending(run_ids)
+    ledger.mark_running("00000")
+    ledger.mark_done("00000")
+    ledger.close()
+
+    reopened = RunLedger(path)
+    assert reopened.pending(run_ids + ["00006"]) == run_ids[1:] + ["00006"]
+    assert reopened.summary() == {"done": 1, "queued": 6}
+    reopened.close()
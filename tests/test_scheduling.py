@@ -0,0 +1,106 @@
+"""
+Tests of the longest-processing-time ordering and the makespan report.
+"""
+
+import pytest
+
+from ProgressiveLoadScratch.Scheduling import (
+    IdealMakespan,
+    LongestProcessingTimeOrder,
+    MakespanReport,
+    SimulateSchedule,
+)
+from ProgressiveLoadScratch.SweepExecutor import SweepExecutor
+
+
+def test_longest_first():
+    items = ["a", "b", "c", "d"]
+    assert LongestProcessingTimeOrder(items, [1.0, 4.0, 2.0, 3.0]) == [
+        "b",
+        "d",
+        "c",
+        "a",
+    ]
+
+
+def test_equal_predictions_keep_their_order():
+    items = ["a", "b", "c", "d", "e"]
+    assert LongestProcessingTimeOrder(items, [1.0, 2.0, 1.0, 2.0, 1.0]) == [
+        "b",
+        "d",
+        "a",
+        "c",
+        "e",
+    ]
+
+
+def test_simulate_schedule():
+    makespan, start_times = SimulateSchedule([3.0, 1.0, 2.0, 2.0], 2)
+    assert start_times == [0.0, 0.0, 1.0, 3.0]
+    assert makespan == 5.0
+    assert SimulateSchedule([], 2) == (0.0, [])
+
+
+def test_lpt_within_four_thirds_of_the_optimum():
+    durations = [5.0, 5.0, 4.0, 4.0, 3.0, 3.0, 3.0]
+    optimum = 9.0  # (5, 4), (5, 4), (3, 3, 3)
+    makespan, _ = SimulateSchedule(LongestProcessingTimeOrder(durations, durations), 3)
+    assert makespan == 11.0
+    assert optimum <= makespan <= 4.0 / 3.0 * optimum
+
+
+def test_lpt_beats_long_jobs_last():
+    durations = [1.0] * 8 + [8.0]
+    lpt, _ = SimulateSchedule(LongestProcessingTimeOrder(durations, durations), 4)
+    last, _ = SimulateSchedule(durations, 4)
+    assert lpt == IdealMakespan(durations, 4) == 8.0
+    assert last == 10.0
+
+
+def test_ideal_makespan():
+    assert IdealMakespan([2.0, 2.0, 2.0, 2.0], 2) == 4.0
+    assert IdealMakespan([10.0, 1.0, 1.0], 2) == 10.0
+    assert IdealMakespan([], 2) == 0.0
+
+
+def test_makespan_report():
+    report = MakespanReport(5.0, [3.0, 1.0, 2.0, 2.0], 2)
+    assert report["makespan"] == 5.0
+    assert report["ideal_makespan"] == 4.0
+    assert report["ratio"] == pytest.approx(1.25)
+    assert report["idle_fraction"] == pytest.approx(0.2)
+
+
+def test_makespan_report_without_runs():
+    report = MakespanReport(0.0, [], 2)
+    assert report["ratio"] == 1.0
+    assert report["idle_fraction"] == 0.0
+
+
+def test_executor_submits_longest_predicted_first(
+    workdir, fake_abaqus_command, write_input
+):
+    durations = {"00000": 0.1, "00001": 0.6, "00002": 0.3, "00003": 0.5}
+    parameters = [{"id": run_id} for run_id in durations]
+    executor = SweepExecutor(
+        write_input,
+        lambda job_name, run_dir, arg: None,
+        sweep_name="Test",
+        max_concurrent_jobs=2,
+        num_cpus=2,
+        solver_command=fake_abaqus_command,
+        poll_interval=0.05,
+        predict_wallclock=lambda arg: durations[arg["id"]],
+        solver_env=lambda arg: {"FAKE_ABAQUS_DURATION": durations[arg["id"]]},
+    )
+
+    jobs = executor.run(parameters)
+
+    assert [job.run_id for job in jobs] == ["00001", "00003", "00002", "00000"]
+    assert [job.status for job in jobs] == ["done"] * 4
+    start_times = [job.solver.start_time for job in jobs]
+    assert start_times == sorted(start_times)
+    report = executor.report
+    assert set(report) == {"makespan", "ideal_makespan", "ratio", "idle_fraction"}
+    assert report["ratio"] >= 1.0
+    assert 0.0 <= report["idle_fraction"] < 1.0
@@ -0,0 +1,64 @@
+"""
+Tests of the solver launcher on the stand-in solver.
+"""
+
+import sys
+import time
+
+import pytest
+
+from ProgressiveLoadScratch.SolverLauncher import SolverRun
+
+# A solver that ignores SIGTERM and "abaqus terminate"
+stubborn_command = [
+    sys.executable,
+    "-c",
+    "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+    "print('started', flush=True); time.sleep(60)",
+]
+
+
+def Deck(tmp_path):
+    path = tmp_path / "Job.inp"
+    path.write_text("*Heading\n")
+    return str(path)
+
+
+def test_solve(tmp_path, fake_abaqus_command):
+    run = SolverRun(
+        Deck(tmp_path),
+        num_cpus=2,
+        solver_command=fake_abaqus_command,
+        env={"FAKE_ABAQUS_DURATION": 0.2},
+    )
+    assert run.poll() is None and run.wallclock_time is None
+
+    assert run.start().wait(timeout=60) == 0
+    assert run.succeeded and run.wallclock_time > 0.0
+    assert (tmp_path / "Job.sta").exists() and (tmp_path / "Job.odb").exists()
+
+
+def test_failed_launch_closes_the_output(tmp_path):
+    run = SolverRun(Deck(tmp_path), solver_command=[str(tmp_path / "no_abaqus")])
+    with pytest.raises(OSError):
+        run.start()
+    assert run._stdout.closed
+    assert run.poll() is None
+
+
+def test_terminate_kills_a_solver_that_does_not_stop(tmp_path):
+    run = SolverRun(Deck(tmp_path), solver_command=stubborn_command).start()
+    while "started" not in run.stdout():
+        time.sleep(0.05)
+
+    start = time.time()
+    run.terminate(timeout=0.5)
+
+    assert time.time() - start < 10.0
+    assert run.poll() is not None and not run.succeeded
+
+
+def test_terminate_before_start(tmp_path):
+    run = SolverRun(Deck(tmp_path))
+    run.terminate()
+    assert run.poll() is None
@@ -0,0 +1,158 @@
+"""
+Tests of the NumPy substrate mesh: counts, element shapes, the contact surface and the written blocks.
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from ProgressiveLoadScratch import Constants as C
+from ProgressiveLoadScratch.StructuredMesh import (
+    BiasSeeds,
+    CheckMesh,
+    ElementQuality,
+    SubstrateMesh,
+    SubstrateSeeds,
+    UniformSeeds,
+    write_labels,
+)
+
+mesh_sizes = [
+    (0.02, 0.02, 0.02),
+    (0.01, 0.01, 0.01),
+    (0.008, 0.006, 0.007),
+    (0.02, 0.01, 0.015),
+]
+
+
+def ParseBlocks(text):
+    """Keyword lines with their data lines, grouped by the keyword name, e.g. "*Nset"."""
+    blocks = {}
+    for line in text.splitlines():
+        if line.startswith("*"):
+            data = []
+            blocks.setdefault(line.split(",")[0], []).append((line, data))
+        else:
+            data.append(line)
+    return blocks
+
+
+def ParseLabels(lines):
+    return [int(value) for line in lines for value in line.split(",")]
+
+
+@pytest.fixture(scope="module", params=mesh_sizes, ids=lambda s: "x".join(map(str, s)))
+def sized_mesh(request):
+    return request.param, SubstrateMesh(*request.param)
+
+
+@pytest.fixture
+def mesh(sized_mesh):
+    return sized_mesh[1]
+
+
+def test_uniform_seeds_are_never_longer_than_the_size():
+    sizes = UniformSeeds(0.24, 0.007)
+    assert sizes.max() <= 0.007
+    assert sizes.sum() == pytest.approx(0.24)
+
+
+def test_bias_seeds_grow_from_the_fine_size():
+    sizes = BiasSeeds(0.36, 0.01, 0.3)
+    assert sizes[0] <= 0.01 * (1.0 + 1e-6)
+    assert np.all(np.diff(sizes) > 0.0)
+    assert sizes[-1] / sizes[0] == pytest.approx(30.0)
+    assert sizes.sum() == pytest.approx(0.36)
+
+
+def test_counts_match_the_seeds(sized_mesh):
+    size, mesh = sized_mesh
+    x, y, z = SubstrateSeeds(*size)
+    assert mesh.shape == (len(x), len(y), len(z))
+    assert mesh.n_nodes == len(x) * len(y) * len(z)
+    assert mesh.n_elements == (len(x) - 1) * (len(y) - 1) * (len(z) - 1)
+    assert (x[0], y[0], z[0]) == (C.xs1, C.ys1, C.zs1)
+    assert (x[-1], y[-1], z[-1]) == (C.xs2, C.ys2, C.zs2)
+
+
+def test_check_mesh(mesh):
+    assert CheckMesh(mesh) == []
+
+
+def test_no_inverted_elements_and_volume_of_the_box(mesh):
+    volume = ElementQuality(mesh)["volume"]
+    box = (C.xs2 - C.xs1) * (C.ys2 - C.ys1) * (C.zs2 - C.zs1)
+    assert np.all(volume > 0.0)
+    assert volume.sum() == pytest.approx(box, rel=1e-9)
+
+
+def test_refined_area_has_the_requested_size(sized_mesh):
+    (size_x, size_y, size_z), mesh = sized_mesh
+    i, j, k = mesh.element_index
+    refined = mesh.refined_elements() - 1
+    assert np.all(mesh.x[i[refined] + 1] - mesh.x[i[refined]] <= size_x * (1 + 1e-9))
+    assert np.all(mesh.y[j[refined] + 1] - mesh.y[j[refined]] <= size_y * (1 + 1e-9))
+    assert np.all(mesh.z[k[refined] + 1] - mesh.z[k[refined]] <= size_z * (1 + 1e-9))
+
+
+def test_contact_nodes(sized_mesh):
+    (size_x, _, size_z), mesh = sized_mesh
+    n_x = len(UniformSeeds(C.dpo_x - C.xs1, size_x)) + 1
+    n_z = len(UniformSeeds(C.zs2 - 2 * C.dpo_z - C.zs1, size_z)) + 1
+    contact = mesh.contact_nodes()
+    assert len(contact) == n_x * n_z
+    assert len(mesh.contact_elements()) == (n_x - 1) * (n_z - 1)
+    assert np.allclose(mesh.nodes[contact - 1, 1], C.ys2)
+
+
+def test_check_mesh_reports_problems():
+    mesh = SubstrateMesh(0.02, 0.02, 0.02)
+    mesh.elements = mesh.elements[:, [1, 0, 3, 2, 5, 4, 7, 6]]
+    problems = CheckMesh(mesh, max_aspect_ratio=1.0)
+    assert any("non-positive volume" in problem for problem in problems)
+    assert any("aspect ratio above 1" in problem for problem in problems)
+
+
+@pytest.mark.parametrize("n_labels", [0, 1, 16, 17, 33])
+def test_write_labels(n_labels):
+    f = io.StringIO()
+    labels = np.arange(1, n_labels + 1)
+    write_labels(f, labels)
+    lines = f.getvalue().splitlines()
+    assert all(1 <= len(line.split(",")) <= 16 for line in lines)
+    assert ParseLabels(lines) == labels.tolist()
+
+
+def test_write_inp(mesh):
+    f = io.StringIO()
+    mesh.write_inp(f)
+    blocks = ParseBlocks(f.getvalue())
+
+    [(_, nodes)] = blocks["*Node"]
+    assert len(nodes) == mesh.n_nodes
+    [(keyword, elements)] = blocks["*Element"]
+    assert keyword == "*Element, type=C3D8R"
+    assert len(elements) == mesh.n_elements
+    assert [int(v) for v in elements[-1].split(",")] == [
+        mesh.n_elements
+    ] + mesh.elements[-1].tolist()
+
+    sets = mesh.sets()
+    nsets = {keyword: lines for keyword, lines in blocks["*Nset"]}
+    for name, labels in sets["nsets"].items():
+        lines = nsets[f"*Nset, nset={name}"]
+        assert all(len(line.split(",")) <= 16 for line in lines)
+        assert ParseLabels(lines) == labels.tolist()
+    elsets = {keyword: lines for keyword, lines in blocks["*Elset"]}
+    for name, labels in sets["elsets"].items():
+        lines = elsets[f"*Elset, elset={name}"]
+        assert all(len(line.split(",")) <= 16 for line in lines)
+        assert ParseLabels(lines) == labels.tolist()
+
+    surface_set = "_" + C.slave_surface_name + "_S5"
+    lines = elsets[f"*Elset, elset={surface_set}, internal"]
+    assert ParseLabels(lines) == mesh.contact_elements().tolist()
+    [(keyword, lines)] = blocks["*Surface"]
+    assert keyword == f"*Surface, type=ELEMENT, name={C.slave_surface_name}"
+    assert lines == [f"{surface_set}, S5"]
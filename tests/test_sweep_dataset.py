@@ -0,0 +1,129 @@
+"""
+Tests of the consolidated dataset of a sweep.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ProgressiveLoadScratch.ResultsFile import (
+    HistoryArray,
+    ReadResultsFile,
+    SurfaceArray,
+    WriteResults,
+)
+from ProgressiveLoadScratch.SweepDataset import SweepDataset, index_name
+
+
+def WriteRun(folder, run_id, samples, mu):
+    """Writes a results file whose RF3 history counts up from the run number."""
+    time = np.linspace(0.0, 1.0, samples)
+    offset = float(run_id)
+    history = HistoryArray(time, time, time, offset + np.arange(samples), time, time)
+    undeformed = np.arange(9, dtype=float).reshape(3, 3) + offset
+    surface = SurfaceArray([1, 2, 3], undeformed, undeformed - 0.5)
+    attributes = {
+        "material": {"id": run_id, "mu": mu},
+        "model_settings": {"mesh_size_x": 0.02},
+        "WallclockTime": 10.0,
+    }
+    path = os.path.join(folder, f"sim{run_id}_Results.npz")
+    WriteResults(path, history, surface, attributes)
+    return path
+
+
+@pytest.fixture
+def results(tmp_path):
+    folder = tmp_path / "SimDataOutputs"
+    folder.mkdir()
+    return [
+        WriteRun(str(folder), "00000", 4, 0.05),
+        WriteRun(str(folder), "00001", 6, 0.15),
+        WriteRun(str(folder), "00002", 5, 0.25),
+    ]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    return SweepDataset(str(tmp_path / "SweepDataset"))
+
+
+def test_append(dataset, results):
+    assert len(dataset) == 0 and dataset.end("history") == 0
+    for path in results:
+        assert dataset.append(path)
+
+    assert len(dataset) == 3 and dataset.ids() == ["00000", "00001", "00002"]
+    assert dataset.end("history") == 15 and dataset.end("surface") == 9
+    assert [run["history"] for run in dataset.runs] == [[0, 4], [4, 6], [10, 5]]
+    np.testing.assert_allclose(dataset.parameter("mu"), [0.05, 0.15, 0.25])
+
+
+def test_duplicates_are_skipped(dataset, results):
+    assert dataset.append(results[0])
+    assert not dataset.append(results[0])
+    assert dataset.update(os.path.dirname(results[0])) == 2
+    assert dataset.update(os.path.dirname(results[0])) == 0
+
+    assert len(dataset) == 3 and dataset.end("history") == 15
+
+
+def test_run_matches_the_results_file(dataset, results):
+    dataset.update(os.path.dirname(results[0]))
+
+    record = dataset.run(1)
+    expected = ReadResultsFile(results[1])
+    for name in ("history", "node_labels", "undeformed", "deformed"):
+        np.testing.assert_allclose(record[name], expected[name])
+    assert record["mu"] == 0.15 and record["path"] == "sim00001"
+
+
+def test_memory_mapped_slices(dataset, results):
+    dataset.update(os.path.dirname(results[0]))
+    selected = np.flatnonzero(dataset.parameter("mu") > 0.1)
+
+    histories = dataset.history("RF3", selected)
+    profiles = dataset.surface("y_deformed", selected)
+
+    assert all(isinstance(history, np.memmap) for history in histories)
+    assert [list(history) for history in histories] == [
+        [1, 2, 3, 4, 5, 6],
+        [2, 3, 4, 5, 6],
+    ]
+    np.testing.assert_allclose(profiles[1], [2.5, 5.5, 8.5])
+    matrix = dataset.history_matrix("RF3")
+    assert matrix.shape == (3, 6)
+    assert list(matrix[0, :4]) == [0, 1, 2, 3] and np.isnan(matrix[0, 4:]).all()
+
+
+def test_truncated_index_line(dataset, results, tmp_path):
+    dataset.append(results[0])
+    dataset.append(results[1])
+    # An append interrupted while writing the index line of its run
+    index_path = tmp_path / "SweepDataset" / index_name
+    text = index_path.read_text()
+    index_path.write_text(text[: len(text) - 20])
+
+    reader = SweepDataset(dataset.path)
+    assert len(reader) == 1 and reader.end("history") == 4
+
+    assert reader.append(results[2])
+    assert reader.append(results[1])
+    reopened = SweepDataset(dataset.path)
+    assert reopened.ids() == ["00000", "00002", "00001"]
+    assert [list(history) for history in reopened.history("RF3")] == [
+        [0, 1, 2, 3],
+        [2, 3, 4, 5, 6],
+        [1, 2, 3, 4, 5, 6],
+    ]
+
+
+def test_refresh_picks_up_appended_runs(dataset, results):
+    reader = SweepDataset(dataset.path)
+    dataset.append(results[0])
+    assert len(reader) == 0
+
+    reader.refresh()
+
+    assert reader.ids() == ["00000"]
@@ -0,0 +1,151 @@
+"""
+Tests of SweepExecutor on the stand-in solver: concurrency, per-run directories and failing runs.
+"""
+
+import os
+
+import pytest
+
+from ProgressiveLoadScratch.RunLedger import RunLedger
+from ProgressiveLoadScratch.SweepExecutor import SweepExecutor
+
+duration = 0.3
+
+
+def Parameters(n_runs):
+    return [{"id": f"{i:05d}", "E": 200e3 + i} for i in range(n_runs)]
+
+
+@pytest.fixture
+def make_executor(fake_abaqus_command, write_input):
+    """Makes executors of short stand-in solves."""
+
+    def make(post_process=None, **kwargs):
+        kwargs.setdefault("solver_env", lambda arg: {"FAKE_ABAQUS_DURATION": duration})
+        return SweepExecutor(
+            write_input,
+            post_process or (lambda job_name, run_dir, arg: None),
+            sweep_name="Test",
+            num_cpus=4,
+            solver_command=fake_abaqus_command,
+            poll_interval=0.05,
+            **kwargs,
+        )
+
+    return make
+
+
+def MaxOverlap(jobs):
+    """Largest number of solver intervals in flight at the same time."""
+    events = []
+    for job in jobs:
+        events.append((job.solver.start_time, 1))
+        events.append((job.solver.end_time, -1))
+    in_flight = max_in_flight = 0
+    for _, change in sorted(events):
+        in_flight += change
+        max_in_flight = max(max_in_flight, in_flight)
+    return max_in_flight
+
+
+def test_concurrency_is_limited(workdir, make_executor):
+    jobs = make_executor(max_concurrent_jobs=2).run(Parameters(5))
+
+    assert [job.status for job in jobs] == ["done"] * 5
+    assert MaxOverlap(jobs) == 2
+
+
+def test_serial_sweep_does_not_overlap(workdir, make_executor):
+    jobs = make_executor(max_concurrent_jobs=1).run(Parameters(3))
+
+    assert [job.status for job in jobs] == ["done"] * 3
+    assert MaxOverlap(jobs) == 1
+
+
+def test_runs_are_solved_in_their_own_directories(workdir, make_executor):
+    seen = {}
+
+    def post_process(job_name, run_dir, arg):
+        seen[arg["id"]] = (run_dir, sorted(os.listdir(run_dir)))
+
+    jobs = make_executor(post_process, max_concurrent_jobs=3).run(Parameters(3))
+
+    assert len({run_dir for run_dir, _ in seen.values()}) == 3
+    for job in jobs:
+        run_dir, files = seen[job.run_id]
+        assert run_dir == job.job_name
+        assert {job.job_name + ext for ext in (".inp", ".sta", ".odb")} <= set(files)
+        assert not os.path.exists(run_dir)
+        for ext in (".sta", ".odb"):
+            assert os.path.isfile(
+                os.path.join("SimDataOutputs", "sim" + job.run_id + ext)
+            )
+
+
+def test_keep_run_dirs(workdir, make_executor):
+    jobs = make_executor(keep_run_dirs=True).run(Parameters(1))
+
+    assert os.path.isfile(os.path.join(jobs[0].run_dir, jobs[0].job_name + ".inp"))
+
+
+def test_solver_exit_code_fails_only_that_run(workdir, make_executor):
+    def solver_env(arg):
+        env = {"FAKE_ABAQUS_DURATION": duration}
+        if arg["id"] == "00001":
+            env["FAKE_ABAQUS_EXIT_CODE"] = 1
+        return env
+
+    jobs = make_executor(max_concurrent_jobs=2, solver_env=solver_env).run(
+        Parameters(3)
+    )
+
+    assert [job.status for job in jobs] == ["done", "failed", "done"]
+    assert jobs[1].solver.returncode == 1
+    assert not os.path.exists(os.path.join("SimDataOutputs", "sim00001.odb"))
+
+
+def test_failing_write_input_fails_only_that_run(workdir, make_executor, write_input):
+    executor = make_executor(max_concurrent_jobs=2)
+
+    def failing_write_input(job_name, run_dir, parameters):
+        if parameters["id"] == "00000":
+            raise ValueError("no template")
+        write_input(job_name, run_dir, parameters)
+
+    executor.write_input = failing_write_input
+    jobs = executor.run(Parameters(3))
+
+    assert [job.status for job in jobs] == ["failed", "done", "done"]
+    assert jobs[0].solver is None
+
+
+def test_failing_post_process_fails_the_run(workdir, make_executor):
+    def post_process(job_name, run_dir, arg):
+        raise RuntimeError("corrupt odb")
+
+    jobs = make_executor(post_process, post_process_workers=1).run(Parameters(2))
+
+    assert [job.status for job in jobs] == ["failed", "failed"]
+
+
+def test_stopped_sweep_terminates_its_solvers(workdir, make_executor):
+    def solver_env(arg):
+        return {"FAKE_ABAQUS_DURATION": 0.3 if arg["id"] == "00000" else 60.0}
+
+    def post_process(job_name, run_dir, arg):
+        raise KeyboardInterrupt
+
+    ledger = RunLedger("ledger.sqlite")
+    executor = make_executor(
+        post_process, max_concurrent_jobs=2, solver_env=solver_env, ledger=ledger
+    )
+    with pytest.raises(KeyboardInterrupt):
+        executor.run(Parameters(3))
+
+    record = ledger.record("00001")
+    assert record["status"] == "interrupted"
+    assert record["message"] == "Sweep stopped by KeyboardInterrupt"
+    assert record["wallclock_time"] < 30.0
+    assert ledger.record("00000")["status"] == "interrupted"
+    assert ledger.record("00002")["status"] == "queued"
+    assert ledger.pending(["00000", "00001", "00002"]) == ["00000", "00001", "00002"]